@@ -0,0 +1,382 @@
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("The batch simulator needs NumPy: pip install numpy")
+
+from src.engine.rules import DEFAULT_RULES
+
+# Card columns of the hand/draw/discard count arrays
+ONE, TWO, THREE, INSTABILITY, STAMINA = range(5)
+
+# Order and value NPCLogic.choose_cards gives to playable cards
+NPC_CARD_ORDER = [(THREE, 3), (TWO, 2), (INSTABILITY, 2), (ONE, 1)]
+
+
+class RandomBuffer:
+    """
+    Pre-drawn uniform numbers handed out in slices, instead of one call per decision.
+    """
+    def __init__(self, rng, size = 1 << 18):
+        self.rng = rng
+        self.size = size
+        self.buffer = rng.random(size)
+        self.index = 0
+
+    def take(self, n):
+        if self.index + n > self.size:
+            self.size = max(self.size, n)
+            self.buffer = self.rng.random(self.size)
+            self.index = 0
+        values = self.buffer[self.index:self.index + n]
+        self.index += n
+        return values
+
+
+class BatchRace:
+    """
+    Moves many all-NPC races forward at once.
+    Every boat of every race is a row of the state arrays and cards are kept as counts per card type.
+    Follows the same rules and NPC choices as RaceEngine with NPCDecisions.
+    Split paces change per race, the other rules come from the RuleSet.
+    """
+    def __init__(self, split_paces, split_locs, boats = 6, seed = None, rules = DEFAULT_RULES):
+        self.races = len(split_paces)
+        self.boats = boats
+        self.split_locs = np.asarray(split_locs)
+        self.split_paces = np.asarray(split_paces).reshape(self.races, len(self.split_locs))
+        self.aggression = np.array([dict(rules.aggression).get(loc, rules.default_aggression) for loc in split_locs])
+        self.venue_length = rules.venue_length
+        self.hand_limit = rules.hand_limit
+
+        # Cards needed and crab penalty for every stroke rate
+        self.cards_per_rate = np.array(rules.cards_per_rate)
+        self.crab_penalty = np.array(rules.crab_penalty)
+        self.random = RandomBuffer(np.random.default_rng(seed))
+
+        n = self.races * boats
+        deck = [rules.pace_cards.count(1), rules.pace_cards.count(2), rules.pace_cards.count(3), rules.instability_cards, 0]
+
+        # ------ MOVEMENT ------
+        self.round = np.zeros(n, dtype=np.int32)
+        self.position = np.zeros(n, dtype=np.int32)
+        self.stroke_rate = np.full(n, 2, dtype=np.int32)
+        self.caught_crab = np.zeros(n, dtype=bool)
+        self.penalized = np.zeros(n, dtype=bool)
+        self.finished = np.zeros(n, dtype=bool)
+
+        # ------ CARDS ------
+        self.draw_pile = np.tile(np.array(deck, dtype=np.int32), (n, 1))
+        self.hand = np.zeros((n, 5), dtype=np.int32)
+        self.discard_pile = np.zeros((n, 5), dtype=np.int32)
+        self.stamina = np.full(n, rules.stamina_cards, dtype=np.int32)
+
+        # ------ RESULTS ------
+        self.running = np.ones(self.races, dtype=bool)
+        self.rounds = np.zeros(self.races, dtype=np.int32)
+        self.crabs = np.zeros((self.races, len(self.split_locs)), dtype=np.int64)
+        self.tired = np.zeros((self.races, len(self.split_locs)), dtype=np.int64)
+
+    def run(self):
+        """
+        Play rounds until every race is over.
+        """
+        while self.running.any():
+            self.play_round()
+        return self
+
+    def play_round(self):
+        """
+        Play the individual phase of every boat still racing, then bonuses and finish line.
+        Turns of a round don't depend on each other, so all boats play at once.
+        """
+        racing = ~self.finished & np.repeat(self.running, self.boats)
+        self.play_turns(np.flatnonzero(racing))
+        self.apply_bonuses()
+        self.check_finish_line()
+
+    # ------ DECKS MANAGEMENT ------
+    def sample_cards(self, piles):
+        """
+        Pick one random card type from each row of pile counts.
+        """
+        total = piles.sum(1)
+        r = np.floor(self.random.take(len(piles)) * total)
+        return (np.cumsum(piles, 1) <= r[:, None]).sum(1)
+
+    def reshuffle(self, b, failsafe):
+        """
+        Moves discard pile into draw pile for boats with an empty draw pile.
+        """
+        empty = b[self.draw_pile[b].sum(1) == 0]
+        if not empty.size:
+            return
+        self.draw_pile[empty] = self.discard_pile[empty]
+        self.discard_pile[empty] = 0
+        if failsafe:
+            # If both decks are empty, give failsafe card
+            both_empty = empty[self.draw_pile[empty].sum(1) == 0]
+            self.draw_pile[both_empty, ONE] = 1
+
+    def draw_cards(self, b):
+        """
+        Draw cards to the hand until it has the hand limit of cards.
+        """
+        for _ in range(self.hand_limit):
+            b = b[self.hand[b].sum(1) < self.hand_limit]
+            if not b.size:
+                return
+            self.reshuffle(b, failsafe=True)
+            card = self.sample_cards(self.draw_pile[b])
+            self.draw_pile[b, card] -= 1
+            self.hand[b, card] += 1
+
+    def pay_stamina_cards(self, b, amount):
+        """
+        Move up to an amount of Stamina Cards from the Stamina Pile into the Discard Pile.
+        """
+        paid = np.minimum(self.stamina[b], amount)
+        self.stamina[b] -= paid
+        self.discard_pile[b, STAMINA] += paid
+
+    # ------ INDIVIDUAL PHASE ------
+    def play_turns(self, b):
+        """
+        Batched version of RaceEngine.turn_steps for NPC boats.
+        """
+        self.caught_crab[b] = False
+        self.penalized[b] = False
+        self.draw_cards(b)
+
+        # Clustered hand
+        playable = self.hand[b, :STAMINA].sum(1)
+        clustered = playable < self.cards_per_rate[self.stroke_rate[b]]
+        c = b[clustered]
+        self.discard_pile[c, :STAMINA] += self.hand[c, :STAMINA]
+        self.hand[c, :STAMINA] = 0
+        self.stroke_rate[c] = 0
+        self.replenish_hand(c)
+        b = b[~clustered]
+
+        # Stroke rate phase
+        exhausted = self.stamina[b] == 0
+        self.stroke_rate[b[exhausted]] = 0
+        self.penalized[b[exhausted]] = True
+        ok = b[~exhausted]
+        self.change_stroke_rate(ok, self.choose_stroke_rate(ok))
+
+        # Play cards
+        played = self.choose_cards(b, self.cards_per_rate[self.stroke_rate[b]])
+        movement = played[:, ONE] + 2 * played[:, TWO] + 3 * played[:, THREE]
+        movement += self.flip_instability(b, played[:, INSTABILITY])
+
+        # Only pace cards leave the hand, as in GameLogic.discard_cards
+        self.hand[b, :INSTABILITY] -= played[:, :INSTABILITY]
+        self.discard_pile[b, :INSTABILITY] += played[:, :INSTABILITY]
+
+        self.check_split_limit(b, movement)
+        self.replenish_hand(b)
+        self.round[b] += 1
+
+    def choose_cards(self, b, needed):
+        """
+        Counts of each card type NPCLogic.choose_cards plays: highest values first.
+        """
+        played = np.zeros((len(b), 4), dtype=np.int32)
+        left = needed.copy()
+        for col, _ in NPC_CARD_ORDER:
+            take = np.minimum(self.hand[b, col], left)
+            played[:, col] = take
+            left -= take
+        return played
+
+    def estimate_speed(self, b, rate):
+        """
+        Batched NPCLogic.calculate_speed_for_rate.
+        """
+        needed = self.cards_per_rate[rate]
+        left = np.full(len(b), needed)
+        speed = np.zeros(len(b), dtype=np.int32)
+        for col, value in NPC_CARD_ORDER:
+            take = np.minimum(self.hand[b, col], left)
+            speed += take * value
+            left -= take
+        speed[left > 0] = 0
+        return speed
+
+    def next_split(self, b, movement):
+        """
+        Index of the first split crossed by a movement and if any was crossed.
+        """
+        pos = self.position[b]
+        crossed = (pos[:, None] < self.split_locs) & (self.split_locs <= (pos + movement)[:, None])
+        return crossed.argmax(1), crossed.any(1)
+
+    def choose_stroke_rate(self, b):
+        """
+        Batched NPCLogic.choose_stroke_rate.
+        """
+        stamina = self.stamina[b]
+        position = self.position[b]
+        race = b // self.boats
+        best_safe = np.zeros(len(b), dtype=np.int32)
+        best_risky = np.zeros(len(b), dtype=np.int32)
+        risky_split = np.zeros(len(b), dtype=np.int64)
+
+        for rate in [2, 1, 0]:
+            est_speed = self.estimate_speed(b, rate)
+            considered = (est_speed > 0) | (rate == 0)
+
+            split, crossed = self.next_split(b, est_speed)
+            limit_pace = self.split_paces[race, split]
+            safe = ~crossed | (est_speed <= limit_pace)
+
+            update = considered & safe & (rate > best_safe)
+            best_safe[update] = rate
+
+            cost = np.maximum(1, est_speed - limit_pace)
+            safety_buffer = np.where(position < 80, 2, 0)
+            update = considered & ~safe & (stamina - cost >= safety_buffer) & (rate > best_risky)
+            best_risky[update] = rate
+            risky_split[update] = split[update]
+
+        stamina_factor = np.where(stamina >= 4, 1.0, 0.6)
+        final_prob = self.aggression[risky_split] * stamina_factor
+        take_risk = (best_risky > best_safe) & (self.random.take(len(b)) < final_prob)
+        choice = np.where(take_risk, best_risky, best_safe)
+
+        # Low Stamina Checks
+        choice[(self.hand[b, STAMINA] >= 1) & (stamina < 3)] = 0
+        return choice
+
+    def change_stroke_rate(self, b, choice):
+        """
+        Batched GameLogic.change_stroke_rate, jumps cost 1 Stamina Card.
+        """
+        jump = np.abs(choice - self.stroke_rate[b]) == 2
+        can_pay = self.stamina[b] >= 1
+        self.pay_stamina_cards(b[jump], 1)
+        changed = ~jump | can_pay
+        self.stroke_rate[b[changed]] = choice[changed]
+
+    # ------ MOVEMENT ------
+    def flip_instability(self, b, instability_played):
+        """
+        Flip the top card of the draw pile for every Instability Card played.
+        """
+        movement = np.zeros(len(b), dtype=np.int32)
+        for flip in range(instability_played.max(initial=0)):
+            rows = np.flatnonzero(instability_played > flip)
+            fb = b[rows]
+            self.reshuffle(fb, failsafe=False)
+
+            # Nothing to flip if both piles are empty
+            has_cards = self.draw_pile[fb].sum(1) > 0
+            rows, fb = rows[has_cards], fb[has_cards]
+
+            card = self.sample_cards(self.draw_pile[fb])
+            self.draw_pile[fb, card] -= 1
+            self.discard_pile[fb, card] += 1
+
+            value = card + 1
+            not_pace = card >= INSTABILITY
+            value[not_pace] = 1 + (self.random.take(not_pace.sum()) < 0.5)
+            movement[rows] += value
+        return movement
+
+    def check_split_limit(self, b, movement):
+        """
+        Batched GameLogic.check_split_limit and its penalties.
+        """
+        pos = self.position[b]
+        race = b // self.boats
+        crossed = (pos[:, None] < self.split_locs) & (self.split_locs <= (pos + movement)[:, None])
+        exceeded = crossed & (movement[:, None] > self.split_paces[race])
+        split = exceeded.argmax(1)
+        hit = exceeded.any(1)
+        excess = movement - self.split_paces[race, split]
+
+        tired = hit & (self.stamina[b] >= excess)
+        crab = hit & ~tired
+        moved = ~crab
+
+        self.position[b[moved]] = np.minimum(pos[moved] + movement[moved], self.venue_length)
+        self.pay_stamina_cards(b[tired], excess[tired])
+        np.add.at(self.tired, (race[tired], crossed[tired].argmax(1)), 1)
+
+        cb = b[crab]
+        self.pay_stamina_cards(cb, self.crab_penalty[self.stroke_rate[cb]])
+        self.position[cb] = self.split_locs[split[crab]] - 1
+        self.stroke_rate[cb] = 0
+        self.caught_crab[cb] = True
+        np.add.at(self.crabs, (race[crab], split[crab]), 1)
+
+    # ------ REPLENISH HAND ------
+    def replenish_hand(self, b):
+        """
+        Stroke rate effects and hand refill.
+        """
+        # 35 spm: move up to 2 Stamina cards from hand back to the stamina pile
+        easy = b[self.stroke_rate[b] == 0]
+        recovered = np.minimum(self.hand[easy, STAMINA], 2)
+        self.hand[easy, STAMINA] -= recovered
+        self.stamina[easy] += recovered
+
+        # 45 spm: move 1 Stamina Card from Stamina Pile to Discard Pile
+        strain = b[(self.stroke_rate[b] == 2) & (self.round[b] != 0)]
+        self.pay_stamina_cards(strain, 1)
+
+        self.draw_cards(b)
+
+    # ------ END OF ROUND ------
+    def apply_bonuses(self):
+        """
+        Batched bonuses of RaceEngine.round_steps over the races still running.
+        """
+        races = np.flatnonzero(self.running)
+        if self.boats < 2 or not races.size:
+            return
+
+        first = races * self.boats
+        rows = first[:, None] + np.arange(self.boats)
+        key = self.position[rows] * 3 + self.stroke_rate[rows]
+        order = rows[np.arange(len(races))[:, None], np.argsort(-key, axis=1, kind="stable")]
+
+        # Change of Tides bonus
+        for last in [order[:, -1], order[:, -2]]:
+            eligible = last[~self.caught_crab[last] & ~self.finished[last]]
+            self.position[eligible] += 1
+
+        # Motivation bonus
+        for i in range(1, self.boats):
+            current_boat = order[:, i]
+            boat_ahead = order[:, i-1]
+
+            distance = self.position[boat_ahead] - self.position[current_boat]
+            stamina = self.stamina[current_boat]
+            threshold = np.where(self.position[current_boat] > 80, 1, 4)
+            use = (
+                ~self.finished[boat_ahead] & ~self.finished[current_boat]
+                & ~self.penalized[current_boat] & ~self.caught_crab[current_boat]
+                & ((distance == 0) | (distance == 1)) & (stamina >= 1)
+                & (stamina >= threshold) & (self.random.take(len(races)) < 0.50)
+            )
+            self.pay_stamina_cards(current_boat[use], 1)
+            self.position[current_boat[use]] += 2
+
+    def check_finish_line(self):
+        """
+        Mark finished boats and end races where every boat finished.
+        """
+        self.finished |= self.position >= self.venue_length
+        races = np.flatnonzero(self.running)
+        self.rounds[races] += 1
+        done = self.finished.reshape(self.races, self.boats).all(1)
+        self.running &= ~done
+
+
+def simulate_batch(split_paces, split_locs, boats = 6, seed = None, rules = DEFAULT_RULES):
+    """
+    Run one race per row of split paces and return crabs and tired counts per race and split.
+    """
+    race = BatchRace(split_paces, split_locs, boats, seed, rules).run()
+    return race.crabs, race.tired
@@ -0,0 +1,262 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+from array import array
+from src.engine.race_logic import GameLogic
+from src.engine.race_engine import RaceEngine
+from src.engine.npc_logic import NPCLogic
+from src.engine.constants import STAMINA
+from src.engine.rng import race_rng
+from src.engine.rules import DEFAULT_RULES
+
+VERSION = 1
+
+# Slower than the baseline by more than this fraction is a regression
+THRESHOLD = 0.10
+
+# Boat states the benchmarks cycle through, so no single branch is measured
+SAMPLES = 64
+# One sample boat in this many has a clustered hand, too few playable cards for its stroke rate
+CLUSTERED_EVERY = 8
+
+def sample_boats(seed = 0, count = SAMPLES, rules = DEFAULT_RULES):
+    """
+    Boats at random positions of a race, with a drawn hand and some stamina used.
+    Some hands are clogged with the stamina cards paid, at the top stroke rate.
+    """
+    rng = race_rng(seed, 0, "benchmark")
+    boats = []
+    while len(boats) < count:
+        for b in GameLogic.create_boat(["No more players"], rng, rules):
+            b.position = rng.randrange(rules.venue_length)
+            b.stroke_rate = rng.choice(rules.rates)
+            for _ in range(rng.randrange(rules.stamina_cards)):
+                b.stamina_pile.pop()
+            GameLogic.draw_cards(b)
+            if len(boats) % CLUSTERED_EVERY == CLUSTERED_EVERY - 1:
+                clog_hand(b, rng)
+            boats.append(b)
+    return boats[:count]
+
+def clog_hand(boat, rng):
+    """
+    Swap playable cards of the hand for stamina cards, leaving fewer than the top stroke rate needs.
+    """
+    rules = boat.rules
+    playable = boat.playable_cards()
+    rng.shuffle(playable)
+    keep = playable[:rng.randrange(rules.cards_per_rate[-1])]
+    boat.deck.discard_many(playable[len(keep):])
+    stamina = boat.hand_counts[STAMINA]
+    while stamina + len(keep) < rules.hand_limit and boat.stamina_pile:
+        boat.stamina_pile.pop()
+        stamina += 1
+    boat.set_hand(keep + [STAMINA] * stamina)
+    boat.stroke_rate = rules.rates[-1]
+
+def cycle(items):
+    """
+    Function giving the items one after the other, again from the start at the end.
+    """
+    state = [0]
+    def next_item():
+        i = state[0]
+        state[0] = i + 1 if i + 1 < len(items) else 0
+        return items[i]
+    return next_item
+
+# ------ BENCHMARKS ------
+# Every benchmark builds its state, then returns the function timed.
+# Functions that change the boat reset the state they use first, the reset is part of the time.
+
+def bench_draw_cards():
+    next_boat = cycle(sample_boats())
+    def run():
+        b = next_boat()
+        b.deck.discard_many(b.hand)
+        b.set_hand([])
+        GameLogic.draw_cards(b)
+    return run
+
+def bench_check_clustered_hand():
+    boats = sample_boats()
+    hands = [(array("b", b.hand), array("b", b.hand_counts)) for b in boats]
+    piles = [(array("b", b.discard_pile), array("h", b.deck.discard_counts)) for b in boats]
+    rates = [b.stroke_rate for b in boats]
+    next_index = cycle(range(len(boats)))
+    def run():
+        i = next_index()
+        b = boats[i]
+        # Saved hands are put back with their counts, set_hand would recount them
+        b.hand[:], b.hand_counts[:] = hands[i]
+        # Clustered hands are discarded
+        b.deck.discard_pile[:], b.deck.discard_counts[:] = piles[i]
+        b.stroke_rate = rates[i]
+        GameLogic.check_clustered_hand(b)
+    return run
+
+def bench_calculate_movement():
+    boats = sample_boats()
+    hands = [(array("b", b.hand), array("b", b.hand_counts)) for b in boats]
+    piles = [(array("b", b.draw_pile), array("b", b.discard_pile), array("h", b.deck.draw_counts), array("h", b.deck.discard_counts)) for b in boats]
+    plays = [NPCLogic.choose_cards(b)[:b.rules.cards_per_rate[b.stroke_rate]] for b in boats]
+    next_index = cycle(range(len(boats)))
+    def run():
+        i = next_index()
+        b = boats[i]
+        b.hand[:], b.hand_counts[:] = hands[i]
+        b.deck.draw_pile[:], b.deck.discard_pile[:], b.deck.draw_counts[:], b.deck.discard_counts[:] = piles[i]
+        GameLogic.calculate_movement(b, plays[i])
+    return run
+
+def bench_check_split_limit():
+    boats = sample_boats()
+    paces = [NPCLogic.calculate_speed_for_rate(b, b.stroke_rate) for b in boats]
+    next_index = cycle(range(len(boats)))
+    def run():
+        i = next_index()
+        GameLogic.check_split_limit(boats[i], paces[i])
+    return run
+
+def bench_choose_stroke_rate():
+    next_boat = cycle(sample_boats())
+    def run():
+        NPCLogic.choose_stroke_rate(next_boat())
+    return run
+
+def bench_npc_race():
+    races = [0]
+    def run():
+        races[0] += 1
+        RaceEngine(GameLogic.create_boat(["No more players"], race_rng(0, races[0]), DEFAULT_RULES)).run()
+    return run
+
+def bench_render_frame():
+    from src.interface.draw import clear_screen, draw_venue, draw_leaderboard, show_screen
+    from src.interface.renderer import screen
+
+    # Fixed terminal size, frames go to a null stream
+    screen.stream = open(os.devnull, "w")
+    screen.cached_size = (120, 40)
+    screen.invalidate()
+    boats = sample_boats(count=DEFAULT_RULES.lanes)
+    next_boat = cycle(boats)
+    def run():
+        # One boat moves every frame, like a turn of the race
+        b = next_boat()
+        b.position = (b.position + 1) % DEFAULT_RULES.venue_length
+        clear_screen()
+        draw_venue(boats)
+        draw_leaderboard(sorted(boats, key=lambda x: (x.round, -x.position, -x.stroke_rate)), "Leaderboard")
+        show_screen()
+    return run
+
+BENCHMARKS = {
+    "draw_cards": bench_draw_cards,
+    "check_clustered_hand": bench_check_clustered_hand,
+    "calculate_movement": bench_calculate_movement,
+    "check_split_limit": bench_check_split_limit,
+    "choose_stroke_rate": bench_choose_stroke_rate,
+    "npc_race": bench_npc_race,
+    "render_frame": bench_render_frame,
+}
+
+# ------ RUNNER ------
+def measure(setup, repeat = 5):
+    """
+    Warm up a benchmark, then time it again and again.
+    Every repeat runs long enough to be measured (at least 0.2 seconds).
+    Returns the best and median time per call in nanoseconds and the calls per repeat.
+    """
+    timer = timeit.Timer(setup())
+    # autorange also warms up the caches and the code paths
+    number, _ = timer.autorange()
+    times = [t / number * 1e9 for t in timer.repeat(repeat=repeat, number=number)]
+    return {"best_ns": min(times), "median_ns": statistics.median(times), "number": number, "repeat": repeat}
+
+def run_benchmarks(names, repeat = 5):
+    results = {}
+    for name in names:
+        results[name] = measure(BENCHMARKS[name], repeat)
+        print(f"{name:<22} {format_time(results[name]['best_ns']):>12} per call (median {format_time(results[name]['median_ns'])})")
+    return results
+
+def format_time(ns):
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} us"
+    return f"{ns:.0f} ns"
+
+def save(results, path):
+    with open(path, "w") as f:
+        json.dump({
+            "version": VERSION,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }, f, indent=2)
+
+def load(path):
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("version") != VERSION:
+        raise SystemExit(f"{path} is not a benchmark baseline of version {VERSION}")
+    return data
+
+def compare(results, baseline, threshold = THRESHOLD):
+    """
+    Print the change of every benchmark against the baseline, returns the names of the regressions.
+    The best times are compared, they are the least disturbed by the rest of the machine.
+    """
+    regressions = []
+    print(f"\n{'BENCHMARK':<22} | {'BASELINE':>10} | {'NOW':>10} | {'CHANGE':>8}")
+    print("-" * 60)
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<22} | {'-':>10} | {format_time(result['best_ns']):>10} | {'new':>8}")
+            continue
+        change = result["best_ns"] / before["best_ns"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<22} | {format_time(before['best_ns']):>10} | {format_time(result['best_ns']):>10} | {change * 100:>+7.1f}%{flag}")
+    return regressions
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the engine hot paths.")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run, all if not given: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repeats of every benchmark")
+    parser.add_argument("--save", default=None, metavar="PATH", help="save the results as a JSON baseline")
+    parser.add_argument("--compare", default=None, metavar="PATH", help="compare with a JSON baseline, exit with status 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="slowdown flagged as a regression (0.10 is 10%%)")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    baseline = load(args.compare) if args.compare else None
+    names = args.names or list(BENCHMARKS)
+
+    print(f"Python {platform.python_version()} on {platform.machine()}")
+    results = run_benchmarks(names, args.repeat)
+
+    if args.save:
+        save(results, args.save)
+        print(f"Baseline saved in {args.save}")
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold * 100:.0f}%: {', '.join(regressions)}")
+            sys.exit(1)
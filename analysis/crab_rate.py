@@ -1,9 +1,18 @@
+import argparse
+import math
+import os
 import random
 import time
+from array import array
+from multiprocessing import Pool
 from src.engine.race_logic import GameLogic
-from src.engine.npc_logic import NPCLogic
+from src.engine.race_engine import RaceEngine, NPCDecisions, NullEvents
+from src.engine.rng import new_seed, race_rng
+from src.engine.rules import DEFAULT_RULES
+from src.engine.profiler import PhaseProfiler
+from analysis.stats import RaceStats, proportion_interval, Z_95
 
-def create_pace_limits():
+def create_pace_limits(rng = random):
     """
     Create random pace limits to test 
     """
@@ -11,137 +20,249 @@ def create_pace_limits():
     meters = [25,50,75,85]
     limit = {}
     for meter in meters:
-        pace = random.choice(paces)
+        pace = rng.choice(paces)
         limit[meter] = pace
     return limit
 
-def test_game_crabs(limit, iterations):
+class SplitCounter(NullEvents):
+    """
+    Counts crabs and tired boats at each split location.
+    """
+    def __init__(self, limit):
+        self.crabs = {loc: 0 for loc in limit}
+        self.tired = {loc: 0 for loc in limit}
+
+    def turn_finished(self, boat, status, split_loc):
+        if status == "tired":
+            self.tired[split_loc] += 1
+        elif status == "crab":
+            self.crabs[split_loc] += 1
+
+def test_game_crabs(limit, iterations, seed = None, first_race = 0, stats = None, profiler = None):
     """
     Test game with only NPCs with the random limits.
+    Each race owns the random stream of its index, so any race can be re-run alone.
+    The races are also added to the stats aggregator and timed by the started profiler, if given.
+    Without a seed the races are new random ones.
     """
-    crab_results = {}
-    for loc in limit.keys():
-        crab_results[loc] = 0
-
-    tired_results = {}
-    for loc in limit.keys():
-        tired_results[loc] = 0
-
-    for _ in range(iterations) :
-        boats = GameLogic.create_boat(["No more players"])
-        game_running = True
-
-        while game_running:
-            for b in boats:
-                if b.finished:
-                    continue
-                b.caught_crab = False
-                b.penalized = False
-                GameLogic.draw_cards(b)
-
-                if GameLogic.check_clustered_hand(b):
-                    GameLogic.replenish_hand(b)
-                    continue
-
-                # Stroke rate change
-                exhaustion_status = GameLogic.check_stamina(b)
-                if exhaustion_status == "ok":
-                    rate_choice = NPCLogic.choose_stroke_rate(b, limit)
-                    GameLogic.change_stroke_rate(b, rate_choice)
-
-                # Play cards
-                available_cards, cards_needed = GameLogic.get_playable_cards(b)
-                cards = NPCLogic.choose_cards(b)
-                cards_selected = cards[:cards_needed]
-
-                # Movement and Split Limit
-                movement= GameLogic.calculate_movement(b, cards_selected)
-                status, inf = GameLogic.check_split_limit(b, movement, limit)
-
-                active_loc = None
-                for loc in limit:
-                    if b.position < loc <= (b.position + movement):
-                        active_loc = loc
-                        break
-
-                if status == "passed":
-                    GameLogic.apply_movement(b, movement)
-                elif status == "tired":
-                    GameLogic.apply_movement(b, movement)
-                    GameLogic.pay_stamina_cards(b, inf)
-                    tired_results[active_loc] += 1
-                else:
-                    GameLogic.apply_crab(b, inf)
-                    crab_results[active_loc] += 1
-                
-                # Replenish hand
-                GameLogic.replenish_hand(b)
-                b.round += 1
-
-            sorted_boats = sorted(
-                boats, 
-                key=lambda x: (x.position, x.stroke_rate), 
-                reverse=True
-            )
-
-            if len(sorted_boats) >= 2:
-                # Change of Tides bonus
-                for b in [sorted_boats[-1], sorted_boats[-2]]:
-                    if b.caught_crab or b.finished:
-                        continue     
-                    GameLogic.change_tides_bonus(b)
-
-                for i in range(1, len(sorted_boats)):
-                    current_boat = sorted_boats[i]
-                    boat_ahead = sorted_boats[i-1]
-                    
-                    if boat_ahead.finished or current_boat.finished or current_boat.penalized or current_boat.caught_crab:
-                        continue
-
-                    if GameLogic.can_use_motivation(current_boat, boat_ahead):
-                        use_motivation = NPCLogic.choose_motivation(current_boat)
-                        if use_motivation == "use":
-                            GameLogic.pay_stamina_cards(current_boat, 1)
-                            GameLogic.motivation_bonus(current_boat)
-
-            for b in boats:
-                if b.position >= 100:
-                    b.finished = True
-        
-            if all(b.finished for b in boats):
-                game_running = False
-
-    return crab_results, tired_results
+    if seed is None:
+        seed = new_seed()
+    counter = SplitCounter(limit)
+    decisions = NPCDecisions()
+    rules = DEFAULT_RULES.with_splits(limit)
 
-if __name__ == "__main__":
-    start_time = time.time()
-    tests = 1000
-    iterations = 10
+    events = counter
+    if stats is not None:
+        stats.events = counter
+        events = stats
 
-    stats = {"crabs": {l: {p: 0 for p in [5,6,7]} for l in [25,50,75,85]},
-             "tired": {l: {p: 0 for p in [5,6,7]} for l in [25,50,75,85]},
-             "total": {l: {p: 0 for p in [5,6,7]} for l in [25,50,75,85]}}
+    for race in range(first_race, first_race + iterations):
+        boats = GameLogic.create_boat(["No more players"], race_rng(seed, race), rules)
+        engine = RaceEngine(boats, decisions, events)
+        if profiler is not None:
+            profiler.attach(engine)
+        engine.run()
 
-    for _ in range(tests):
-        limit = create_pace_limits()
-        
-        # Add number of boats exposures per race for the specific pace limits in the attempts 
-        for pace_loc, pace_limit in limit.items():
-            stats["total"][pace_loc][pace_limit] += (iterations * 6)
+    return counter.crabs, counter.tired
 
-        # Run the simulation
-        crabs_found, tired_found = test_game_crabs(limit, iterations)
+def rerun_race(seed, race, iterations):
+    """
+    Play again a single race of a run, with its pace limits and random stream.
+    """
+    limit = create_pace_limits(race_rng(seed, race // iterations, "limits"))
+    boats = GameLogic.create_boat(["No more players"], race_rng(seed, race), DEFAULT_RULES.with_splits(limit))
+    RaceEngine(boats).run()
+    return limit, boats
 
-        # Add number of crabs and tired returns for the specific pace limits in the results 
-        for loc, count in crabs_found.items():
-            stats["crabs"][loc][limit[loc]] += count
+LOCATIONS = [25, 50, 75, 85]
+PACES = [5, 6, 7]
 
-        for loc, count in tired_found.items():
-            stats["tired"][loc][limit[loc]] += count
+def run_tests(seed, first_test, tests, iterations, batch = False, stats = False, profile = None):
+    """
+    Run a block of tests, each one with its own random pace limits.
+    Every test is seeded from the seed and its index, so results don't depend on how tests are split between workers.
+    Profile is None, "time" or "allocations".
+    Returns compact count arrays indexed by (split, pace) cell, the race stats and the phase profile of the block or None.
+    """
+    cells = len(LOCATIONS) * len(PACES)
+    crabs = array("q", bytes(8 * cells))
+    tired = array("q", bytes(8 * cells))
+    total = array("q", bytes(8 * cells))
 
-    # Report Results
-    print(f"Simulated {tests * iterations * 6} boat races in {time.time() - start_time:.2f} seconds.")
+    limits = [create_pace_limits(race_rng(seed, test, "limits")) for test in range(first_test, first_test + tests)]
+    # Every test has the same split locations, only the paces change
+    race_stats = RaceStats(DEFAULT_RULES.with_splits(limits[0])) if stats else None
+    profiler = PhaseProfiler(profile == "allocations").start() if profile else None
+
+    if batch:
+        results = test_batch_crabs(limits, iterations, [seed, first_test])
+    else:
+        results = (test_game_crabs(limit, iterations, seed, test * iterations, race_stats, profiler) for test, limit in enumerate(limits, first_test))
+
+    for limit, (crabs_found, tired_found) in zip(limits, results):
+        for loc, pace in limit.items():
+            cell = LOCATIONS.index(loc) * len(PACES) + PACES.index(pace)
+            # Number of boats exposures to this pace limit
+            total[cell] += iterations * 6
+            crabs[cell] += crabs_found[loc]
+            tired[cell] += tired_found[loc]
+
+    if race_stats is not None:
+        race_stats.events = NullEvents()
+    if profiler is not None:
+        profiler.stop()
+    return crabs, tired, total, race_stats, profiler.phases if profiler else None
+
+def test_batch_crabs(limits, iterations, seed):
+    """
+    Same as test_game_crabs for many pace limits at once, using the NumPy batch simulator.
+    """
+    from analysis.batch_sim import simulate_batch
+
+    paces = [[limit[loc] for loc in LOCATIONS] for limit in limits for _ in range(iterations)]
+    crabs, tired = simulate_batch(paces, LOCATIONS, seed=seed)
+    crabs = crabs.reshape(len(limits), iterations, len(LOCATIONS)).sum(1)
+    tired = tired.reshape(len(limits), iterations, len(LOCATIONS)).sum(1)
+
+    for i in range(len(limits)):
+        yield dict(zip(LOCATIONS, crabs[i].tolist())), dict(zip(LOCATIONS, tired[i].tolist()))
+
+def _run_block(args):
+    return run_tests(*args)
+
+def simulate(tests, iterations, seed, workers = 1, batch = False, stats = False, profile = None):
+    """
+    Run the tests in blocks over a process pool and merge the count arrays.
+    Returns the counts, the merged race stats and the merged phase profiler, None when not asked.
+    """
+    block_size = 1000 if batch else 50
+    blocks = [(seed, first, min(block_size, tests - first), iterations, batch, stats, profile) for first in range(0, tests, block_size)]
+    cells = len(LOCATIONS) * len(PACES)
+    merged = {category: [0] * cells for category in ["crabs", "tired", "total"]}
+
+    if workers > 1:
+        with Pool(workers) as pool:
+            results = list(pool.imap_unordered(_run_block, blocks))
+    else:
+        results = [_run_block(block) for block in blocks]
+
+    race_stats = None
+    profiler = PhaseProfiler(profile == "allocations") if profile else None
+    for result in results:
+        for category, counts in zip(["crabs", "tired", "total"], result):
+            for cell, count in enumerate(counts):
+                merged[category][cell] += count
+        if race_stats is None:
+            race_stats = result[3]
+        elif result[3] is not None:
+            race_stats.merge(result[3])
+        if profiler is not None:
+            profiler.merge(result[4])
+
+    stats = {}
+    for category, counts in merged.items():
+        stats[category] = {loc: {pace: counts[i * len(PACES) + j] for j, pace in enumerate(PACES)} for i, loc in enumerate(LOCATIONS)}
+    return stats, race_stats, profiler
+
+# Adaptive runs: uniform tests played before the first intervals, and tests given to one block of a worker
+ADAPTIVE_WARMUP = 120
+ADAPTIVE_BLOCK = 50
+
+def targeted_limits(seed, test, target):
+    """
+    Pace limits of an adaptive test: the random limits of the test, with the target split set to its pace.
+    """
+    limit = create_pace_limits(race_rng(seed, test, "limits"))
+    if target is not None:
+        loc, pace = target
+        limit[loc] = pace
+    return limit
+
+def run_targeted(args):
+    """
+    Run a block of adaptive tests, each one aimed at a (split, pace) cell or at none.
+    A test aimed at a cell only counts for it: the other splits of its races are not a uniform sample,
+    the target pace changes the stamina and positions boats reach them with, and the bonuses pass that on to every boat.
+    Tests aimed at none count for every cell, like the fixed run.
+    """
+    seed, first_test, targets, iterations = args
+    cells = len(LOCATIONS) * len(PACES)
+    crabs = array("q", bytes(8 * cells))
+    tired = array("q", bytes(8 * cells))
+    total = array("q", bytes(8 * cells))
+
+    for test, target in enumerate(targets, first_test):
+        limit = targeted_limits(seed, test, target)
+        crabs_found, tired_found = test_game_crabs(limit, iterations, seed, test * iterations)
+        for loc in (LOCATIONS if target is None else [target[0]]):
+            cell = LOCATIONS.index(loc) * len(PACES) + PACES.index(limit[loc])
+            total[cell] += iterations * 6
+            crabs[cell] += crabs_found[loc]
+            tired[cell] += tired_found[loc]
+    return crabs, tired, total
+
+def plan_targets(merged, half_width, iterations, budget):
+    """
+    Tests of the next adaptive batch, as the cells they aim at.
+    Every cell whose crab rate interval is still too wide gets half of the tests its current rate says it needs,
+    scaled down when they don't fit in the budget left.
+    """
+    needs = []
+    for cell in range(len(LOCATIONS) * len(PACES)):
+        crabs, total = merged["crabs"][cell], merged["total"][cell]
+        low, high = proportion_interval(crabs, total)
+        if total and (high - low) / 2 <= half_width:
+            continue
+        # Rate kept away from 0 so that cells without crabs yet still get tests
+        p = (crabs + 1) / (total + 2)
+        needed = Z_95 * Z_95 * p * (1 - p) / (half_width * half_width) - total
+        needs.append((cell, max(1, math.ceil(needed / (iterations * 6) / 2))))
+
+    wanted = sum(count for _, count in needs)
+    targets = []
+    for cell, count in needs:
+        if wanted > budget:
+            count = max(1, count * budget // wanted)
+        targets += [(LOCATIONS[cell // len(PACES)], PACES[cell % len(PACES)])] * count
+    return targets[:budget]
+
+def adaptive_simulate(tests, iterations, seed, half_width, workers = 1):
+    """
+    Run tests in batches until the 95% crab rate interval of every (split, pace) cell is within half_width
+    of its estimate, or the budget of tests is spent.
+    After uniform warm-up tests, every batch only aims at the cells not converged yet.
+    Batches only depend on the merged counts, so results don't depend on the number of workers.
+    Returns the counts like simulate and the number of tests run.
+    """
+    cells = len(LOCATIONS) * len(PACES)
+    merged = {category: [0] * cells for category in ["crabs", "tired", "total"]}
+    pool = Pool(workers) if workers > 1 else None
+    run = 0
+    targets = [None] * min(tests, ADAPTIVE_WARMUP)
+
+    try:
+        while targets:
+            blocks = [(seed, run + first, targets[first:first + ADAPTIVE_BLOCK], iterations) for first in range(0, len(targets), ADAPTIVE_BLOCK)]
+            results = pool.imap_unordered(run_targeted, blocks) if pool is not None else map(run_targeted, blocks)
+            for result in results:
+                for category, counts in zip(["crabs", "tired", "total"], result):
+                    for cell, count in enumerate(counts):
+                        merged[category][cell] += count
+            run += len(targets)
+            targets = plan_targets(merged, half_width, iterations, tests - run)
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    stats = {}
+    for category, counts in merged.items():
+        stats[category] = {loc: {pace: counts[i * len(PACES) + j] for j, pace in enumerate(PACES)} for i, loc in enumerate(LOCATIONS)}
+    return stats, run
 
+def report(stats):
+    """
+    Print crab and tired rates for every split and pace.
+    """
     print("\nCrab Results")
     print("=" * 40)
     print(f"{'SPLIT':<8} | {'PACE':<6} | {'STATUS':<8} | {'TOTAL':<8}")
@@ -151,10 +272,84 @@ if __name__ == "__main__":
         print(f"\n{category.upper()} RESULTS")
         print("="*40)
         print(f"{'SPLIT':<8} | {'PACE':<6} | {category.upper():<8} | {'%':>6}")
-        for loc in [25, 50, 75, 85]:
-            for pace in [5, 6, 7]:
+        for loc in LOCATIONS:
+            for pace in PACES:
                 c = stats[category][loc][pace]
                 t = stats["total"][loc][pace]
                 perc = (c/t*100) if t > 0 else 0
                 print(f"{loc:<8} | {pace:<6} | {c:<8} | {perc:>6.2f}%")
-            print("-" * 40)
\ No newline at end of file
+            print("-" * 40)
+
+def report_intervals(stats, half_width):
+    """
+    Print the crab rate confidence interval of every split and pace, and whether it reached the target.
+    """
+    print(f"\nCRAB RATE 95% INTERVALS (target +/-{half_width * 100:.2f}%)")
+    print("=" * 60)
+    print(f"{'SPLIT':<8} | {'PACE':<6} | {'BOATS':>9} | {'RATE':>7} | {'INTERVAL':>17} | STATUS")
+    for loc in LOCATIONS:
+        for pace in PACES:
+            c = stats["crabs"][loc][pace]
+            t = stats["total"][loc][pace]
+            low, high = proportion_interval(c, t)
+            status = "done" if t and (high - low) / 2 <= half_width else "open"
+            print(f"{loc:<8} | {pace:<6} | {t:>9} | {c / max(1, t) * 100:>6.2f}% | {low * 100:>6.2f}% - {high * 100:>6.2f}% | {status}")
+        print("-" * 60)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="NPCs crab rate simulation.")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes (0 uses every core)")
+    parser.add_argument("--races", type=int, default=10000, help="total number of races to simulate")
+    parser.add_argument("--iterations", type=int, default=10, help="races run with the same pace limits")
+    parser.add_argument("--seed", type=int, default=None, help="master seed, random if not given")
+    parser.add_argument("--batch", action="store_true", help="use the NumPy batch simulator (needs numpy)")
+    parser.add_argument("--rerun", type=int, default=None, metavar="RACE", help="play again a single race of the run given by --seed")
+    parser.add_argument("--adaptive", type=float, default=None, metavar="PERCENT", help="sample in batches until every crab rate is known within +/-PERCENT, --races is the most races run")
+    parser.add_argument("--stats", action="store_true", help="also report race stats with confidence intervals")
+    parser.add_argument("--profile", nargs="?", const="profile.json", default=None, metavar="PATH", help="time every race phase, print the breakdown and save it as JSON (profile.json if no path)")
+    parser.add_argument("--allocations", action="store_true", help="with --profile, also count the memory blocks allocated by every phase")
+    args = parser.parse_args()
+    if args.batch and (args.stats or args.profile):
+        parser.error("--stats and --profile need the race engine, they can't be used with --batch")
+    if args.adaptive is not None and (args.batch or args.stats or args.profile or args.rerun is not None):
+        parser.error("--adaptive can't be used with --batch, --stats, --profile or --rerun")
+    if args.adaptive is not None and args.adaptive <= 0:
+        parser.error("--adaptive needs a positive percentage")
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    workers = args.workers or os.cpu_count()
+    seed = args.seed if args.seed is not None else new_seed()
+    tests = max(1, args.races // args.iterations)
+
+    if args.rerun is not None:
+        limit, boats = rerun_race(seed, args.rerun, args.iterations)
+        print(f"Race {args.rerun} (seed {seed}) pace limits: {limit}")
+        for b in boats:
+            print(f"Lane {b.lane}: {b.name:<8} finished at {b.position} after {b.round} turns, stamina {len(b.stamina_pile)}")
+        raise SystemExit(0)
+
+    start_time = time.time()
+    if args.adaptive is not None:
+        half_width = args.adaptive / 100
+        stats, tests_run = adaptive_simulate(tests, args.iterations, seed, half_width, workers)
+        print(f"Simulated {tests_run * args.iterations * 6} boat races of {tests * args.iterations * 6} budgeted in {time.time() - start_time:.2f} seconds (seed {seed}, {workers} workers).")
+        report(stats)
+        report_intervals(stats, half_width)
+        raise SystemExit(0)
+
+    profile = None
+    if args.profile:
+        profile = "allocations" if args.allocations else "time"
+    stats, race_stats, profiler = simulate(tests, args.iterations, seed, workers, args.batch, args.stats, profile)
+
+    # Report Results
+    print(f"Simulated {tests * args.iterations * 6} boat races in {time.time() - start_time:.2f} seconds (seed {seed}, {workers} workers).")
+    report(stats)
+    if race_stats is not None:
+        race_stats.report()
+    if profiler is not None:
+        profiler.report()
+        profiler.save(args.profile)
+        print(f"Phase profile saved in {args.profile}")
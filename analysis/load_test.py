@@ -0,0 +1,129 @@
+import argparse
+import asyncio
+import os
+import random
+import resource
+import tempfile
+import time
+from src.engine.rng import new_seed
+from src.network.protocol import (
+    WELCOME, PROMPT, END, ERROR,
+    PROMPT_RATE, PROMPT_CARDS, PROMPT_DISCARD, PROMPT_MOTIVATION,
+    read_message, open_connection, encode_join, encode_choice, decode_prompt
+)
+from src.network.server import RaceServer
+
+# Bots opening their connection at the same time
+CONNECTING = 64
+
+class Bot:
+    """
+    Client that answers every prompt at once with random valid choices.
+    Records how long the server takes to send the next message after each answer.
+    """
+    def __init__(self, address, players, rng):
+        self.address = address
+        self.players = players
+        self.rng = rng
+        self.latencies = []
+        self.finished = False
+        self.failed = False
+
+    async def run(self, connecting):
+        try:
+            async with connecting:
+                reader, writer = await open_connection(self.address)
+                writer.write(encode_join(self.players))
+            await self.play(reader, writer)
+        except OSError:
+            self.failed = True
+
+    async def play(self, reader, writer):
+        answered_at = None
+
+        while True:
+            message = await read_message(reader)
+            if message is None:
+                break
+            if answered_at is not None:
+                self.latencies.append(time.perf_counter() - answered_at)
+                answered_at = None
+
+            kind, body = message
+            if kind == PROMPT:
+                prompt_id, values = self.choose(*decode_prompt(body))
+                writer.write(encode_choice(prompt_id, values))
+                answered_at = time.perf_counter()
+            elif kind == END:
+                self.finished = True
+                break
+            elif kind == ERROR:
+                break
+        writer.close()
+
+    def choose(self, kind, prompt_id, needed, timeout, options):
+        if kind == PROMPT_RATE:
+            return prompt_id, [self.rng.choice(options)]
+        if kind == PROMPT_CARDS:
+            return prompt_id, self.rng.sample(options, needed)
+        if kind == PROMPT_DISCARD:
+            return prompt_id, []
+        if kind == PROMPT_MOTIVATION:
+            return prompt_id, [self.rng.choice([0, 1])]
+        return prompt_id, []
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+async def load_test(races, players, address, turn_time, seed):
+    """
+    Start a server in this process, unless an address is given, and play races with bot clients.
+    """
+    server = None
+    serving = None
+    if address is None:
+        address = "unix:" + os.path.join(tempfile.mkdtemp(), "race.sock")
+        server = RaceServer(turn_time, lobby_wait=1, seed=seed)
+        serving = asyncio.create_task(server.serve(address))
+        await asyncio.sleep(0.1)
+
+    rng = random.Random(seed)
+    bots = [Bot(address, players, random.Random(rng.random())) for _ in range(races * players)]
+
+    memory_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start_time = time.perf_counter()
+    # Connect a few bots at a time, like players arriving
+    connecting = asyncio.Semaphore(CONNECTING)
+    await asyncio.gather(*(bot.run(connecting) for bot in bots))
+    elapsed = time.perf_counter() - start_time
+    memory_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    if serving is not None:
+        serving.cancel()
+
+    latencies = [latency for bot in bots for latency in bot.latencies]
+    finished = sum(bot.finished for bot in bots) // players
+    failed = sum(bot.failed for bot in bots)
+
+    print(f"{finished} of {races} races with {players} bot(s) each finished in {elapsed:.2f} seconds ({finished / elapsed:.1f} races/s)")
+    if failed:
+        print(f"{failed} bots could not connect")
+    if server is not None:
+        print(f"Server: {server.most_races} concurrent races at most")
+        print(f"Peak memory growth (server and bots): {(memory_after - memory_before) / 1024:.1f} MB, {(memory_after - memory_before) / max(1, server.most_races):.1f} KB per concurrent race")
+    print(f"Response to {len(latencies)} answers: p50 {percentile(latencies, 50) * 1000:.2f} ms | p99 {percentile(latencies, 99) * 1000:.2f} ms | max {max(latencies, default=0) * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the race server with bot clients.")
+    parser.add_argument("--races", type=int, default=200, help="races played at the same time")
+    parser.add_argument("--players", type=int, default=2, help="bots in every race, NPCs fill the other lanes")
+    parser.add_argument("--address", default=None, help="server to test, a server in this process if not given")
+    parser.add_argument("--turn-time", type=float, default=5, help="turn time of the server started here")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the races and bots, random if not given")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else new_seed()
+    asyncio.run(load_test(args.races, args.players, args.address, args.turn_time, seed))
@@ -0,0 +1,218 @@
+import argparse
+import time
+from math import comb
+from src.engine.constants import INSTABILITY, STAMINA
+from src.engine.rules import DEFAULT_RULES
+from src.engine.npc_policy import PolicyTable, POLICY_PATH
+from src.engine.turn_odds import TurnOdds
+
+# Abstract turn model used by the solver:
+# - State before drawing: position, stroke rate and cards left in the Stamina Pile.
+# - The hand is a fresh random draw from the cards in circulation (deck plus stamina cards already out).
+# - Instability flips are drawn from the cards outside the hand without replacement, as TurnOdds enumerates them.
+# - End of round bonuses and the other boats are ignored.
+
+def hand_distribution(rules, stamina):
+    """
+    Every hand multiset and its probability, with a Stamina Pile of this size.
+    Returns (hand key, stamina cards in hand, remaining cards, probability).
+    """
+    composition = (
+        rules.pace_cards.count(1), rules.pace_cards.count(2), rules.pace_cards.count(3),
+        rules.instability_cards, rules.stamina_cards - stamina
+    )
+    total = comb(sum(composition), rules.hand_limit)
+    hands = []
+
+    def enumerate_counts(card_type, left, counts):
+        if card_type == len(composition):
+            if left == 0:
+                hands.append(tuple(counts))
+            return
+        for n in range(min(left, composition[card_type]) + 1):
+            enumerate_counts(card_type + 1, left - n, counts + [n])
+
+    enumerate_counts(0, rules.hand_limit, [])
+
+    result = []
+    for counts in hands:
+        prob = 1
+        for n, available in zip(counts, composition):
+            prob *= comb(available, n)
+        key = rules.hand_table.key([1] * counts[0] + [2] * counts[1] + [3] * counts[2] + [INSTABILITY] * counts[3] + [STAMINA] * counts[4])
+        remaining = tuple(available - n for n, available in zip(counts, composition))
+        result.append((key, counts[4], remaining, prob / total))
+    return result
+
+def movement_distribution(rules, key, rate, remaining):
+    """
+    Probability of every movement when NPCs play their best cards at a stroke rate.
+    """
+    plays = rules.hand_table.plays(key)[:rules.cards_per_rate[rate]]
+    base = sum(c for c in plays if c < INSTABILITY)
+    # Remaining counts by card code, the model keeps no discard pile to flip once they run out
+    draw = (0,) + remaining
+    flips = TurnOdds.flip_distribution(draw, (0,) * len(draw), plays.count(INSTABILITY))
+    return [(base + spaces, p) for spaces, p in flips.items()]
+
+def turn_result(rules, position, rate, stamina, movement, stamina_in_hand):
+    """
+    State after moving: split limits, crab penalties and stroke rate effects.
+    """
+    next_pos = position + movement
+    for split_loc, split_limit in rules.splits:
+        if position < split_loc <= next_pos and movement > split_limit:
+            excess = movement - split_limit
+            if stamina >= excess:
+                stamina -= excess
+            else:
+                stamina -= min(stamina, rules.crab_penalty[rate])
+                next_pos = split_loc - 1
+                rate = 0
+            break
+
+    if rate == 0:
+        stamina += min(2, stamina_in_hand)
+    elif rate == 2 and stamina > 0:
+        stamina -= 1
+    return min(next_pos, rules.venue_length), rate, stamina
+
+def solve(rules = DEFAULT_RULES, tolerance = 1e-6):
+    """
+    Value iteration minimising the expected number of rounds to the finish line.
+    Positions only move forward, so they are solved from the finish line backwards.
+    Returns the policy table and the expected rounds from the start.
+    """
+    stamina_states = rules.stamina_cards + 1
+    hands = [hand_distribution(rules, k) for k in range(stamina_states)]
+    moves = {}
+    rates = len(rules.rates)
+    policy = PolicyTable(b"", rules)
+
+    # values[position][rate][stamina], positions past the finish line are worth 0
+    values = [[[0.0] * stamina_states for _ in range(rates)] for _ in range(rules.venue_length + 1)]
+    actions = bytearray(PolicyTable.size(rules))
+
+    for position in range(rules.venue_length - 1, -1, -1):
+        # For every state and hand: a fixed choice or, per action, a constant cost and links to states at this position
+        choices = {}
+        for rate in range(rates):
+            for stamina in range(stamina_states):
+                entries = []
+                for key, stamina_in_hand, remaining, prob in hands[stamina]:
+                    playable = rules.hand_limit - stamina_in_hand
+
+                    # Clustered hand: loses the stroke and recovers at 35 spm
+                    if playable < rules.cards_per_rate[rate]:
+                        target = (0, min(stamina + min(2, stamina_in_hand), stamina_states - 1))
+                        entries.append((key, prob, [(0, 1.0, [(1.0,) + target])]))
+                        continue
+
+                    options = []
+                    for choice in range(rates) if stamina > 0 else [0]:
+                        new_rate, new_stamina = choice, stamina
+                        if abs(choice - rate) == 2:
+                            new_stamina -= 1
+
+                        move_key = (key, new_rate, stamina)
+                        if move_key not in moves:
+                            moves[move_key] = movement_distribution(rules, key, new_rate, remaining)
+
+                        const = 1.0
+                        links = []
+                        for movement, p in moves[move_key]:
+                            p2, r2, k2 = turn_result(rules, position, new_rate, new_stamina, movement, stamina_in_hand)
+                            if p2 == position:
+                                links.append((p, r2, k2))
+                            else:
+                                const += p * values[p2][r2][k2]
+                        options.append((choice, const, links))
+                    entries.append((key, prob, options))
+                choices[(rate, stamina)] = entries
+
+        # Iterate the states of this position until they settle
+        current = values[position]
+        while True:
+            change = 0.0
+            for (rate, stamina), entries in choices.items():
+                total = 0.0
+                for _, prob, options in entries:
+                    best = None
+                    for _, const, links in options:
+                        q = const + sum(p * current[r2][k2] for p, r2, k2 in links)
+                        if best is None or q < best:
+                            best = q
+                    total += prob * best
+                change = max(change, abs(total - current[rate][stamina]))
+                current[rate][stamina] = total
+            if change < tolerance:
+                break
+
+        # Record the best choice of every state and hand
+        for (rate, stamina), entries in choices.items():
+            for key, _, options in entries:
+                best_choice, best = 0, None
+                for choice, const, links in options:
+                    q = const + sum(p * current[r2][k2] for p, r2, k2 in links)
+                    if best is None or q < best - 1e-12:
+                        best_choice, best = choice, q
+                actions[policy.index(position, rate, stamina, key)] = best_choice
+
+    return PolicyTable(actions, rules), values[0][2][rules.stamina_cards]
+
+def evaluate(races, seed):
+    """
+    Average rounds to finish of NPC fields of each difficulty, and wins of Expert boats in mixed fields.
+    """
+    from src.engine.race_logic import GameLogic
+    from src.engine.race_engine import RaceEngine, NPCDecisions, NullEvents
+    from src.engine.rng import race_rng
+
+    class FinishRounds(NullEvents):
+        def __init__(self):
+            self.rounds = 0
+            self.finish = {}
+
+        def round_finished(self, boats):
+            self.rounds += 1
+            for b in boats:
+                if b.position >= b.rules.venue_length and b.lane not in self.finish:
+                    self.finish[b.lane] = (self.rounds, -b.position)
+
+    for difficulty in ["Normal", "Expert"]:
+        decisions = NPCDecisions(difficulty = difficulty)
+        rounds = 0
+        for race in range(races):
+            boats = GameLogic.create_boat(["No more players"], race_rng(seed, race))
+            events = FinishRounds()
+            RaceEngine(boats, decisions, events).run()
+            rounds += sum(r for r, _ in events.finish.values()) / len(boats)
+        print(f"{difficulty:<8} field: {rounds / races:.2f} rounds to finish")
+
+    class MixedDecisions(NPCDecisions):
+        def stroke_rate(self, boat):
+            difficulty = "Expert" if boat.lane % 2 else "Normal"
+            return NPCDecisions(difficulty = difficulty).stroke_rate(boat)
+
+    wins = 0
+    for race in range(races):
+        boats = GameLogic.create_boat(["No more players"], race_rng(seed, race, "mixed"))
+        events = FinishRounds()
+        RaceEngine(boats, MixedDecisions(), events).run()
+        wins += min(events.finish, key=events.finish.get) % 2
+    print(f"Mixed field: Expert boats won {wins / races * 100:.1f}% of races (3 of 6 lanes)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve the optimal NPC stroke rate policy.")
+    parser.add_argument("--output", default=POLICY_PATH, help="policy file to write")
+    parser.add_argument("--evaluate", type=int, default=0, metavar="RACES", help="compare difficulties over this many races")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the evaluation races")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    policy, expected = solve()
+    policy.save(args.output)
+    print(f"Solved policy in {time.time() - start_time:.2f} seconds, expected {expected:.2f} turns to finish alone. Saved to {args.output}")
+
+    if args.evaluate:
+        evaluate(args.evaluate, args.seed)
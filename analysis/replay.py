@@ -0,0 +1,77 @@
+import argparse
+import time
+from src.engine.race_engine import RaceEngine, NPCDecisions
+from src.engine.race_log import RaceRecorder, RaceLog, RaceReplayer
+from src.engine.race_logic import GameLogic
+from src.engine.npc_logic import NPCLogic
+from src.engine.turn_odds import TurnOdds
+from src.engine.rng import new_seed, race_rng
+from src.engine.rules import DEFAULT_RULES
+
+def record_race(path, seed, difficulty = "Normal", rules = DEFAULT_RULES):
+    """
+    Play an NPC race without interface and record it.
+    """
+    colors = ["No more players"]
+    boats = GameLogic.create_boat(colors, race_rng(seed), rules)
+    recorder = RaceRecorder(path, seed, colors, boats)
+    RaceEngine(boats, NPCDecisions(difficulty, seed), recorder).run()
+    return boats
+
+def print_boats(boats, rounds):
+    print(f"After round {rounds}:")
+    for b in sorted(boats, key=lambda x: x.position, reverse=True):
+        state = "finished" if b.finished else ("crab" if b.caught_crab else f"rate {b.stroke_rate}")
+        print(f"Lane {b.lane}: {b.name:<8} position {b.position:>3} | stamina {len(b.stamina_pile)} | hand {b.sorted_hand()} | {state}")
+
+def print_odds(boats):
+    """
+    Exact odds of the next turn of every boat racing, if it plays the NPC cards at its stroke rate.
+    """
+    print("Next turn odds with the NPC cards:")
+    for b in boats:
+        if b.finished:
+            continue
+        cards = NPCLogic.choose_cards(b)[:b.rules.cards_per_rate[b.stroke_rate]]
+        odds = TurnOdds.status_odds(b, cards)
+        movement = TurnOdds.movement_distribution(b, cards)
+        expected = sum(m * p for m, p in movement.items())
+        print(f"Lane {b.lane}: cards {cards} | movement {expected:.2f} | tired {odds['tired'] * 100:5.1f}% | crab {odds['crab'] * 100:5.1f}%")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Record and replay race logs.")
+    parser.add_argument("log", help="race log file")
+    parser.add_argument("--record", action="store_true", help="play an NPC race and record it in the log file first")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the recorded race, random if not given")
+    parser.add_argument("--difficulty", choices=["Normal", "Expert", "Master"], default="Normal", help="NPC difficulty of the recorded race")
+    parser.add_argument("--round", type=int, default=None, help="show the race after this round, the end if not given")
+    parser.add_argument("--odds", action="store_true", help="show the exact tired and crab odds of the next turn")
+    parser.add_argument("--repeat", type=int, default=100, help="full replays timed")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.record:
+        seed = args.seed if args.seed is not None else new_seed()
+        record_race(args.log, seed, args.difficulty)
+        print(f"Recorded race with seed {seed} in {args.log}")
+
+    log = RaceLog.load(args.log)
+    if log is None:
+        raise SystemExit(f"{args.log} is not a race log")
+
+    replayer = RaceReplayer(log)
+    boats = replayer.seek(args.round if args.round is not None else len(log.rounds))
+    status = "finished" if log.finished else "not finished"
+    print(f"Race with seed {log.seed}: {len(log.rounds)} rounds logged, {status}, keyframes after rounds {sorted(log.keyframes)}")
+    print_boats(boats, replayer.rounds)
+    if args.odds:
+        print_odds(boats)
+
+    start_time = time.perf_counter()
+    for _ in range(args.repeat):
+        replayer.seek(0)
+        replayer.play()
+    elapsed = time.perf_counter() - start_time
+    print(f"Full replay: {elapsed / max(1, args.repeat) * 1000:.2f} ms ({args.repeat} replays)")
@@ -0,0 +1,153 @@
+import argparse
+import json
+import time
+from array import array
+from src.engine.constants import INSTABILITY, STAMINA, COLORS
+from src.engine.race_engine import RaceEngine, NPCDecisions
+from src.engine.race_log import decode_rules
+from src.engine.race_logic import GameLogic
+from src.engine.race_save import RaceSave, MAGIC
+from src.engine.rng import new_seed, race_rng
+from src.engine.rules import DEFAULT_RULES
+from analysis.stats import RunningStats, Histogram, proportion_interval
+
+# A scenario file is a race save, or a JSON race written by hand:
+# {
+#     "seed": 42,                      race seed, gives the lanes of the players
+#     "colors": ["Red"],               players boats, none for an NPC race
+#     "rounds": 10,                    rounds already played
+#     "rules": {"lanes": 4},           RuleSet fields changed, optional
+#     "boats": [{"lane": 1, "position": 60, "stroke_rate": 1, "stamina": 3,
+#                "hand": [1, 2, 2, 3, 4, 5, 5], "discard": [1, 1, 3]}]
+# }
+# Boats not listed are still at the start line. Other boat fields are "round" (turns played), "crab", "penalized"
+# and "finished". Without a draw pile, the draw pile is the deck without the cards in hand and discarded,
+# and without a stamina count, the stamina cards not in hand or discarded are in the stamina pile.
+
+def card_list(cards):
+    """
+    Card codes of cards written as in the hand: numbers, "i" and "s".
+    """
+    faces = {"i": INSTABILITY, "s": STAMINA}
+    return [faces.get(c, c) for c in cards]
+
+def scenario_save(scenario):
+    """
+    Race save of a hand-written scenario.
+    """
+    rules = decode_rules(scenario.get("rules", {})) if scenario.get("rules") else DEFAULT_RULES
+    colors = scenario.get("colors", [])
+    seed = scenario.get("seed", 0)
+    if any(color not in COLORS for color in colors):
+        raise SystemExit(f"Unknown boat color in {colors}")
+    boats = {b.lane: b for b in GameLogic.create_boat(colors, race_rng(seed), rules)}
+    for b in boats.values():
+        b.round = scenario.get("rounds", 0)
+
+    for state in scenario.get("boats", []):
+        b = boats.get(state.get("lane"))
+        if b is None:
+            raise SystemExit(f"No boat in lane {state.get('lane')}")
+        b.position = state.get("position", 0)
+        b.stroke_rate = state.get("stroke_rate", b.stroke_rate)
+        b.round = state.get("round", b.round)
+        b.caught_crab = state.get("crab", False)
+        b.penalized = state.get("penalized", False)
+        b.finished = state.get("finished", False)
+        if b.stroke_rate not in rules.rates or not 0 <= b.position <= rules.venue_length:
+            raise SystemExit(f"Lane {b.lane}: stroke rate or position out of range")
+
+        hand = card_list(state.get("hand", []))
+        discard = card_list(state.get("discard", []))
+        if "draw" in state:
+            draw = card_list(state["draw"])
+        else:
+            draw = list(rules.deck)
+            for card in hand + discard:
+                if card != STAMINA:
+                    if card not in draw:
+                        raise SystemExit(f"Lane {b.lane}: more {card} cards than in the deck")
+                    draw.remove(card)
+        stamina = state.get("stamina", rules.stamina_cards - (hand + discard).count(STAMINA))
+        if stamina < 0 or len(hand) > rules.hand_limit:
+            raise SystemExit(f"Lane {b.lane}: more stamina cards or cards in hand than the rules allow")
+
+        b.set_hand(hand)
+        b.deck.set_piles(draw, discard)
+        b.stamina_pile = array("b", [STAMINA]) * stamina
+
+    settings = {"chosen_colors": colors, "seed": seed, "difficulty": "Normal", "speed": "Real time", "turn_time": None}
+    ordered = sorted(boats.values(), key=lambda x: x.lane)
+    return RaceSave.capture(settings, ordered, scenario.get("rounds", 0))
+
+def load_scenario(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if data.startswith(MAGIC):
+        save = RaceSave.from_bytes(data)
+        if save is None:
+            raise SystemExit(f"{path} is not a valid race save")
+        return save
+    return scenario_save(json.loads(data))
+
+def simulate(save, races, seed, difficulty = "Normal"):
+    """
+    Play NPC races from the saved state, each with its own random stream.
+    Returns the finish place histogram of every lane and the rounds left to finish.
+    """
+    rules = save.rules
+    places = {lane: Histogram(1, rules.lanes) for lane in range(1, rules.lanes + 1)}
+    rounds = RunningStats()
+    decisions = NPCDecisions(difficulty)
+    for race in range(races):
+        boats = save.create_boats()
+        rng = race_rng(seed, race, "scenario")
+        for b in boats:
+            b.rng = b.deck.rng = rng
+
+        engine = RaceEngine(boats, decisions)
+        engine.check_finish_line()
+        played = 0
+        while engine.running:
+            engine.play_round()
+            played += 1
+        rounds.add(played)
+        for place, b in enumerate(sorted(boats, key=lambda x: (x.round, -x.position, -x.stroke_rate)), 1):
+            places[b.lane].add(place)
+    return places, rounds
+
+def report(save, places, rounds):
+    print(f"\nFrom round {save.rounds}:")
+    for b in save.create_boats():
+        print(f"Lane {b.lane}: {b.name:<8} position {b.position:>3} | rate {b.stroke_rate} | stamina {len(b.stamina_pile)} | hand {b.sorted_hand()}")
+
+    low, high = rounds.interval()
+    print(f"\nRounds left: {rounds.mean:.2f} [{low:.2f}, {high:.2f}] | max {rounds.high}")
+    print(f"{'LANE':<6} | {'WIN %':>22} | {'MEAN PLACE':>10}")
+    for lane, histogram in places.items():
+        wins = histogram.counts[0]
+        low, high = proportion_interval(wins, histogram.count)
+        mean = sum(place * count for place, count in enumerate(histogram.counts, 1)) / max(1, histogram.count)
+        print(f"{lane:<6} | {wins / max(1, histogram.count) * 100:6.2f} [{low * 100:.2f}, {high * 100:.2f}] | {mean:>10.2f}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Play NPC races from a saved or hand-written mid-race scenario.")
+    parser.add_argument("scenario", help="race save (autosave.rrsave) or JSON scenario")
+    parser.add_argument("--races", type=int, default=1000, help="races played from the scenario")
+    parser.add_argument("--difficulty", choices=["Normal", "Expert"], default="Normal", help="NPC difficulty")
+    parser.add_argument("--seed", type=int, default=None, help="master seed of the races, random if not given")
+    parser.add_argument("--save", default=None, metavar="PATH", help="also write the scenario as a race save, that the game can resume")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    seed = args.seed if args.seed is not None else new_seed()
+    save = load_scenario(args.scenario)
+    if args.save:
+        save.save(args.save)
+        print(f"Scenario saved in {args.save}")
+
+    start_time = time.time()
+    places, rounds = simulate(save, args.races, seed, args.difficulty)
+    print(f"Played {args.races} races from {args.scenario} in {time.time() - start_time:.2f} seconds (seed {seed}).")
+    report(save, places, rounds)
@@ -0,0 +1,257 @@
+import math
+from array import array
+from src.engine.race_engine import NullEvents
+from src.engine.rules import DEFAULT_RULES
+
+# Normal quantile of the 95% confidence intervals
+Z_95 = 1.96
+
+
+class RunningStats:
+    """
+    Online count, mean and variance of integer samples.
+    The sums are exact Python integers, so merging the stats of workers gives the same result in any order.
+    """
+    __slots__ = ("count", "total", "squares", "low", "high")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.squares = 0
+        self.low = None
+        self.high = None
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.squares += value * value
+        self.low = value if self.low is None else min(self.low, value)
+        self.high = value if self.high is None else max(self.high, value)
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.squares += other.squares
+        if other.count:
+            self.low = other.low if self.low is None else min(self.low, other.low)
+            self.high = other.high if self.high is None else max(self.high, other.high)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def variance(self):
+        """
+        Sample variance, computed from the exact sums.
+        """
+        if self.count < 2:
+            return 0.0
+        return (self.count * self.squares - self.total * self.total) / (self.count * (self.count - 1))
+
+    def interval(self, z = Z_95):
+        """
+        Normal confidence interval of the mean.
+        """
+        if not self.count:
+            return 0.0, 0.0
+        margin = z * math.sqrt(self.variance / self.count)
+        return self.mean - margin, self.mean + margin
+
+
+class Histogram:
+    """
+    Counts of integer samples in fixed bins from low to high, samples outside are kept in the first or last bin.
+    With bins one unit wide the quantiles are exact, wider bins give them within one bin.
+    Histograms with the same bins merge by adding the counts.
+    """
+    __slots__ = ("low", "width", "counts")
+
+    def __init__(self, low, high, width = 1):
+        self.low = low
+        self.width = width
+        self.counts = array("q", bytes(8 * ((high - low) // width + 1)))
+
+    def add(self, value, count = 1):
+        i = (value - self.low) // self.width
+        self.counts[min(max(i, 0), len(self.counts) - 1)] += count
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def quantile(self, q):
+        """
+        Smallest bin value with at least a fraction q of the samples at or below it.
+        """
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return self.low + i * self.width
+        return self.low
+
+
+def proportion_interval(successes, trials, z = Z_95):
+    """
+    Wilson confidence interval of a proportion, usable with few or no successes.
+    """
+    if not trials:
+        return 0.0, 0.0
+    p = successes / trials
+    center = (p + z * z / (2 * trials)) / (1 + z * z / trials)
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / (1 + z * z / trials)
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+class RaceStats(NullEvents):
+    """
+    Event sink aggregating simulated races in constant memory, and passing the events to another sink.
+    Tracks rounds to finish, finish order by lane, stamina at each split, crabs by stroke rate and bonuses.
+    Stats of different workers merge exactly when they use the same rules.
+    """
+    def __init__(self, rules = DEFAULT_RULES, events = None):
+        self.events = events if events is not None else NullEvents()
+        self.rules = rules
+        self.races = 0
+
+        # ------ AGGREGATES ------
+        self.rounds = RunningStats()
+        self.rounds_histogram = Histogram(0, 4 * rules.venue_length)
+        self.places = {lane: Histogram(1, rules.lanes) for lane in range(1, rules.lanes + 1)}
+        self.place_stats = {lane: RunningStats() for lane in range(1, rules.lanes + 1)}
+        self.split_stamina = [RunningStats() for _ in rules.split_locs]
+        self.split_stamina_histograms = [Histogram(0, rules.stamina_cards) for _ in rules.split_locs]
+        self.turns_by_rate = [0] * len(rules.rates)
+        self.crabs_by_rate = [0] * len(rules.rates)
+        self.tides = RunningStats()
+        self.motivations = RunningStats()
+
+        # ------ CURRENT RACE ------
+        self.round = 0
+        self.turn_rates = {}
+        self.positions = {}
+        self.finished = set()
+        self.race_tides = 0
+        self.race_motivations = 0
+
+    def merge(self, other):
+        """
+        Add the stats of another aggregator with the same rules.
+        """
+        self.races += other.races
+        self.rounds.merge(other.rounds)
+        self.rounds_histogram.merge(other.rounds_histogram)
+        for lane in other.places:
+            self.places[lane].merge(other.places[lane])
+            self.place_stats[lane].merge(other.place_stats[lane])
+        for mine, theirs in zip(self.split_stamina + self.split_stamina_histograms, other.split_stamina + other.split_stamina_histograms):
+            mine.merge(theirs)
+        for rate in self.rules.rates:
+            self.turns_by_rate[rate] += other.turns_by_rate[rate]
+            self.crabs_by_rate[rate] += other.crabs_by_rate[rate]
+        self.tides.merge(other.tides)
+        self.motivations.merge(other.motivations)
+
+    # ------ EVENTS ------
+    def turn_started(self, boat):
+        self.events.turn_started(boat)
+
+    def turn_event(self, boat, event):
+        self.events.turn_event(boat, event)
+
+    def choice_made(self, boat, choice, values):
+        # Crabs reset the stroke rate, keep the one the cards are played at
+        if choice == "cards":
+            self.turn_rates[boat.lane] = boat.stroke_rate
+        self.events.choice_made(boat, choice, values)
+
+    def turn_finished(self, boat, status, split_loc):
+        rate = self.turn_rates.pop(boat.lane)
+        self.turns_by_rate[rate] += 1
+        if status == "crab":
+            self.crabs_by_rate[rate] += 1
+        self.events.turn_finished(boat, status, split_loc)
+
+    def bonus(self, boats, event):
+        if event == "motivation":
+            self.race_motivations += 1
+        else:
+            self.race_tides += len(boats)
+        self.events.bonus(boats, event)
+
+    def round_finished(self, boats):
+        self.round += 1
+        rules = self.rules
+        for b in boats:
+            # Stamina when the boat is past a split for the first time, bonus moves included
+            before = self.positions.get(b.lane, 0)
+            i = rules.first_split(before, b.position - before)
+            while i is not None and i < len(rules.split_locs) and rules.split_locs[i] <= b.position:
+                self.split_stamina[i].add(len(b.stamina_pile))
+                self.split_stamina_histograms[i].add(len(b.stamina_pile))
+                i += 1
+            self.positions[b.lane] = b.position
+
+            # Same check as RaceEngine.check_finish_line, run right after this event
+            if b.lane not in self.finished and b.position >= rules.venue_length:
+                self.finished.add(b.lane)
+                self.rounds.add(self.round)
+                self.rounds_histogram.add(self.round)
+        self.events.round_finished(boats)
+
+    def race_finished(self, boats):
+        # Same order as the podium
+        for place, b in enumerate(sorted(boats, key=lambda x: (x.round, -x.position, -x.stroke_rate)), 1):
+            self.places[b.lane].add(place)
+            self.place_stats[b.lane].add(place)
+        self.tides.add(self.race_tides)
+        self.motivations.add(self.race_motivations)
+        self.races += 1
+
+        self.round = 0
+        self.positions.clear()
+        self.finished.clear()
+        self.race_tides = 0
+        self.race_motivations = 0
+        self.events.race_finished(boats)
+
+    # ------ REPORT ------
+    def report(self):
+        """
+        Print every aggregate with its 95% confidence interval.
+        """
+        def interval(stats):
+            low, high = stats.interval()
+            return f"{stats.mean:7.2f} [{low:.2f}, {high:.2f}]"
+
+        print(f"\nRace Stats ({self.races} races, 95% confidence intervals)")
+        print("=" * 60)
+        h = self.rounds_histogram
+        print(f"Rounds to finish: {interval(self.rounds)} | p10 {h.quantile(0.1)} | median {h.quantile(0.5)} | p90 {h.quantile(0.9)} | max {self.rounds.high}")
+
+        print(f"\n{'LANE':<6} | {'WIN %':>22} | {'MEAN PLACE':>22}")
+        for lane, places in self.places.items():
+            wins = places.counts[0]
+            low, high = proportion_interval(wins, places.count)
+            share = f"{wins / max(1, places.count) * 100:6.2f} [{low * 100:.2f}, {high * 100:.2f}]"
+            print(f"{lane:<6} | {share:>22} | {interval(self.place_stats[lane]):>22}")
+
+        print(f"\n{'SPLIT':<6} | {'STAMINA':>22} | {'MEDIAN':>6} | {'BOATS':>8}")
+        for i, stats in enumerate(self.split_stamina):
+            print(f"{self.rules.split_locs[i]:<6} | {interval(stats):>22} | {self.split_stamina_histograms[i].quantile(0.5):>6} | {stats.count:>8}")
+
+        print(f"\n{'RATE':<6} | {'CRAB %':>22} | {'TURNS':>10}")
+        for rate in self.rules.rates:
+            crabs, turns = self.crabs_by_rate[rate], self.turns_by_rate[rate]
+            low, high = proportion_interval(crabs, turns)
+            share = f"{crabs / max(1, turns) * 100:6.2f} [{low * 100:.2f}, {high * 100:.2f}]"
+            print(f"{rate:<6} | {share:>22} | {turns:>10}")
+
+        print(f"\nChange of tides per race: {interval(self.tides)}")
+        print(f"Motivation per race:      {interval(self.motivations)}")
@@ -0,0 +1,231 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import time
+from dataclasses import replace
+from multiprocessing import Pool
+from src.engine.constants import COLORS
+from src.engine.race_engine import RaceEngine, NPCDecisions
+from src.engine.race_logic import GameLogic
+from src.engine.rng import new_seed, race_rng
+from src.engine.rules import DEFAULT_RULES
+from analysis.stats import RaceStats, proportion_interval
+
+# Search space used without a space file: the pace of every split and the field size.
+# Names are RuleSet fields, or "field.key" for one split limit, aggression profile or pace card count:
+#   "splits.75": limit at 75, "aggression.75": aggression before it, "pace_cards.3": number of 3 cards.
+# Values are a list of choices, or a range {"low", "high"} with "integer": true for whole numbers
+# and "steps" for grid designs.
+DEFAULT_SPACE = {
+    "splits.25": [5, 6, 7],
+    "splits.50": [5, 6, 7],
+    "splits.75": [5, 6, 7],
+    "splits.87": [4, 5, 6],
+    "lanes": [4, 6],
+}
+
+DESIGNS = ("grid", "random", "lhs")
+
+# Fields with one value per key
+KEYED_FIELDS = ("splits", "aggression")
+
+# ------ SEARCH SPACE ------
+def parse_space(space):
+    """
+    Check a search space and return its parameters as (name, values or range) in a stable order.
+    Whole fields come before their keys, so "splits.75" can change a split of "splits".
+    """
+    parameters = []
+    for name in sorted(space, key=lambda n: (n.count("."), n)):
+        field, _, key = name.partition(".")
+        if not hasattr(DEFAULT_RULES, field) or (key and field not in KEYED_FIELDS + ("pace_cards",)):
+            raise SystemExit(f"Unknown sweep parameter: {name}")
+        values = space[name]
+        if isinstance(values, dict):
+            if "low" not in values or "high" not in values:
+                raise SystemExit(f"Range of {name} needs a low and a high value")
+        elif not isinstance(values, list) or not values:
+            raise SystemExit(f"{name} needs a list of values or a range")
+        if name == "lanes":
+            most = values["high"] if isinstance(values, dict) else max(values)
+            if most > len(COLORS):
+                raise SystemExit(f"At most {len(COLORS)} lanes can race")
+        parameters.append((name, values))
+    return parameters
+
+def range_value(values, u):
+    """
+    Value of a range at a fraction u of the way from low to high.
+    """
+    low, high = values["low"], values["high"]
+    if values.get("integer"):
+        return min(high, low + int(u * (high - low + 1)))
+    return low + u * (high - low)
+
+def pick(values, u):
+    """
+    Value of a parameter for a uniform number u in [0, 1).
+    """
+    if isinstance(values, dict):
+        return range_value(values, u)
+    return values[min(len(values) - 1, int(u * len(values)))]
+
+def grid_values(values):
+    if not isinstance(values, dict):
+        return values
+    if values.get("integer") and "steps" not in values:
+        return list(range(values["low"], values["high"] + 1))
+    steps = values.get("steps", 3)
+    return [values["low"] + i * (values["high"] - values["low"]) / max(1, steps - 1) for i in range(steps)]
+
+# ------ DESIGNS ------
+def grid_design(parameters):
+    """
+    Every combination of the parameter values.
+    """
+    names = [name for name, _ in parameters]
+    return [dict(zip(names, combination)) for combination in itertools.product(*(grid_values(v) for _, v in parameters))]
+
+def random_design(parameters, points, rng):
+    """
+    Points drawn uniformly and independently.
+    """
+    return [{name: pick(values, rng.random()) for name, values in parameters} for _ in range(points)]
+
+def lhs_design(parameters, points, rng):
+    """
+    Latin hypercube: the range of every parameter is cut in as many strata as points,
+    and every stratum is used by exactly one point.
+    """
+    design = [{} for _ in range(points)]
+    for name, values in parameters:
+        strata = list(range(points))
+        rng.shuffle(strata)
+        for point, stratum in zip(design, strata):
+            point[name] = pick(values, (stratum + rng.random()) / points)
+    return design
+
+def make_design(parameters, design, points, seed):
+    rng = race_rng(seed, 0, "design")
+    if design == "grid":
+        return grid_design(parameters)
+    if design == "random":
+        return random_design(parameters, points, rng)
+    return lhs_design(parameters, points, rng)
+
+# ------ RULES ------
+def apply_point(point, rules = DEFAULT_RULES):
+    """
+    Rules of a design point, the parameters not in the point keep their value.
+    """
+    changes = {}
+    for name, value in point.items():
+        field, _, key = name.partition(".")
+        if not key:
+            changes[field] = value
+        elif field == "pace_cards":
+            # Number of pace cards of one value
+            cards = [c for c in changes.get(field, getattr(rules, field)) if c != int(key)]
+            changes[field] = tuple(sorted(cards + [int(key)] * int(value)))
+        else:
+            items = dict(changes.get(field, getattr(rules, field)))
+            items[int(key)] = value
+            changes[field] = tuple(items.items())
+    return replace(rules, **changes)
+
+# ------ EVALUATION ------
+def evaluate_point(args):
+    """
+    Play NPC races with the rules of a design point and summarise them in a result row.
+    Every point plays the same race seeds, so differences between points come from the rules.
+    """
+    index, point, races, seed, difficulty = args
+    rules = apply_point(point)
+    if rules.lanes > len(COLORS):
+        # Checked by parse_space, a SystemExit in a worker would leave the pool waiting for its task
+        raise ValueError(f"At most {len(COLORS)} lanes can race")
+
+    stats = RaceStats(rules)
+    decisions = NPCDecisions(difficulty)
+    start_time = time.perf_counter()
+    for race in range(races):
+        boats = GameLogic.create_boat(["No more players"], race_rng(seed, race), rules)
+        RaceEngine(boats, decisions, stats).run()
+
+    crabs, turns = sum(stats.crabs_by_rate), sum(stats.turns_by_rate)
+    crab_low, crab_high = proportion_interval(crabs, turns)
+    rounds_low, rounds_high = stats.rounds.interval()
+    wins = [places.counts[0] / max(1, places.count) for places in stats.places.values()]
+    last_split = stats.split_stamina[-1] if stats.split_stamina else None
+
+    return {
+        "point": index,
+        **point,
+        "races": races,
+        "rounds": round(stats.rounds.mean, 3),
+        "rounds_low": round(rounds_low, 3),
+        "rounds_high": round(rounds_high, 3),
+        "crab_rate": round(crabs / max(1, turns), 5),
+        "crab_low": round(crab_low, 5),
+        "crab_high": round(crab_high, 5),
+        "win_spread": round(max(wins) - min(wins), 4),
+        "last_split_stamina": round(last_split.mean, 3) if last_split else "",
+        "tides": round(stats.tides.mean, 3),
+        "motivation": round(stats.motivations.mean, 3),
+        "seconds": round(time.perf_counter() - start_time, 3),
+    }
+
+def sweep(parameters, design, races, seed, path, workers = 1, difficulty = "Normal"):
+    """
+    Evaluate every point of the design over a process pool, writing each result row as soon as it is ready.
+    Returns the number of points.
+    """
+    names = [name for name, _ in parameters]
+    columns = ["point"] + names + ["races", "rounds", "rounds_low", "rounds_high", "crab_rate", "crab_low", "crab_high",
+                                  "win_spread", "last_split_stamina", "tides", "motivation", "seconds"]
+    tasks = [(index, point, races, seed, difficulty) for index, point in enumerate(design)]
+
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, columns)
+        writer.writeheader()
+        if workers > 1:
+            with Pool(workers) as pool:
+                for row in pool.imap_unordered(evaluate_point, tasks):
+                    writer.writerow(row)
+                    f.flush()
+        else:
+            for task in tasks:
+                writer.writerow(evaluate_point(task))
+                f.flush()
+    return len(tasks)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sweep rule parameters with NPC races.")
+    parser.add_argument("--space", default=None, metavar="PATH", help="JSON search space, the split paces and field size if not given")
+    parser.add_argument("--design", choices=DESIGNS, default="grid", help="grid of every combination, random or Latin hypercube points")
+    parser.add_argument("--points", type=int, default=100, help="points of random and Latin hypercube designs")
+    parser.add_argument("--races", type=int, default=200, help="races played at every point")
+    parser.add_argument("--difficulty", choices=["Normal", "Expert"], default="Normal", help="NPC difficulty")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes (0 uses every core)")
+    parser.add_argument("--seed", type=int, default=None, help="master seed, random if not given")
+    parser.add_argument("--out", default="sweep.csv", help="CSV file of the result rows")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    workers = args.workers or os.cpu_count()
+    seed = args.seed if args.seed is not None else new_seed()
+
+    space = DEFAULT_SPACE
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+    parameters = parse_space(space)
+    design = make_design(parameters, args.design, args.points, seed)
+
+    start_time = time.time()
+    points = sweep(parameters, design, args.races, seed, args.out, workers, args.difficulty)
+    print(f"Evaluated {points} {args.design} design points of {args.races} races in {time.time() - start_time:.2f} seconds (seed {seed}, {workers} workers).")
+    print(f"Results saved in {args.out}")
@@ -0,0 +1,208 @@
+import argparse
+import json
+import math
+import os
+import time
+from multiprocessing import Pool
+from src.engine.race_engine import RaceEngine
+from src.engine.race_logic import GameLogic
+from src.engine.npc_variants import NPCVariant, LaneDecisions, VARIANT_FIELDS
+from src.engine.rng import new_seed, race_rng
+from src.engine.rules import DEFAULT_RULES
+from analysis.stats import RunningStats, proportion_interval, Z_95
+
+# Variants played without a variants file, the same format as the JSON file: {name: parameters}
+# (parameters in src/engine/npc_variants.py)
+DEFAULT_VARIANTS = {
+    "Normal": {},
+    "Expert": {"difficulty": "Expert"},
+    "Cautious": {"aggression_scale": 0.5},
+    "Bold": {"aggression_scale": 1.75},
+    "Sprinter": {"aggression": {"87": 0.85}},
+    "Motivated": {"motivation": [1, 2], "motivation_chance": 0.9},
+}
+
+DIFFICULTIES = ("Normal", "Expert", "Master")
+
+# Matches played by one worker task
+BLOCK = 25
+
+# Rating of the average variant, and Elo points per unit of log strength
+BASE_RATING = 1500
+ELO_SCALE = 400 / math.log(10)
+
+# ------ VARIANTS ------
+def load_variants(path = None, names = None):
+    """
+    Variants of the tournament as (name, parameters), from a JSON file or the default ones.
+    Names choose some of them, in that order.
+    """
+    variants = DEFAULT_VARIANTS
+    if path:
+        with open(path) as f:
+            variants = json.load(f)
+    if names:
+        unknown = [name for name in names if name not in variants]
+        if unknown:
+            raise SystemExit(f"Unknown variants: {', '.join(unknown)}")
+        variants = {name: variants[name] for name in names}
+
+    for name, parameters in variants.items():
+        if not isinstance(parameters, dict) or any(field not in VARIANT_FIELDS for field in parameters):
+            raise SystemExit(f"Variant {name} parameters must be some of {', '.join(VARIANT_FIELDS)}")
+        if parameters.get("difficulty", "Normal") not in DIFFICULTIES:
+            raise SystemExit(f"Variant {name}: difficulty must be one of {', '.join(DIFFICULTIES)}")
+    if len(variants) < 2:
+        raise SystemExit("A tournament needs at least two variants")
+    return list(variants.items())
+
+def match_lineup(match, count, lanes, seed):
+    """
+    Variant of every lane of a match, in lane order.
+    Variants take turns to fill the lanes, so they all get the same number of entries over the matches.
+    """
+    lineup = [(match * lanes + i) % count for i in range(lanes)]
+    race_rng(seed, match, "lineup").shuffle(lineup)
+    return lineup
+
+# ------ MATCHES ------
+def play_matches(args):
+    """
+    Play a block of matches. A match is one race for every rotation of its lineup across the lanes,
+    all dealt from the same race stream: every entry rows once from every lane, with the same starting decks.
+    Returns the head to head results (wins[i][j]: races where variant i finished ahead of variant j),
+    the finish places and the race wins of every variant.
+    """
+    first, matches, variants, seed = args
+    rules = DEFAULT_RULES
+    lanes = rules.lanes
+    count = len(variants)
+    players = [NPCVariant(name, **parameters) for name, parameters in variants]
+    wins = [[0] * count for _ in range(count)]
+    places = [RunningStats() for _ in range(count)]
+    firsts = [0] * count
+
+    for match in range(first, first + matches):
+        lineup = match_lineup(match, count, lanes, seed)
+        for rotation in range(lanes):
+            boats = GameLogic.create_boat(["No more players"], race_rng(seed, match), rules)
+            entries = {b.lane: lineup[(b.lane - 1 + rotation) % lanes] for b in boats}
+            decisions = LaneDecisions({lane: players[v] for lane, v in entries.items()})
+            # Master variants search with a stream of the race, whatever worker plays it
+            decisions.seed_search(seed, match * lanes + rotation)
+            RaceEngine(boats, decisions).run()
+
+            ranking = [entries[b.lane] for b in sorted(boats, key=lambda x: (x.round, -x.position, -x.stroke_rate))]
+            firsts[ranking[0]] += 1
+            for place, v in enumerate(ranking, 1):
+                places[v].add(place)
+                for behind in ranking[place:]:
+                    if behind != v:
+                        wins[v][behind] += 1
+    return wins, places, firsts
+
+def tournament(variants, matches, seed, workers = 1):
+    """
+    Play every match over a process pool and merge the results, which are the same for any number of workers.
+    """
+    count = len(variants)
+    tasks = [(first, min(BLOCK, matches - first), variants, seed) for first in range(0, matches, BLOCK)]
+    wins = [[0] * count for _ in range(count)]
+    places = [RunningStats() for _ in range(count)]
+    firsts = [0] * count
+
+    def merge(result):
+        block_wins, block_places, block_firsts = result
+        for i in range(count):
+            for j in range(count):
+                wins[i][j] += block_wins[i][j]
+            places[i].merge(block_places[i])
+            firsts[i] += block_firsts[i]
+
+    if workers > 1:
+        with Pool(workers) as pool:
+            for result in pool.imap_unordered(play_matches, tasks):
+                merge(result)
+    else:
+        for task in tasks:
+            merge(play_matches(task))
+    return wins, places, firsts
+
+# ------ RATINGS ------
+def ratings(wins, tolerance = 1e-9, iterations = 10000):
+    """
+    Elo ratings fitted to every head to head result at once: Bradley-Terry maximum likelihood, solved by
+    minorization-maximization, on the Elo scale. Unlike sequential Elo updates, they don't depend on the race order.
+    Half a win is added to both sides of every pair that met, so an unbeaten variant keeps a finite rating.
+    Returns the rating and its standard error for every variant, the average variant is rated BASE_RATING.
+    The results of one race are not independent, so the errors are on the low side.
+    """
+    count = len(wins)
+    met = [[wins[i][j] + wins[j][i] for j in range(count)] for i in range(count)]
+    score = [sum(wins[i][j] + 0.5 for j in range(count) if met[i][j]) for i in range(count)]
+    strength = [1.0] * count
+
+    for _ in range(iterations):
+        updated = []
+        for i in range(count):
+            denominator = sum((met[i][j] + 1) / (strength[i] + strength[j]) for j in range(count) if met[i][j])
+            updated.append(score[i] / denominator if denominator else strength[i])
+        # Strengths are known up to a factor, their geometric mean is kept at 1
+        scale = math.exp(sum(math.log(s) for s in updated) / count)
+        updated = [s / scale for s in updated]
+        change = max(abs(a - b) for a, b in zip(updated, strength))
+        strength = updated
+        if change < tolerance:
+            break
+
+    result = []
+    for i in range(count):
+        information = sum(met[i][j] * strength[i] * strength[j] / (strength[i] + strength[j]) ** 2 for j in range(count) if j != i)
+        error = ELO_SCALE / math.sqrt(information) if information else math.inf
+        result.append((BASE_RATING + ELO_SCALE * math.log(strength[i]), error))
+    return result
+
+def report(variants, wins, places, firsts):
+    names = [name for name, _ in variants]
+    rated = ratings(wins)
+    order = sorted(range(len(variants)), key=lambda i: -rated[i][0])
+
+    print(f"\n{'VARIANT':<12} | {'RATING [95%]':>20} | {'ENTRIES':>7} | {'WIN %':>22} | {'MEAN PLACE':>20}")
+    for i in order:
+        rating, error = rated[i]
+        entries = places[i].count
+        low, high = proportion_interval(firsts[i], entries)
+        place_low, place_high = places[i].interval()
+        rating_cell = f"{rating:.0f} [{rating - Z_95 * error:.0f}, {rating + Z_95 * error:.0f}]"
+        win_cell = f"{firsts[i] / max(1, entries) * 100:.2f} [{low * 100:.2f}, {high * 100:.2f}]"
+        place_cell = f"{places[i].mean:.3f} [{place_low:.3f}, {place_high:.3f}]"
+        print(f"{names[i]:<12} | {rating_cell:>20} | {entries:>7} | {win_cell:>22} | {place_cell:>20}")
+
+    print("\nHead to head (share of the races where the first variant finished ahead):")
+    for a, i in enumerate(order):
+        for j in order[a + 1:]:
+            met = wins[i][j] + wins[j][i]
+            low, high = proportion_interval(wins[i][j], met)
+            print(f"{names[i]:<12} vs {names[j]:<12} | {wins[i][j] / max(1, met) * 100:6.2f}% [{low * 100:.2f}, {high * 100:.2f}] of {met} meetings")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rate NPC variants in a tournament of mixed NPC races.")
+    parser.add_argument("variants", nargs="*", help="variants playing, every variant of the file if not given")
+    parser.add_argument("--file", default=None, metavar="PATH", help="JSON variants {name: parameters}, the default variants if not given")
+    parser.add_argument("--races", type=int, default=6000, help="races played, rounded up to whole matches of one race per lane")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes (0 uses every core)")
+    parser.add_argument("--seed", type=int, default=None, help="master seed, random if not given")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    workers = args.workers or os.cpu_count()
+    seed = args.seed if args.seed is not None else new_seed()
+    variants = load_variants(args.file, args.variants)
+    lanes = DEFAULT_RULES.lanes
+    matches = max(1, -(-args.races // lanes))
+
+    start_time = time.time()
+    wins, places, firsts = tournament(variants, matches, seed, workers)
+    print(f"Played {matches * lanes} races of {len(variants)} variants in {time.time() - start_time:.2f} seconds (seed {seed}, {workers} workers).")
+    report(variants, wins, places, firsts)
@@ -0,0 +1 @@
+# Puts the project root on the import path, so the tests import src and analysis like the game does
@@ -1,25 +1,58 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+import argparse
+import asyncio
 import sys
 from src.controllers.menu import MenuController
 from src.controllers.game import GameController
+from src.controllers.async_game import AsyncGameController
+from src.engine.profiler import PhaseProfiler
+from src.engine.race_save import AUTOSAVE_PATH
+from src.interface.keyboard import keyboard
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Redline Regatta")
+    parser.add_argument("--profile", nargs="?", const="profile.json", default=None, metavar="PATH", help="time every race phase, print the breakdown when leaving and save it as JSON (profile.json if no path)")
+    parser.add_argument("--allocations", action="store_true", help="with --profile, also count the memory blocks allocated by every phase")
+    return parser.parse_args()
 
 def main():
-    try:
-        while True:
-            signal, chosen_colors = MenuController.run_menu()
+    args = parse_args()
+    profiler = PhaseProfiler(args.allocations).start() if args.profile else None
 
-            if signal == "Start":
-                game = GameController(chosen_colors)
-                game.run_game()
-            elif signal == "Exit":
-                print("\nThanks for playing! See you at the next starting line.")
-                break
+    try:
+        # Raw keyboard input for the whole game, the terminal is restored when leaving
+        with keyboard:
+            while True:
+                signal, settings = MenuController.run_menu()
 
-        sys.exit(0)
+                if signal == "Start":
+                    # Every race is saved after each round, "Resume Race" goes on from there
+                    settings["autosave_path"] = AUTOSAVE_PATH
+                    # Timed turns need the asyncio controller
+                    if settings.get("turn_time"):
+                        game = AsyncGameController(**settings)
+                        asyncio.run(game.run_game())
+                    else:
+                        settings.pop("turn_time", None)
+                        game = GameController(**settings)
+                        if profiler is not None:
+                            profiler.attach(game.engine)
+                        game.run_game()
+                elif signal == "Exit":
+                    print("\nThanks for playing! See you at the next starting line.")
+                    break
     except KeyboardInterrupt:
         print("\n[!] Game closed manually. See you on the water!")
-        sys.exit(0)
+    except EOFError:
+        print("\n[!] Keyboard input closed. See you on the water!")
+
+    if profiler is not None:
+        profiler.stop()
+        profiler.report()
+        profiler.save(args.profile)
+        print(f"Phase profile saved in {args.profile}")
+    sys.exit(0)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,226 @@
+import asyncio
+from src.interface.async_view import AsyncGameView
+from src.engine.race_logic import GameLogic
+from src.engine.race_engine import RaceEngine, NPCDecisions, NullEvents
+from src.engine.race_log import RaceRecorder
+from src.engine.race_save import AutoSave
+from src.engine.rng import new_seed, race_rng
+from src.engine.rules import DEFAULT_RULES
+from src.engine.constants import SPEEDS
+
+
+class QueuedEvents(NullEvents):
+    """Keep the race events of the engine, the async controller shows them between phases."""
+    def __init__(self):
+        self.pending = []
+
+    def turn_started(self, boat):
+        self.pending.append(("turn_started", (boat,)))
+
+    def turn_event(self, boat, event):
+        self.pending.append(("turn_event", (boat, event)))
+
+    def turn_finished(self, boat, status, split_loc):
+        self.pending.append(("turn_finished", (boat, status, split_loc)))
+
+    def bonus(self, boats, event):
+        self.pending.append(("bonus", (list(boats), event)))
+
+    def round_finished(self, boats):
+        self.pending.append(("round_finished", (boats,)))
+
+    def race_finished(self, boats):
+        self.pending.append(("race_finished", (boats,)))
+
+
+class AsyncViewEvents:
+    """
+    Show the race events on the async game view, like ViewEvents.
+    With a turn time, messages to human players continue by themselves when it runs out.
+    """
+    def __init__(self, speed = "Real time", turn_time = None):
+        self.message_delay, self.screen_delay = SPEEDS[speed]
+        self.turn_time = turn_time
+
+    def delay(self, boat):
+        """Seconds a message about this boat stays on screen, None to wait for the player."""
+        return None if not boat.is_npc else self.message_delay
+
+    async def race_started(self, boats):
+        await AsyncGameView.render_game_screen(boats, delay = self.screen_delay)
+
+    async def turn_started(self, boat):
+        # The result of the turn is enough for NPCs at faster speeds
+        if boat.is_npc and self.message_delay is not None:
+            return
+        await AsyncGameView.show_player_turn(boat, self.turn_time)
+
+    async def turn_event(self, boat, event):
+        await AsyncGameView.show_event(boat, event, self.delay(boat), self.turn_time)
+
+    async def turn_finished(self, boat, status, split_loc):
+        await AsyncGameView.show_event(boat, status, self.delay(boat), self.turn_time)
+
+    async def bonus(self, boats, event):
+        # Human players already chose their motivation on screen
+        if event == "motivation" and not boats[0].is_npc:
+            return
+        await AsyncGameView.show_bonus([b.name for b in boats], event, self.message_delay, self.turn_time)
+
+    async def round_finished(self, boats):
+        await AsyncGameView.render_game_screen(boats, "Leaderboard", self.screen_delay)
+
+    async def race_finished(self, boats):
+        # The podium stays as long as in real time, a key press skips it
+        await AsyncGameView.render_game_screen(boats, "Podium", SPEEDS["Real time"][1])
+
+
+class AsyncGameController:
+    """
+    Same race as GameController on an asyncio loop, so input, rendering and other games don't block each other.
+    The RaceEngine phase steps are run here and their events are shown between them.
+    With a turn time, a human turn that runs out of time is finished with the NPC choices.
+    """
+    def __init__(self, chosen_colors, seed = None, difficulty = "Normal", rules = DEFAULT_RULES, speed = "Real time", turn_time = None, events = None, log_path = None, autosave_path = None, save = None):
+        """
+        Create boats and the engine.
+        The events sink can be replaced by any object with the async methods of AsyncViewEvents.
+        With a log path the race is recorded for src/engine/race_log.py replays.
+        With an autosave path the race is saved after every round, and a save (src/engine/race_save.py) resumes it.
+        """
+        self.seed = seed if seed is not None else new_seed()
+        self.rules = rules
+        self.speed = speed
+        self.turn_time = turn_time
+        self.boats = GameLogic.create_boat(chosen_colors, race_rng(self.seed), rules)
+        if save is not None:
+            save.restore(self.boats)
+        self.npc = NPCDecisions(difficulty = difficulty, seed = self.seed)
+        self.queue = QueuedEvents()
+        self.events = events if events is not None else AsyncViewEvents(speed, turn_time)
+        engine_events = self.queue
+        if log_path is not None:
+            engine_events = RaceRecorder(log_path, self.seed, chosen_colors, self.boats, engine_events)
+        if autosave_path is not None:
+            settings = {"chosen_colors": list(chosen_colors), "seed": self.seed, "difficulty": difficulty, "speed": speed, "turn_time": turn_time}
+            engine_events = AutoSave(autosave_path, settings, self.boats, engine_events, save.rounds if save is not None else 0)
+        self.engine = RaceEngine(self.boats, self.npc, engine_events)
+        if save is not None:
+            # Saves are taken before the finish line check of their round
+            self.engine.check_finish_line()
+
+    async def run_game(self):
+        """
+        Play rounds until every boat crossed the finish line.
+        """
+        await self.events.race_started(self.boats)
+        while self.engine.running:
+            await self.play_round()
+
+    async def show_events(self):
+        """
+        Show the events the engine sent since the last call, in order.
+        """
+        pending, self.queue.pending = self.queue.pending, []
+        for name, args in pending:
+            await getattr(self.events, name)(*args)
+
+    # ------ ROUND ------
+    async def play_round(self):
+        await self.drive(self.engine.round_steps())
+
+    async def play_turn(self, boat):
+        await self.drive(self.engine.turn_steps(boat))
+
+    async def drive(self, steps):
+        """
+        Run RaceEngine phase steps, like RaceEngine.drive with awaited choices.
+        The events of every step are shown before its choice, the turn time starts once the turn is shown.
+        """
+        engine = self.engine
+        deadline = None
+        timed = False
+        for request, args in steps:
+            await self.show_events()
+            if request == "turn":
+                engine.answer = await self.play_turn(*args)
+            elif request == "motivation":
+                engine.answer = await self.motivation(*args)
+            else:
+                if not timed:
+                    deadline, timed = self.deadline(), True
+                engine.answer = await getattr(self, request)(*args, deadline)
+        await self.show_events()
+
+    # ------ TIMED DECISIONS ------
+    def deadline(self):
+        """
+        Loop time when a turn started now runs out, None without turn time.
+        """
+        if self.turn_time is None:
+            return None
+        return asyncio.get_running_loop().time() + self.turn_time
+
+    def time_left(self, deadline):
+        """
+        Seconds left before the deadline, None without turn time.
+        """
+        if deadline is None:
+            return None
+        return max(0, deadline - asyncio.get_running_loop().time())
+
+    async def stroke_rate(self, boat, deadline):
+        if boat.is_npc or self.time_left(deadline) == 0:
+            return self.npc.stroke_rate(boat)
+
+        choice = await AsyncGameView.get_sroke_rate(boat, self.time_left(deadline))
+        if choice is None:
+            return self.npc.stroke_rate(boat)
+        return choice
+
+    async def cards_to_play(self, boat, available_cards, cards_needed, deadline):
+        if boat.is_npc or self.time_left(deadline) == 0:
+            return self.npc.cards_to_play(boat, available_cards, cards_needed)
+
+        # A faster stroke rate can need more cards than the hand can play
+        cards_left = list(available_cards)
+        cards_selected = []
+        for _ in range(min(cards_needed, len(available_cards))):
+            card = await AsyncGameView.get_card_to_play(boat, cards_left, cards_selected, cards_needed, self.time_left(deadline))
+            if card is None:
+                # Out of time, the NPC plays the whole selection
+                return self.npc.cards_to_play(boat, available_cards, cards_needed)
+            cards_left.remove(card)
+            cards_selected.append(card)
+        return cards_selected
+
+    async def cards_to_discard(self, boat, available_cards, deadline):
+        if boat.is_npc or self.time_left(deadline) == 0:
+            return self.npc.cards_to_discard(boat, available_cards)
+
+        cards_selected = []
+        option = await AsyncGameView.choose_to_discard_cards(boat, self.time_left(deadline))
+        if option is None:
+            return self.npc.cards_to_discard(boat, available_cards)
+
+        if option == "Discard":
+            cards_left = list(available_cards)
+            while cards_left:
+                card = await AsyncGameView.get_card_to_discard(boat, cards_left, self.time_left(deadline))
+                if card is None:
+                    return self.npc.cards_to_discard(boat, available_cards)
+                if card == "Done":
+                    break
+
+                cards_left.remove(card)
+                cards_selected.append(card)
+        return cards_selected
+
+    async def motivation(self, boat, boat_ahead):
+        if boat.is_npc:
+            return self.npc.motivation(boat, boat_ahead)
+
+        option = await AsyncGameView.choose_motivation(boat, boat_ahead, self.turn_time)
+        if option is None:
+            return self.npc.motivation(boat, boat_ahead)
+        return option == "Activate Motivation (+2 Spaces, Cost 1 Stamina)"
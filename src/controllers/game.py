@@ -1,82 +1,121 @@
-from src.engine.constants import VENUE_LENGTH, SPLITS
 from src.interface.view import GameView
 from src.engine.race_logic import GameLogic
-from src.engine.npc_logic import NPCLogic
+from src.engine.race_engine import RaceEngine, NPCDecisions, NullEvents
+from src.engine.race_log import RaceRecorder
+from src.engine.race_save import AutoSave
+from src.engine.rng import new_seed, race_rng
+from src.engine.rules import DEFAULT_RULES
+from src.engine.constants import SPEEDS
+
+
+class PlayerDecisions(NPCDecisions):
+    """Ask human players through the game view, NPCs keep using NPCLogic."""
+    def stroke_rate(self, boat):
+        if boat.is_npc:
+            return super().stroke_rate(boat)
+        return GameView.get_sroke_rate(boat)
+
+    def cards_to_play(self, boat, available_cards, cards_needed):
+        if boat.is_npc:
+            return super().cards_to_play(boat, available_cards, cards_needed)
+
+        # A faster stroke rate can need more cards than the hand can play
+        cards_selected = []
+        for _ in range(min(cards_needed, len(available_cards))):
+            card = GameView.get_card_to_play(boat, available_cards, cards_selected, cards_needed)
+            available_cards.remove(card)
+            cards_selected.append(card)
+        return cards_selected
+
+    def cards_to_discard(self, boat, available_cards):
+        if boat.is_npc:
+            return super().cards_to_discard(boat, available_cards)
+
+        cards_selected = []
+        option = GameView.choose_to_discard_cards(boat)
+        if option == "Discard":
+            while available_cards:
+                card = GameView.get_card_to_discard(boat, available_cards)
+                if card == "Done":
+                    break
+
+                available_cards.remove(card)
+                cards_selected.append(card)
+        return cards_selected
+
+    def motivation(self, boat, boat_ahead):
+        if boat.is_npc:
+            return super().motivation(boat, boat_ahead)
+
+        option = GameView.choose_motivation(boat, boat_ahead)
+        return option == "Activate Motivation (+2 Spaces, Cost 1 Stamina)"
+
+
+class ViewEvents(NullEvents):
+    """
+    Show the race events on the game view.
+    Faster speeds summarise NPC turns and bonuses without asking to continue, human turns always wait.
+    """
+    def __init__(self, speed = "Real time"):
+        self.message_delay, self.screen_delay = SPEEDS[speed]
+
+    def delay(self, boat):
+        """Seconds a message about this boat stays on screen, None to wait for the player."""
+        return None if not boat.is_npc else self.message_delay
+
+    def turn_started(self, boat):
+        # The result of the turn is enough for NPCs at faster speeds
+        if boat.is_npc and self.message_delay is not None:
+            return
+        GameView.show_player_turn(boat)
+
+    def turn_event(self, boat, event):
+        GameView.show_event(boat, event, self.delay(boat))
+
+    def turn_finished(self, boat, status, split_loc):
+        GameView.show_event(boat, status, self.delay(boat))
+
+    def bonus(self, boats, event):
+        # Human players already chose their motivation on screen
+        if event == "motivation" and not boats[0].is_npc:
+            return
+        GameView.show_bonus([b.name for b in boats], event, self.message_delay)
+
+    def round_finished(self, boats):
+        GameView.render_game_screen(boats, "Leaderboard", self.screen_delay)
+
+    def race_finished(self, boats):
+        # The podium stays as long as in real time, a key press skips it
+        GameView.render_game_screen(boats, "Podium", SPEEDS["Real time"][1])
 
 
 class GameController:
     """Manages the main game flow and round mechanics."""
-    def __init__(self, chosen_colors):
+    def __init__(self, chosen_colors, seed = None, difficulty = "Normal", rules = DEFAULT_RULES, speed = "Real time", log_path = None, autosave_path = None, save = None):
         """
-        Create boats and start game
+        Create boats and start game.
+        The race can be played again with the same seed and rules.
+        The speed ("Real time", "Fast" or "Instant") sets how long NPC turns and screens are shown.
+        With a log path the race is recorded for src/engine/race_log.py replays.
+        With an autosave path the race is saved after every round, and a save (src/engine/race_save.py) resumes it.
         """
-        self.game_running = True
-        self.boats = GameLogic.create_boat(chosen_colors)
+        self.seed = seed if seed is not None else new_seed()
+        self.rules = rules
+        self.speed = speed
+        self.boats = GameLogic.create_boat(chosen_colors, race_rng(self.seed), rules)
+        if save is not None:
+            save.restore(self.boats)
+        events = ViewEvents(speed)
+        if log_path is not None:
+            events = RaceRecorder(log_path, self.seed, chosen_colors, self.boats, events)
+        if autosave_path is not None:
+            settings = {"chosen_colors": list(chosen_colors), "seed": self.seed, "difficulty": difficulty, "speed": speed, "turn_time": None}
+            events = AutoSave(autosave_path, settings, self.boats, events, save.rounds if save is not None else 0)
+        self.engine = RaceEngine(self.boats, PlayerDecisions(difficulty = difficulty, seed = self.seed), events)
+        if save is not None:
+            # Saves are taken before the finish line check of their round
+            self.engine.check_finish_line()
 
-    def apply_bonuses(self):
-        """
-        Apply change of tides and motivation bonus to respective players
-        """
-        sorted_boats = sorted(
-            self.boats, 
-            key=lambda x: (x.position, x.stroke_rate), 
-            reverse=True
-        )
-
-        if len(sorted_boats) >= 2:
-            # Change of Tides bonus
-            affected = []
-            for b in [sorted_boats[-1], sorted_boats[-2]]:
-                if b.caught_crab or b.finished:
-                    continue
-                
-                GameLogic.change_tides_bonus(b)
-                affected.append(b.name)
-            
-            if len(affected) == 2:
-                GameView.show_bonus(affected, "change_2")
-            elif len(affected) == 1:
-                GameView.show_bonus(affected, "change_1")
-            else:
-                GameView.show_bonus(affected, "change_0")
-
-            for i in range(1, len(sorted_boats)):
-                current_boat = sorted_boats[i]
-                boat_ahead = sorted_boats[i-1]
-                
-                if boat_ahead.finished or current_boat.finished or current_boat.penalized or current_boat.caught_crab:
-                    continue
-
-                if GameLogic.can_use_motivation(current_boat, boat_ahead):
-                    if not current_boat.is_npc:
-                        option = GameView.choose_motivation(current_boat, boat_ahead)
-
-                        if option == "Activate Motivation (+2 Spaces, Cost 1 Stamina)":
-                            GameLogic.pay_stamina_cards(current_boat, 1)
-                            GameLogic.motivation_bonus(current_boat)
-
-                    else:
-                        use_motivation = NPCLogic.choose_motivation(current_boat)
-                        if use_motivation == "use":
-                            GameLogic.pay_stamina_cards(current_boat, 1)
-                            GameLogic.motivation_bonus(current_boat)
-
-                            boats = [current_boat.name, boat_ahead.name]
-                            GameView.show_bonus(boats, "motivation")
-
-    def check_finish_line(self):
-        """
-        Detect if any boat has finished the race. 
-        If all boats have finished the race end game.
-        """
-        for b in self.boats:
-            if b.position >= VENUE_LENGTH:
-                b.finished = True
-        
-        if all(b.finished for b in self.boats):
-            self.game_running = False
-            GameView.render_game_screen(self.boats, "Podium")
-    
     def run_game(self):
         """
         Control and start game rounds structure:
@@ -85,95 +124,5 @@ class GameController:
         3. Advance boat
         4. Replenish hand
         """
-        GameView.render_game_screen(self.boats)
-        while self.game_running:
-            # ------ INDIVIDUAL PHASE ------
-            for b in self.boats:
-                if b.finished:
-                    continue
-                
-                b.caught_crab = False
-                b.penalized = False
-                GameLogic.draw_cards(b)
-                GameView.show_player_turn(b)
-
-                if GameLogic.check_clustered_hand(b):
-                    GameView.show_event(b, "clustered")
-                    GameLogic.replenish_hand(b)
-                    continue
-
-                # Stroke Rate Phase
-                exhaustion_status = GameLogic.check_stamina(b)
-                if exhaustion_status == "ok":
-                    if not b.is_npc:
-                        rate_choice = GameView.get_sroke_rate(b)
-                        result = GameLogic.change_stroke_rate(b, rate_choice)
-                    else:
-                        rate_choice = NPCLogic.choose_stroke_rate(b)
-                        result = GameLogic.change_stroke_rate(b, rate_choice)
-
-                    if result == "failed":
-                            GameView.show_event(b, "failed")
-                else:
-                    GameView.show_event(b, "no stamina")
-
-                # Play cards
-                cards_selected = []
-                available_cards, cards_needed = GameLogic.get_playable_cards(b)
-
-                if not b.is_npc:
-                    while len(cards_selected) < cards_needed:
-                        for _ in range(cards_needed):
-                            card = GameView.get_card_to_play(b, available_cards, cards_selected, cards_needed)
-                            available_cards.remove(card)
-                            cards_selected.append(card)
-                else:
-                    cards = NPCLogic.choose_cards(b)
-                    cards_selected = cards[:cards_needed]
-
-                # Movement and Split Limtis
-                movement= GameLogic.calculate_movement(b, cards_selected)
-                status, inf = GameLogic.check_split_limit(b, movement, SPLITS)
-
-                if status == "passed":
-                    GameLogic.apply_movement(b, movement)
-                elif status == "tired":
-                    GameLogic.apply_movement(b, movement)
-                    GameLogic.pay_stamina_cards(b, inf)
-                else:
-                    GameLogic.apply_crab(b, inf)
-
-                # Optional cards discard
-                cards_selected = []
-                available_cards, _ = GameLogic.get_playable_cards(b)
-
-                if not b.is_npc:
-                    option = GameView.choose_to_discard_cards(b)
-
-                    if option == "Discard":
-                        while True:
-                            if not available_cards:
-                                break
-                            
-                            card = GameView.get_card_to_discard(b, available_cards)
-                            if card == "Done":
-                                break
-                            
-                            available_cards.remove(card)
-                            cards_selected.append(card)
-
-                if cards_selected:
-                    GameLogic.discard_cards(b, cards_selected)
-                
-                # Replenish hand
-                GameLogic.replenish_hand(b)
-
-                b.round += 1
-
-                # Display results
-                GameView.show_event(b, status)
-            
-            # ------ END OF ROUND BONUSES ------
-            self.apply_bonuses()
-            GameView.render_game_screen(self.boats, "Leaderboard")
-            self.check_finish_line()
\ No newline at end of file
+        GameView.render_game_screen(self.boats, delay = SPEEDS[self.speed][1])
+        self.engine.run()
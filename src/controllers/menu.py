@@ -1,7 +1,9 @@
-from src.interface.interaction import interactive_selection
-from src.interface.draw import clear_screen, draw_header
-from src.engine.constants import COLORS
+from src.interface.interaction import interactive_selection, get_key
+from src.interface.draw import clear_screen, show_screen, draw_header
+from src.interface.renderer import screen
+from src.engine.constants import COLORS, DIFFICULTIES, SPEEDS, TURN_TIMES
 from src.engine.content import ContentManager
+from src.engine.race_save import RaceSave, AUTOSAVE_PATH
 
 class MenuController:
     @staticmethod
@@ -24,7 +26,34 @@ class MenuController:
             chosen_colors.append(selection)
             available_colors.remove(selection)
         return chosen_colors
+
+    @staticmethod
+    def select_difficulty():
+        """
+        Choose how the NPCs race.
+        """
+        options = list(DIFFICULTIES)
+        choice_idx = interactive_selection(options, "vertical", "NPC Difficulty:")
+        return options[choice_idx]
+
+    @staticmethod
+    def select_speed():
+        """
+        Choose how fast NPC turns are shown.
+        """
+        options = list(SPEEDS.keys())
+        choice_idx = interactive_selection(options, "vertical", "Race Speed:")
+        return options[choice_idx]
     
+    @staticmethod
+    def select_turn_time():
+        """
+        Choose the time limit of human turns.
+        """
+        options = list(TURN_TIMES.keys())
+        choice_idx = interactive_selection(options, "vertical", "Turn Timer:")
+        return TURN_TIMES[options[choice_idx]]
+
     @staticmethod
     def show_rules(rules: dict):
         """
@@ -40,9 +69,12 @@ class MenuController:
 
             clear_screen()
             draw_header(f"Rule: {selection}")
-            print("\n" + rules[selection])
-            print("\n" + ("-" * 30))
-            input("Enter to return...")
+            screen.print("\n" + rules[selection])
+            screen.print("\n" + ("-" * 30))
+            screen.print("Enter to return...")
+            show_screen()
+            while get_key("vertical") != "enter":
+                pass
 
     @staticmethod
     def show_credits(credits):
@@ -53,12 +85,15 @@ class MenuController:
         draw_header("Credits")
         
         if credits:
-            print(credits)
+            screen.print(credits)
         else:
-            print("\n[Error] Credits file (assets/credits.txt) not found.")
+            screen.print("\n[Error] Credits file (assets/credits.txt) not found.")
         
-        print("\n" + ("-" * 30))
-        input("Enter to return...")
+        screen.print("\n" + ("-" * 30))
+        screen.print("Enter to return...")
+        show_screen()
+        while get_key("vertical") != "enter":
+            pass
 
     @staticmethod
     def run_menu():
@@ -66,13 +101,24 @@ class MenuController:
         Main Menu Loop.
         """
         while True:
+            # A race left before the end can be resumed from its last round
+            save = RaceSave.load(AUTOSAVE_PATH)
             options = ["Start Race", "Rules", "Credits", "Exit"]
+            if save is not None:
+                options.insert(1, "Resume Race")
             choice_idx = interactive_selection(options, "vertical", "Redline Regatta")
             selection = options[choice_idx]
 
-            if selection == "Start Race":
-                colors = MenuController.select_colors()
-                return "Start", colors
+            if selection == "Resume Race":
+                return "Start", {**save.settings, "rules": save.rules, "save": save}
+            elif selection == "Start Race":
+                settings = {"chosen_colors": MenuController.select_colors()}
+                if len(settings["chosen_colors"]) < 6:
+                    settings["difficulty"] = MenuController.select_difficulty()
+                    settings["speed"] = MenuController.select_speed()
+                if settings["chosen_colors"]:
+                    settings["turn_time"] = MenuController.select_turn_time()
+                return "Start", settings
             elif selection == "Rules":
                 rules = ContentManager.get_rules()
                 MenuController.show_rules(rules)
@@ -80,4 +126,4 @@ class MenuController:
                 credits = ContentManager.get_credits()
                 MenuController.show_credits(credits)
             elif selection == "Exit":
-                return "Exit", []
\ No newline at end of file
+                return "Exit", {}
\ No newline at end of file
@@ -1,13 +1,27 @@
 import random
-from src.engine.constants import PACE_CARDS, INSTABILITY_CARDS, STAMINA_CARDS
+from array import array
+from src.engine.constants import INSTABILITY, STAMINA
+from src.engine.deck import Deck
+from src.engine.rules import DEFAULT_RULES
 
 class Boat:
-    def __init__(self, name, color, lane, is_npc = False):
+    # Sweeps create millions of boats, keep them small
+    __slots__ = (
+        "name", "color", "lane", "is_npc",
+        "round", "position", "stroke_rate", "caught_crab", "penalized", "finished",
+        "deck", "hand", "hand_counts", "stamina_pile", "rng", "rules"
+    )
+
+    def __init__(self, name, color, lane, is_npc = False, rng = None, rules = DEFAULT_RULES):
         self.name = name
         self.color = color
         self.lane = lane
         self.is_npc = is_npc
 
+        # Random stream of the race, shared by deck, NPC and bonus logic
+        self.rng = rng if rng is not None else random.Random()
+        self.rules = rules
+
         # ------ MOVEMENT ------
         self.round = 0
         self.position = 0
@@ -16,10 +30,74 @@ class Boat:
         self.penalized = False
         self.finished = False
 
-        # ------ CARDS ------        
-        self.draw_pile = (PACE_CARDS + INSTABILITY_CARDS).copy()
-        random.shuffle(self.draw_pile)
+        # ------ CARDS ------
+        # Piles are arrays of card codes (see CARD_FACES), the hand is kept in draw order
+        self.deck = Deck(rules.deck, self.rng)
+        self.hand = array("b")
+        # Number of cards of every code in the hand, kept up to date by the hand methods below
+        self.hand_counts = array("b", bytes(STAMINA + 1))
+        self.stamina_pile = array("b", [STAMINA]) * rules.stamina_cards
+
+    # ------ HAND ------
+    # Every change of the hand goes through these methods, so its counts never need a rescan
+    def add_card(self, card):
+        self.hand.append(card)
+        self.hand_counts[card] += 1
+
+    def remove_card(self, card):
+        self.hand.remove(card)
+        self.hand_counts[card] -= 1
+
+    def set_hand(self, cards):
+        """
+        Replace the whole hand, like when restoring a saved state.
+        """
+        self.hand = array("b", cards)
+        self.hand_counts = array("b", bytes(STAMINA + 1))
+        for card in self.hand:
+            self.hand_counts[card] += 1
+
+    @property
+    def playable_count(self):
+        """
+        Number of cards of the hand that can be played, every card but stamina cards.
+        """
+        return len(self.hand) - self.hand_counts[STAMINA]
+
+    def playable_cards(self):
+        """
+        Playable cards of the hand in card order.
+        """
+        counts = self.hand_counts
+        return [1] * counts[1] + [2] * counts[2] + [3] * counts[3] + [INSTABILITY] * counts[INSTABILITY]
+
+    def sorted_hand(self):
+        """
+        Hand in display order: pace cards, instability cards and stamina cards.
+        """
+        return self.playable_cards() + [STAMINA] * self.hand_counts[STAMINA]
+
+    # ------ SNAPSHOTS ------
+    def snapshot(self):
+        """
+        Race state of the boat as a flat tuple of immutable values, piles included.
+        Restoring it rebuilds the piles from bytes, nothing is deep copied.
+        """
+        return (self.round, self.position, self.stroke_rate, self.caught_crab, self.penalized, self.finished,
+                self.hand.tobytes(), self.hand_counts.tobytes(), len(self.stamina_pile), self.deck.snapshot())
+
+    def restore(self, state):
+        (self.round, self.position, self.stroke_rate, self.caught_crab, self.penalized, self.finished,
+         hand, hand_counts, stamina, deck) = state
+        self.hand = array("b", hand)
+        self.hand_counts = array("b", hand_counts)
+        self.stamina_pile = array("b", [STAMINA]) * stamina
+        self.deck.restore(deck)
+
+    @property
+    def draw_pile(self):
+        return self.deck.draw_pile
 
-        self.hand = []
-        self.discard_pile = []
-        self.stamina_pile = STAMINA_CARDS.copy()
+    @property
+    def discard_pile(self):
+        return self.deck.discard_pile
@@ -14,9 +14,14 @@ COLORS = {
 LANES = [1,2,3,4,5,6]
 
 # ------------ CARDS CONSTANTS ------------
+# Cards are small integers: pace cards are their value, instability and stamina cards have their own code
+INSTABILITY = 4
+STAMINA = 5
+CARD_FACES = {1: 1, 2: 2, 3: 3, INSTABILITY: "i", STAMINA: "s"}
+
 PACE_CARDS = [1,1,1,1,1,1,2,2,2,2,3,3]
-INSTABILITY_CARDS = ["i","i","i"]
-STAMINA_CARDS = ["s","s","s","s","s","s","s"]
+INSTABILITY_CARDS = [INSTABILITY] * 3
+STAMINA_CARDS = [STAMINA] * 7
 HAND_LIMIT = 7
 
 # ------------ STROKE RATE CONSTANTS ------------
@@ -43,3 +48,23 @@ AGGRESSION_PROFILES = {
     75: 0.40,
     85: 0.85
 }
+
+# ------------ NPC DIFFICULTIES ------------
+DIFFICULTIES = ("Normal", "Expert", "Master")
+
+# ------------ SPECTATOR SPEEDS ------------
+# Seconds NPC messages and the race screen stay on screen, None waits for "Continue"
+SPEEDS = {
+    "Real time": (None, 5),
+    "Fast": (0.8, 1.5),
+    "Instant": (0, 0)
+}
+
+# ------------ TURN TIMERS ------------
+# Seconds human players have for each turn, the NPC logic finishes the turn when they run out
+TURN_TIMES = {
+    "No limit": None,
+    "60 seconds": 60,
+    "30 seconds": 30,
+    "15 seconds": 15
+}
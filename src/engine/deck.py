@@ -0,0 +1,79 @@
+from array import array
+from src.engine.constants import STAMINA
+
+class Deck:
+    """
+    Draw and discard piles of a boat.
+    Cards are drawn from a random spot of the draw pile and the last card fills the gap, so every draw is O(1).
+    When the draw pile runs out the discard pile becomes the draw pile, without copying or shuffling it.
+    The number of cards of every code in each pile is kept with the piles.
+    """
+    __slots__ = ("draw_pile", "discard_pile", "draw_counts", "discard_counts", "rng")
+
+    def __init__(self, cards, rng):
+        self.rng = rng
+        self.set_piles(cards, [])
+
+    def set_piles(self, draw, discard):
+        """
+        Replace both piles, keeping their order.
+        """
+        self.draw_pile = array("b", draw)
+        self.discard_pile = array("b", discard)
+        self.draw_counts = array("h", bytes(2 * (STAMINA + 1)))
+        self.discard_counts = array("h", bytes(2 * (STAMINA + 1)))
+        for card in self.draw_pile:
+            self.draw_counts[card] += 1
+        for card in self.discard_pile:
+            self.discard_counts[card] += 1
+
+    def snapshot(self):
+        """
+        Both piles and their counts as bytes, cheap to keep and to restore.
+        """
+        return self.draw_pile.tobytes(), self.discard_pile.tobytes(), self.draw_counts.tobytes(), self.discard_counts.tobytes()
+
+    def restore(self, state):
+        draw, discard, draw_counts, discard_counts = state
+        self.draw_pile = array("b", draw)
+        self.discard_pile = array("b", discard)
+        self.draw_counts = array("h", draw_counts)
+        self.discard_counts = array("h", discard_counts)
+
+    def __len__(self):
+        return len(self.draw_pile) + len(self.discard_pile)
+
+    def draw(self):
+        """
+        Draw a random card from the draw pile, reshuffling the discard pile if needed.
+        Returns None if both piles are empty.
+        """
+        pile = self.draw_pile
+        if not pile:
+            if not self.discard_pile:
+                return None
+            self.draw_pile, self.discard_pile = self.discard_pile, pile
+            self.draw_counts, self.discard_counts = self.discard_counts, self.draw_counts
+            pile = self.draw_pile
+
+        i = self.rng.randrange(len(pile))
+        card = pile[i]
+        pile[i] = pile[-1]
+        pile.pop()
+        self.draw_counts[card] -= 1
+        return card
+
+    def discard(self, card):
+        """
+        Put a card on the discard pile.
+        """
+        self.discard_pile.append(card)
+        self.discard_counts[card] += 1
+
+    def discard_many(self, cards):
+        """
+        Put several cards on the discard pile.
+        """
+        self.discard_pile.extend(cards)
+        for card in cards:
+            self.discard_counts[card] += 1
@@ -0,0 +1,83 @@
+from array import array
+from functools import lru_cache
+from src.engine.constants import INSTABILITY
+
+# Value NPCs give to each card code, instability cards are estimated at 2
+NPC_VALUES = (0, 1, 2, 3, 2, 0)
+
+class HandTable:
+    """
+    Every playable hand evaluated once: the NPC play order of its cards and the estimated speed at every stroke rate.
+    A hand key packs the count of each playable card type in a few bits, stamina cards don't count.
+    """
+    __slots__ = ("bits", "card_keys", "cards_per_rate", "best_plays", "speeds", "keys", "index")
+
+    def __init__(self, hand_limit, cards_per_rate):
+        self.bits = max(3, hand_limit.bit_length())
+        self.card_keys = (0, 1, 1 << self.bits, 1 << 2 * self.bits, 1 << 3 * self.bits, 0)
+        self.cards_per_rate = tuple(cards_per_rate)
+
+        size = 1 << 4 * self.bits
+        best_plays = [()] * size
+        speeds = bytearray(size * len(self.cards_per_rate))
+        keys = []
+
+        for ones in range(hand_limit + 1):
+            for twos in range(hand_limit + 1 - ones):
+                for threes in range(hand_limit + 1 - ones - twos):
+                    for instability in range(hand_limit + 1 - ones - twos - threes):
+                        playable = [1] * ones + [2] * twos + [3] * threes + [INSTABILITY] * instability
+                        playable.sort(key=lambda x: NPC_VALUES[x], reverse=True)
+                        key = self.key(playable)
+                        keys.append(key)
+
+                        best_plays[key] = tuple(playable)
+                        for rate, needed in enumerate(self.cards_per_rate):
+                            if len(playable) >= needed:
+                                speeds[key * len(self.cards_per_rate) + rate] = sum(NPC_VALUES[c] for c in playable[:needed])
+
+        # Read-only once built, shared by forked worker processes
+        self.best_plays = tuple(best_plays)
+        self.speeds = bytes(speeds)
+        self.keys = tuple(keys)
+
+        # Dense index of every valid hand key, -1 for unused keys
+        self.index = array("i", [-1]) * size
+        for i, key in enumerate(self.keys):
+            self.index[key] = i
+
+    def key(self, hand):
+        """
+        Key of the playable cards multiset of a hand.
+        """
+        card_keys = self.card_keys
+        key = 0
+        for c in hand:
+            key += card_keys[c]
+        return key
+
+    def counts_key(self, counts):
+        """
+        Same key from the card counts of a hand, without scanning it.
+        """
+        bits = self.bits
+        return counts[1] + (counts[2] << bits) + (counts[3] << 2 * bits) + (counts[INSTABILITY] << 3 * bits)
+
+    def plays(self, key):
+        """
+        Playable cards of a hand, in the order NPCs play them.
+        """
+        return self.best_plays[key]
+
+    def estimated_speed(self, key, rate):
+        """
+        Estimated movement of the best play at a stroke rate, 0 if the hand can't play enough cards.
+        """
+        return self.speeds[key * len(self.cards_per_rate) + rate]
+
+@lru_cache(maxsize=None)
+def hand_table(hand_limit, cards_per_rate):
+    """
+    Hand table shared by every rule set with the same hand limit and stroke rates.
+    """
+    return HandTable(hand_limit, cards_per_rate)
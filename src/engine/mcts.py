@@ -0,0 +1,222 @@
+import itertools
+import math
+import random
+import time
+from src.engine.rng import race_rng
+from src.engine.race_logic import GameLogic
+from src.engine.npc_logic import NPCLogic
+from src.engine.race_engine import RaceEngine, NPCDecisions
+from src.engine.boat import Boat
+
+# Seconds a search can take for one choice, short enough not to be noticed in an interactive turn
+SEARCH_BUDGET = 0.05
+# UCB1 exploration weight, rewards are between 0 and 1
+EXPLORATION = 0.7
+
+
+class Node:
+    """
+    Choice of the searching boat in the tree, with the rewards of the playouts that went through it.
+    Children are keyed by (phase, choice): with chance in between, the next choice is not always of the same phase.
+    """
+    __slots__ = ("visits", "reward", "children")
+
+    def __init__(self):
+        self.visits = 0
+        self.reward = 0.0
+        self.children = {}
+
+
+class TreePolicy(NPCDecisions):
+    """
+    Choices of one playout: the searching boat follows the tree while every choice on its path was tried,
+    adds one new choice and then plays like every other boat, with the NPC choices.
+    """
+    def __init__(self, search, lane):
+        super().__init__()
+        self.tree_search = search
+        self.lane = lane
+        self.node = None
+        self.path = []
+
+    def start(self, root):
+        self.node = root
+        self.path = [root]
+
+    def select(self, phase, choices):
+        """
+        Choice of the searching boat at the current node: an untried one if any, else the best UCB1 one.
+        """
+        node = self.node
+        children = node.children
+        untried = [c for c in choices if (phase, c) not in children]
+        if untried:
+            choice = untried[self.tree_search.rng.randrange(len(untried))]
+            child = children[(phase, choice)] = Node()
+            # Out of the tree, the rest of the playout uses the NPC choices
+            self.node = None
+        else:
+            log_visits = math.log(node.visits)
+            choice = max(choices, key=lambda c: TreeSearch.ucb(children[(phase, c)], log_visits))
+            child = self.node = children[(phase, choice)]
+        self.path.append(child)
+        return choice
+
+    def in_tree(self, boat):
+        return self.node is not None and boat.lane == self.lane
+
+    def stroke_rate(self, boat: Boat):
+        if self.in_tree(boat):
+            return self.select("rate", TreeSearch.rate_choices(boat))
+        return super().stroke_rate(boat)
+
+    def cards_to_play(self, boat: Boat, available_cards: list, cards_needed: int):
+        if self.in_tree(boat):
+            return list(self.select("cards", TreeSearch.card_choices(available_cards, cards_needed)))
+        return super().cards_to_play(boat, available_cards, cards_needed)
+
+    def motivation(self, boat: Boat, boat_ahead: Boat):
+        if self.in_tree(boat):
+            return self.select("motivation", (True, False))
+        return super().motivation(boat, boat_ahead)
+
+
+class SearchEngine(RaceEngine):
+    """
+    Engine of the playouts: plays the rest of a race from a choice taken in the middle of a turn or bonus phase.
+    It runs on the boats of the real race, the search restores them afterwards.
+    """
+    def resume(self, boat, phase, choice, bonus_order):
+        """
+        Apply a choice of a boat, then play the race to the end.
+        """
+        self.running = True
+        self.drive(self.resumed_steps(boat, phase, choice, bonus_order))
+        self.run()
+
+    def resumed_steps(self, boat, phase, choice, bonus_order):
+        """
+        Steps of the rest of the round after the choice, the RaceEngine steps taken up where the choice was asked.
+        """
+        if phase == "motivation":
+            i = bonus_order.index(boat)
+            if choice:
+                self.apply_motivation(boat, bonus_order[i - 1])
+            yield from self.motivation_steps(bonus_order, i + 1)
+            self.finish_round()
+            return
+
+        if phase == "rate":
+            yield from self.turn_steps(boat, rate = choice)
+        else:
+            yield from self.turn_steps(boat, cards_selected = choice)
+        yield from self.round_steps(self.boats.index(boat) + 1)
+
+
+class TreeSearch:
+    """
+    Open loop Monte Carlo tree search of the choices of a boat.
+    Every playout restores the race state, takes a choice, plays the race to the end and scores the finish place.
+    Deck draws are random in every playout, so the tree keeps choice sequences and not race states.
+    Playouts use their own random stream, of the race seed when given, the race stream is left as it was.
+    A search stops at its time budget, or after a number of playouts when one is given: only then the number
+    of playouts, and so the choices, don't depend on the speed of the machine.
+    """
+    def __init__(self, budget = SEARCH_BUDGET, playouts = None, seed = None, race_index = 0):
+        self.budget = budget
+        self.playouts = playouts
+        self.rng = race_rng(seed, race_index, "search") if seed is not None else random.Random()
+        # Totals of every search, for profiling
+        self.searches = 0
+        self.total_playouts = 0
+        self.total_depth = 0
+        self.max_depth = 0
+
+    # ------ CHOICES ------
+    @staticmethod
+    def rate_choices(boat: Boat):
+        return tuple(boat.rules.rates)
+
+    @staticmethod
+    def card_choices(available_cards: list, cards_needed: int):
+        """
+        Every different selection of the cards to play, as sorted tuples.
+        """
+        count = min(cards_needed, len(available_cards))
+        return sorted(set(itertools.combinations(sorted(available_cards), count)))
+
+    # Without any playout in the budget, the NPC choice is taken
+    def stroke_rate(self, engine, boat: Boat):
+        choice = self.search(engine, boat, "rate", self.rate_choices(boat))
+        return choice if choice is not None else NPCLogic.choose_stroke_rate(boat)
+
+    def cards_to_play(self, engine, boat: Boat, available_cards: list, cards_needed: int):
+        choice = self.search(engine, boat, "cards", self.card_choices(available_cards, cards_needed))
+        return list(choice) if choice is not None else NPCLogic.choose_cards(boat)[:cards_needed]
+
+    def motivation(self, engine, boat: Boat):
+        choice = self.search(engine, boat, "motivation", (True, False))
+        return choice if choice is not None else NPCLogic.choose_motivation(boat) == "use"
+
+    # ------ SEARCH ------
+    @staticmethod
+    def ucb(node, log_visits):
+        return node.reward / node.visits + EXPLORATION * math.sqrt(log_visits / node.visits)
+
+    @staticmethod
+    def reward(boats, boat):
+        """
+        1 for the first place, 0 for the last one, with the podium order.
+        """
+        ranking = sorted(boats, key=lambda x: (x.round, -x.position, -x.stroke_rate))
+        return 1 - ranking.index(boat) / max(1, len(boats) - 1)
+
+    def search(self, engine, boat, phase, choices):
+        """
+        Most visited choice after the playouts, the only choice without searching, None if no playout ran.
+        """
+        if len(choices) == 1:
+            return choices[0]
+
+        boats = engine.boats
+        state = engine.snapshot()
+        streams = [(b.rng, b.deck.rng) for b in boats]
+        for b in boats:
+            b.rng = b.deck.rng = self.rng
+
+        root = Node()
+        policy = TreePolicy(self, boat.lane)
+        playout_engine = SearchEngine(boats, policy)
+        if self.playouts is not None:
+            limit, deadline = self.playouts, math.inf
+        else:
+            limit, deadline = math.inf, time.perf_counter() + self.budget
+        playouts = 0
+        depth = 0
+        try:
+            while playouts < limit and time.perf_counter() < deadline:
+                playout_engine.restore(state)
+                policy.start(root)
+                choice = policy.select(phase, choices)
+                playout_engine.resume(boat, phase, choice, engine.bonus_order)
+
+                reward = self.reward(boats, boat)
+                for node in policy.path:
+                    node.visits += 1
+                    node.reward += reward
+                playouts += 1
+                depth = max(depth, len(policy.path) - 1)
+        finally:
+            engine.restore(state)
+            for b, (rng, deck_rng) in zip(boats, streams):
+                b.rng, b.deck.rng = rng, deck_rng
+
+        self.searches += 1
+        self.total_playouts += playouts
+        self.total_depth += depth
+        self.max_depth = max(self.max_depth, depth)
+
+        visited = [c for c in choices if (phase, c) in root.children]
+        if not visited:
+            return None
+        return max(visited, key=lambda c: root.children[(phase, c)].visits)
@@ -1,5 +1,5 @@
-import random
-from src.engine.constants import SPLITS, AGGRESSION_PROFILES
+from src.engine.constants import STAMINA
+from src.engine.npc_policy import get_policy
 from src.engine.boat import Boat
 
 class NPCLogic:
@@ -8,106 +8,110 @@ class NPCLogic:
         """
         Picks the best cards to play from the hand.
         """
-        playable = [c for c in boat.hand if c != 's']
-        playable.sort(
-            key=lambda x: (x if isinstance(x, int) else 2),
-            reverse=True
-        )
-        return playable
+        table = boat.rules.hand_table
+        return list(table.plays(table.counts_key(boat.hand_counts)))
     
     @staticmethod
     def calculate_speed_for_rate(boat: Boat, rate):
         """
         Estimates total movement value of a card selection.
         """
-        rate_map = {2: 4, 1: 2, 0: 1}
-        needed = rate_map[rate]
-        playable_cards = NPCLogic.choose_cards(boat)
-
-        if len(playable_cards) < needed:
-            return 0
-        
-        cards_to_play = playable_cards[:needed]
-        return sum([(c if isinstance(c, int) else 2) for c in cards_to_play])
+        table = boat.rules.hand_table
+        return table.estimated_speed(table.counts_key(boat.hand_counts), rate)
     
     @staticmethod
-    def detect_pace_limits(boat: Boat, est_speed, limit = SPLITS):
+    def detect_pace_limits(boat: Boat, est_speed):
         """
         Checks if the estimated speed will cross a split line.
         """
         # Check Place Limits
-        next_pos = boat.position + est_speed
-        next_limit_pace = None
-        next_limit_loc = None
-        for limit_loc, limit_pace in limit.items():
-            if boat.position < limit_loc <= next_pos:
-                next_limit_loc = limit_loc
-                next_limit_pace = limit_pace
-                break
-        return next_limit_loc, next_limit_pace
+        rules = boat.rules
+        i = rules.first_split(boat.position, est_speed)
+        if i is None:
+            return None, None
+        return rules.split_locs[i], rules.split_limits[i]
 
     @staticmethod
-    def choose_stroke_rate(boat: Boat, limit = SPLITS):
+    def choose_stroke_rate(boat: Boat, aggression = None):
         """
         Decides the target stroke rate based on stamina, hand state, and course position.
+        Aggression is the chance to risk every split, in split order, the rules split_aggression if not given.
         """
         # Low Stamina Checks
         stamina_count = len(boat.stamina_pile)
         if stamina_count == 0:
             return 0
         
-        if boat.hand.count("s") >= 1 and stamina_count < 3:
+        if boat.hand_counts[STAMINA] >= 1 and stamina_count < 3:
             return 0
         
         # Determine opotions
+        rules = boat.rules
+        table = rules.hand_table
+        key = table.counts_key(boat.hand_counts)
         best_safe_rate = 0
         best_risky_rate = 0
-        risky_limit_loc = None
+        risky_split = None
 
-        for rate in [2,1,0]:
-            est_speed = NPCLogic.calculate_speed_for_rate(boat, rate)
+        for rate in reversed(rules.rates):
+            est_speed = table.estimated_speed(key, rate)
             if est_speed == 0 and rate > 0: 
                 continue
             
             # Risk assesment
-            next_limit_loc, next_limit_pace = NPCLogic.detect_pace_limits(boat, est_speed, limit)
-            if next_limit_pace is None or est_speed <= next_limit_pace:
+            split = rules.first_split(boat.position, est_speed)
+            if split is None or est_speed <= rules.split_limits[split]:
                 if rate > best_safe_rate:
                     best_safe_rate = rate
             else:
-                cost = max(1, int(est_speed - next_limit_pace))
+                cost = max(1, int(est_speed - rules.split_limits[split]))
                 safety_buffer = 2 if boat.position < 80 else 0
                 if (stamina_count - cost) < safety_buffer:
                     continue
 
                 if rate > best_risky_rate:
                     best_risky_rate = rate
-                    risky_limit_loc = next_limit_loc
+                    risky_split = split
             
         # Make decision
         if best_risky_rate <= best_safe_rate:
             return best_safe_rate
         
         # Get the aggression probability for this specific limit
-        base_prob = AGGRESSION_PROFILES.get(risky_limit_loc, 0.40)
+        base_prob = (aggression or rules.split_aggression)[risky_split]
 
         # Be more careful if stamina is getting low
         stamina_factor = 1.0 if stamina_count >= 4 else 0.6
         final_prob = base_prob * stamina_factor
 
         # Roll the dice ONCE
-        if random.random() < final_prob:
+        if boat.rng.random() < final_prob:
             return best_risky_rate
 
         return best_safe_rate
     
     @staticmethod
-    def choose_motivation(boat: Boat):
+    def choose_expert_stroke_rate(boat: Boat, aggression = None):
+        """
+        Looks up the stroke rate of the policy solved offline (see analysis/npc_policy.py).
+        Falls back to the normal choice if there is no policy for these rules.
+        """
+        policy = get_policy()
+        if policy is not None and policy.matches(boat.rules):
+            key = boat.rules.hand_table.counts_key(boat.hand_counts)
+            rate = policy.stroke_rate(boat.position, boat.stroke_rate, len(boat.stamina_pile), key)
+            if rate is not None:
+                return rate
+        return NPCLogic.choose_stroke_rate(boat, aggression)
+
+    @staticmethod
+    def choose_motivation(boat: Boat, thresholds = (1, 4), chance = 0.50):
         """
         Choose to use Motivation bonus if near the end of the race or have plenty of energy.
+        Thresholds are the stamina needed past position 80 and before it.
         """
-        threshold = 1 if boat.position > 80 else 4
+        threshold = thresholds[0] if boat.position > 80 else thresholds[1]
         if len(boat.stamina_pile) >= threshold:
-            if random.random() < 0.50:
+            if boat.rng.random() < chance:
                 return "use"
         return "no"
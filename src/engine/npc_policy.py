@@ -0,0 +1,100 @@
+import json
+import os
+import struct
+import zlib
+from config import ASSETS_DIR
+from src.engine.rules import RuleSet, DEFAULT_RULES
+
+POLICY_PATH = os.path.join(ASSETS_DIR, "npc_policy.bin")
+
+# File format: magic, version, length of the JSON rules header, the header, then the zlib compressed actions
+MAGIC = b"RRPOLICY"
+VERSION = 2
+HEADER = struct.Struct("<HI")
+
+# Rules a policy depends on, other rules (aggression, lanes...) don't change the solved turn model
+POLICY_RULES = ("venue_length", "splits", "pace_cards", "instability_cards", "stamina_cards", "hand_limit", "cards_per_rate", "crab_penalty")
+
+class PolicyTable:
+    """
+    Best stroke rate for every abstract boat state: position, stroke rate, stamina and hand.
+    Solved offline by analysis/npc_policy.py, looked up in constant time.
+    """
+    __slots__ = ("actions", "rules")
+
+    def __init__(self, actions, rules = DEFAULT_RULES):
+        self.actions = bytes(actions)
+        self.rules = rules
+
+    @staticmethod
+    def size(rules = DEFAULT_RULES):
+        return rules.venue_length * len(rules.rates) * (rules.stamina_cards + 1) * len(rules.hand_table.keys)
+
+    def index(self, position, rate, stamina, key):
+        """
+        Position of a state in the actions table, None if the hand is not in the table.
+        """
+        rules = self.rules
+        hand = rules.hand_table.index[key]
+        if hand < 0:
+            return None
+        return ((position * len(rules.rates) + rate) * (rules.stamina_cards + 1) + stamina) * len(rules.hand_table.keys) + hand
+
+    def stroke_rate(self, position, rate, stamina, key):
+        """
+        Stroke rate to choose in a state, None if the state is outside the table.
+        """
+        position = min(position, self.rules.venue_length - 1)
+        i = self.index(position, rate, stamina, key)
+        if i is None:
+            return None
+        return self.actions[i]
+
+    def matches(self, rules):
+        """
+        Check if the policy was solved for these rules.
+        """
+        return all(getattr(self.rules, name) == getattr(rules, name) for name in POLICY_RULES)
+
+    def save(self, path = POLICY_PATH):
+        header = json.dumps({name: getattr(self.rules, name) for name in POLICY_RULES}).encode()
+        with open(path, "wb") as f:
+            f.write(MAGIC + HEADER.pack(VERSION, len(header)) + header + zlib.compress(self.actions, 9))
+
+    @staticmethod
+    def load(path = POLICY_PATH):
+        """
+        Read a policy file, returns None if there is no valid file.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        if not data.startswith(MAGIC):
+            return None
+        offset = len(MAGIC)
+        version, header_length = HEADER.unpack_from(data, offset)
+        if version != VERSION:
+            return None
+        offset += HEADER.size
+
+        fields = json.loads(data[offset:offset + header_length])
+        fields["splits"] = [tuple(split) for split in fields["splits"]]
+        rules = RuleSet(**fields)
+
+        actions = zlib.decompress(data[offset + header_length:])
+        if len(actions) != PolicyTable.size(rules):
+            return None
+        return PolicyTable(actions, rules)
+
+_policies = {}
+
+def get_policy(path = POLICY_PATH):
+    """
+    Policy table loaded once per process, None if it was never solved.
+    """
+    if path not in _policies:
+        _policies[path] = PolicyTable.load(path)
+    return _policies[path]
@@ -0,0 +1,90 @@
+from src.engine.npc_logic import NPCLogic
+from src.engine.race_engine import NPCDecisions
+from src.engine.boat import Boat
+
+# Parameters of a variant, as written in JSON:
+#   "difficulty": "Normal", "Expert" or "Master"
+#   "aggression": {"75": 0.6}          chance to risk the split at a location, the rules aggression for the others
+#   "aggression_scale": 1.5            every split chance multiplied, at most 1
+#   "motivation": [1, 4]               stamina needed to use motivation past position 80 and before it
+#   "motivation_chance": 0.5           chance to use motivation with enough stamina
+VARIANT_FIELDS = ("difficulty", "aggression", "aggression_scale", "motivation", "motivation_chance")
+
+
+class NPCVariant(NPCDecisions):
+    """
+    NPC decisions with their own parameters for the NPCLogic decision points.
+    Without parameters a variant plays exactly like NPCDecisions of its difficulty.
+    """
+    def __init__(self, name, difficulty = "Normal", aggression = None, aggression_scale = 1.0, motivation = (1, 4), motivation_chance = 0.50):
+        super().__init__(difficulty)
+        self.name = name
+        self.aggression = {int(loc): p for loc, p in (aggression or {}).items()}
+        self.aggression_scale = aggression_scale
+        self.motivation_thresholds = tuple(motivation)
+        self.motivation_chance = motivation_chance
+        # Split chances compiled for the rules of the last race
+        self.rules = None
+        self.split_aggression = None
+
+    def aggression_for(self, rules):
+        """
+        Chance to risk every split of the rules, in split order.
+        """
+        if rules is not self.rules:
+            self.rules = rules
+            self.split_aggression = tuple(min(1.0, self.aggression.get(loc, p) * self.aggression_scale)
+                                          for loc, p in zip(rules.split_locs, rules.split_aggression))
+        return self.split_aggression
+
+    def stroke_rate(self, boat: Boat):
+        if self.search is not None:
+            return self.search.stroke_rate(self.engine, boat)
+        aggression = self.aggression_for(boat.rules)
+        if self.difficulty == "Expert":
+            return NPCLogic.choose_expert_stroke_rate(boat, aggression)
+        return NPCLogic.choose_stroke_rate(boat, aggression)
+
+    def motivation(self, boat: Boat, boat_ahead: Boat):
+        if self.search is not None:
+            return self.search.motivation(self.engine, boat)
+        return NPCLogic.choose_motivation(boat, self.motivation_thresholds, self.motivation_chance) == "use"
+
+
+class LaneDecisions(NPCDecisions):
+    """
+    Decision source of a race between different NPCs: every choice is asked to the decisions of the boat lane.
+    """
+    def __init__(self, lanes):
+        # {lane: decisions}
+        self.lanes = lanes
+        super().__init__()
+
+    @property
+    def engine(self):
+        return self._engine
+
+    @engine.setter
+    def engine(self, engine):
+        # Master decisions search from the engine of the race
+        self._engine = engine
+        for decisions in self.lanes.values():
+            if isinstance(decisions, NPCDecisions):
+                decisions.engine = engine
+
+    def stroke_rate(self, boat: Boat):
+        return self.lanes[boat.lane].stroke_rate(boat)
+
+    def cards_to_play(self, boat: Boat, available_cards: list, cards_needed: int):
+        return self.lanes[boat.lane].cards_to_play(boat, available_cards, cards_needed)
+
+    def cards_to_discard(self, boat: Boat, available_cards: list):
+        return self.lanes[boat.lane].cards_to_discard(boat, available_cards)
+
+    def motivation(self, boat: Boat, boat_ahead: Boat):
+        return self.lanes[boat.lane].motivation(boat, boat_ahead)
+
+    def seed_search(self, seed, race_index = 0):
+        for decisions in self.lanes.values():
+            if isinstance(decisions, NPCDecisions):
+                decisions.seed_search(seed, race_index)
@@ -0,0 +1,232 @@
+import json
+import sys
+import time
+from src.engine.race_logic import GameLogic
+from src.engine.race_engine import RaceEngine
+
+# Race phases timed, by the GameLogic, RaceEngine and decisions methods that run them
+LOGIC_PHASES = {
+    "draw_cards": "draw",
+    "check_clustered_hand": "clustered check",
+    "check_stamina": "stamina check",
+    "change_stroke_rate": "stroke rate change",
+    "calculate_movement": "card play",
+    "check_split_limit": "split check",
+    "apply_movement": "movement",
+    "apply_crab": "crab",
+    "pay_stamina_cards": "stamina payment",
+    "discard_cards": "discard",
+    "replenish_hand": "replenish",
+}
+ENGINE_PHASES = {
+    "play_round": "round",
+    "play_turn": "turn",
+    "change_tides": "change of tides",
+    "apply_motivation": "motivation",
+}
+DECISION_PHASES = {
+    "stroke_rate": "stroke rate choice",
+    "cards_to_play": "card choice",
+    "cards_to_discard": "discard choice",
+    "motivation": "motivation choice",
+}
+
+
+class PhaseProfiler:
+    """
+    Call counts and nanoseconds spent in every phase of the races run while it is started.
+    Phases are timed by wrapping their methods only while profiling, so races without a profiler run the usual code.
+    Phases run inside other phases (draw inside replenish...) count in both totals, self time only counts once.
+    With allocations, the memory blocks still allocated when a phase returns are counted too.
+    The searches of "Master" NPCs attached are summed as well: playouts and tree depth reached.
+    A search is timed as a phase of its own, the phases of its playouts are not counted: they are not the race.
+    """
+    def __init__(self, allocations = False):
+        self.allocations = allocations
+        # Phase name: [calls, total ns, self ns, blocks]
+        self.phases = {}
+        self.stack = []
+        # Above 0 while a search plays out races, whose phases are not counted
+        self.paused = [0]
+        self.patched = []
+        self.searches = []
+        # Blocks the timing itself keeps alive during a call, measured once on an empty call
+        self.bias = 0
+        if allocations:
+            empty = self.wrap(None, lambda boat: None)
+            for _ in range(1000):
+                empty(None)
+            self.bias = round(self.phases.pop(None)[3] / 1000)
+
+    def wrap(self, name, func):
+        stats = self.phases.setdefault(name, [0, 0, 0, 0])
+        stack = self.stack
+        paused = self.paused
+        clock = time.perf_counter_ns
+        blocks = sys.getallocatedblocks
+        bias = self.bias
+
+        if self.allocations:
+            def timed(*args):
+                if paused[0]:
+                    return func(*args)
+                stack.append(0)
+                before = blocks()
+                start = clock()
+                try:
+                    return func(*args)
+                finally:
+                    after = blocks()
+                    elapsed = clock() - start
+                    stats[3] += after - before - bias
+                    children = stack.pop()
+                    stats[0] += 1
+                    stats[1] += elapsed
+                    stats[2] += elapsed - children
+                    if stack:
+                        stack[-1] += elapsed
+        else:
+            def timed(*args):
+                if paused[0]:
+                    return func(*args)
+                stack.append(0)
+                start = clock()
+                try:
+                    return func(*args)
+                finally:
+                    elapsed = clock() - start
+                    children = stack.pop()
+                    stats[0] += 1
+                    stats[1] += elapsed
+                    stats[2] += elapsed - children
+                    if stack:
+                        stack[-1] += elapsed
+        return timed
+
+    def pausing(self, func):
+        """
+        Func with the timing of every phase it runs paused.
+        """
+        paused = self.paused
+
+        def hidden(*args):
+            paused[0] += 1
+            try:
+                return func(*args)
+            finally:
+                paused[0] -= 1
+        return hidden
+
+    def patch(self, owner, attribute, name, wrapper = None, hiding = False):
+        """
+        Replace a method by its timed version, restored by stop().
+        With hiding, the phases run inside the method are not timed.
+        """
+        if any(o is owner and a == attribute for o, a, _ in self.patched):
+            return
+        saved = owner.__dict__.get(attribute)
+        method = getattr(owner, attribute)
+        timed = self.wrap(name, self.pausing(method) if hiding else method)
+        setattr(owner, attribute, wrapper(timed) if wrapper else timed)
+        self.patched.append((owner, attribute, saved))
+
+    # ------ START / STOP ------
+    def start(self):
+        for attribute, name in LOGIC_PHASES.items():
+            self.patch(GameLogic, attribute, name, staticmethod)
+        for attribute, name in ENGINE_PHASES.items():
+            self.patch(RaceEngine, attribute, name)
+        return self
+
+    def attach(self, engine):
+        """
+        Also time the choices of the decisions source of an engine, for every engine with the same kind of source.
+        """
+        decisions = type(engine.decisions)
+        for attribute, name in DECISION_PHASES.items():
+            if hasattr(decisions, attribute):
+                self.patch(decisions, attribute, name)
+
+        search = getattr(engine.decisions, "search", None)
+        if search is not None:
+            # Playouts run the engine and the decisions again, on copies of the race
+            self.patch(type(search), "search", "search", hiding = True)
+            if all(s is not search for s in self.searches):
+                self.searches.append(search)
+
+    def stop(self):
+        while self.patched:
+            owner, attribute, saved = self.patched.pop()
+            if saved is not None:
+                setattr(owner, attribute, saved)
+            else:
+                # The method was inherited, uncover it again
+                delattr(owner, attribute)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    # ------ RESULTS ------
+    def merge(self, phases):
+        """
+        Add the phases of another profiler, like the one of a worker process.
+        """
+        for name, values in phases.items():
+            stats = self.phases.setdefault(name, [0, 0, 0, 0])
+            for i, value in enumerate(values):
+                stats[i] += value
+
+    def to_dict(self):
+        return {
+            name: {"calls": calls, "total_ns": total, "self_ns": own, "blocks": blocks}
+            for name, (calls, total, own, blocks) in self.phases.items()
+        }
+
+    def search_stats(self):
+        """
+        Totals of the attached searches, None without any.
+        """
+        if not self.searches:
+            return None
+        searches = sum(s.searches for s in self.searches)
+        return {
+            "searches": searches,
+            "playouts": sum(s.total_playouts for s in self.searches),
+            "mean_depth": sum(s.total_depth for s in self.searches) / max(1, searches),
+            "max_depth": max(s.max_depth for s in self.searches),
+        }
+
+    def save(self, path):
+        profile = {"allocations": self.allocations, "phases": self.to_dict()}
+        if self.searches:
+            profile["search"] = self.search_stats()
+        with open(path, "w") as f:
+            json.dump(profile, f, indent=2)
+
+    def report(self):
+        """
+        Print the phases from the most self time to the least.
+        """
+        total_self = sum(own for _, _, own, _ in self.phases.values()) or 1
+        header = f"{'PHASE':<20} | {'CALLS':>10} | {'TOTAL ms':>10} | {'SELF ms':>10} | {'SELF %':>6} | {'ns/CALL':>8}"
+        if self.allocations:
+            header += f" | {'BLOCKS':>8}"
+        print("\nPhase Profile")
+        print("=" * len(header))
+        print(header)
+        print("-" * len(header))
+        for name, (calls, total, own, blocks) in sorted(self.phases.items(), key=lambda item: -item[1][2]):
+            if not calls:
+                continue
+            line = f"{name:<20} | {calls:>10} | {total / 1e6:>10.2f} | {own / 1e6:>10.2f} | {own / total_self * 100:>5.1f}% | {own / calls:>8.0f}"
+            if self.allocations:
+                line += f" | {blocks:>8}"
+            print(line)
+
+        search = self.search_stats()
+        if search is not None and search["searches"]:
+            print(f"\nSearch: {search['searches']} choices, {search['playouts'] / search['searches']:.0f} playouts per choice, "
+                  f"tree depth {search['mean_depth']:.1f} on average and {search['max_depth']} at most")
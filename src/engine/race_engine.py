@@ -0,0 +1,325 @@
+from src.engine.race_logic import GameLogic
+from src.engine.npc_logic import NPCLogic
+from src.engine.boat import Boat
+from src.engine.rng import race_rng
+
+
+class NPCDecisions:
+    """
+    Decision source that lets NPCLogic take every choice of the race.
+    The "Expert" difficulty uses the solved policy table for stroke rates.
+    The "Master" difficulty searches its stroke rate, card and motivation choices by playing the race ahead
+    (see src/engine/mcts.py), from the engine that uses the decisions.
+    Their playouts draw from a stream of the race seed, random without one.
+    """
+    def __init__(self, difficulty = "Normal", seed = None):
+        self.difficulty = difficulty
+        self.engine = None
+        self.search = None
+        if difficulty == "Master":
+            from src.engine.mcts import TreeSearch
+            self.search = TreeSearch(seed = seed)
+
+    def seed_search(self, seed, race_index = 0):
+        """
+        Start the playout stream of the searches again for a new race, like decisions shared by many races.
+        """
+        if self.search is not None:
+            self.search.rng = race_rng(seed, race_index, "search")
+
+    def stroke_rate(self, boat: Boat):
+        if self.search is not None:
+            return self.search.stroke_rate(self.engine, boat)
+        if self.difficulty == "Expert":
+            return NPCLogic.choose_expert_stroke_rate(boat)
+        return NPCLogic.choose_stroke_rate(boat)
+
+    def cards_to_play(self, boat: Boat, available_cards: list, cards_needed: int):
+        if self.search is not None:
+            return self.search.cards_to_play(self.engine, boat, available_cards, cards_needed)
+        return NPCLogic.choose_cards(boat)[:cards_needed]
+
+    def cards_to_discard(self, boat: Boat, available_cards: list):
+        return []
+
+    def motivation(self, boat: Boat, boat_ahead: Boat):
+        if self.search is not None:
+            return self.search.motivation(self.engine, boat)
+        return NPCLogic.choose_motivation(boat) == "use"
+
+
+class NullEvents:
+    """
+    Event sink that ignores every race event.
+    Used by headless simulations, so no string formatting or I/O is done.
+    """
+    def turn_started(self, boat: Boat):
+        pass
+
+    def turn_event(self, boat: Boat, event: str):
+        pass
+
+    def choice_made(self, boat: Boat, choice: str, values: list):
+        pass
+
+    def turn_finished(self, boat: Boat, status: str, split_loc):
+        pass
+
+    def bonus(self, boats: list, event: str):
+        pass
+
+    def round_finished(self, boats: list):
+        pass
+
+    def race_finished(self, boats: list):
+        pass
+
+
+class RaceEngine:
+    """
+    Runs the race rounds without any interface.
+    Choices are asked to the decisions source and results are sent to the events sink.
+    The rules of the race are the ones of its boats.
+
+    The phases of a round are steps: generators that yield every choice they need as (request, args)
+    and read the answer from engine.answer when resumed. The request is the name of the decisions method
+    that answers it, or "turn" for the turn of a boat. drive() answers them here, an async driver can await
+    them instead (src/controllers/async_game.py), and both play the same phase sequence.
+    """
+    def __init__(self, boats: list, decisions = None, events = None):
+        self.boats = boats
+        self.decisions = decisions if decisions is not None else NPCDecisions()
+        self.events = events if events is not None else NullEvents()
+        self.running = True
+        # Order of the boats in the bonus phase running, motivation searches continue from it
+        self.bonus_order = None
+        # Answer to the last choice a step asked
+        self.answer = None
+        if isinstance(self.decisions, NPCDecisions):
+            self.decisions.engine = self
+
+    def run(self):
+        """
+        Play rounds until every boat crossed the finish line.
+        """
+        while self.running:
+            self.play_round()
+
+    def snapshot(self):
+        """
+        State of the race, restored by restore(). Random streams are not part of it.
+        """
+        return self.running, tuple(b.snapshot() for b in self.boats)
+
+    def restore(self, state):
+        self.running, boats = state
+        for b, boat_state in zip(self.boats, boats):
+            b.restore(boat_state)
+
+    def drive(self, steps):
+        """
+        Run phase steps to the end, every choice answered by the decisions source.
+        """
+        decisions = self.decisions
+        for request, args in steps:
+            self.answer = self.play_turn(*args) if request == "turn" else getattr(decisions, request)(*args)
+
+    def play_round(self):
+        self.drive(self.round_steps())
+
+    def play_turn(self, boat: Boat):
+        self.drive(self.turn_steps(boat))
+
+    def round_steps(self, first = 0):
+        """
+        Control the round structure, from the turn of the boat at first:
+        1. Individual phase for every boat still racing
+        2. End of round bonuses
+        3. Finish line check
+        """
+        for b in self.boats[first:]:
+            if b.finished:
+                continue
+            yield "turn", (b,)
+
+        # Both bonuses use the order of the boats at the end of the turns
+        sorted_boats = self.sorted_boats()
+        self.change_tides(sorted_boats)
+        yield from self.motivation_steps(sorted_boats)
+        self.finish_round()
+
+    def finish_round(self):
+        self.events.round_finished(self.boats)
+        self.check_finish_line()
+
+    # ------ INDIVIDUAL PHASE ------
+    def turn_steps(self, boat: Boat, rate = None, cards_selected = None):
+        """
+        Play a full turn of a boat:
+        1. Change or maintain Stroke Rate
+        2. Play cards
+        3. Advance boat
+        4. Replenish hand
+        A turn stopped at a choice goes on from the stroke rate or the cards chosen, when given.
+        """
+        if rate is None and cards_selected is None:
+            state = self.start_turn(boat)
+            if state == "clustered":
+                return
+            if state == "ok":
+                yield "stroke_rate", (boat,)
+                rate = self.answer
+
+        if rate is not None:
+            self.change_stroke_rate(boat, rate)
+        if cards_selected is None:
+            available_cards, cards_needed = GameLogic.get_playable_cards(boat)
+            yield "cards_to_play", (boat, available_cards, cards_needed)
+            cards_selected = self.answer
+        status, split_loc = self.play_cards(boat, cards_selected)
+
+        available_cards, _ = GameLogic.get_playable_cards(boat)
+        yield "cards_to_discard", (boat, available_cards)
+        self.discard_cards(boat, self.answer)
+
+        self.end_turn(boat, status, split_loc)
+
+    def start_turn(self, boat: Boat):
+        """
+        Draw the hand and check clustered hand and exhaustion.
+        Returns "clustered" if the turn is over, "exhausted" or "ok".
+        """
+        boat.caught_crab = False
+        boat.penalized = False
+        GameLogic.draw_cards(boat)
+        self.events.turn_started(boat)
+
+        if GameLogic.check_clustered_hand(boat):
+            self.events.turn_event(boat, "clustered")
+            GameLogic.replenish_hand(boat)
+            return "clustered"
+
+        if GameLogic.check_stamina(boat) != "ok":
+            self.events.turn_event(boat, "no stamina")
+            return "exhausted"
+        return "ok"
+
+    def change_stroke_rate(self, boat: Boat, choice: int):
+        """
+        Applies the chosen stroke rate.
+        """
+        self.events.choice_made(boat, "rate", [choice])
+        result = GameLogic.change_stroke_rate(boat, choice)
+        if result == "failed":
+            self.events.turn_event(boat, "failed")
+        return result
+
+    def play_cards(self, boat: Boat, cards_selected: list):
+        """
+        Move the boat with the played cards and check the split limits.
+        Returns the split status and the location of the split crossed.
+        """
+        self.events.choice_made(boat, "cards", cards_selected)
+        movement = GameLogic.calculate_movement(boat, cards_selected)
+        status, inf = GameLogic.check_split_limit(boat, movement)
+
+        split_loc = None
+        if status == "passed":
+            GameLogic.apply_movement(boat, movement)
+        elif status == "tired":
+            split_loc = self.crossed_split(boat, movement)
+            GameLogic.apply_movement(boat, movement)
+            GameLogic.pay_stamina_cards(boat, inf)
+        else:
+            split_loc = inf
+            GameLogic.apply_crab(boat, inf)
+        return status, split_loc
+
+    def crossed_split(self, boat: Boat, movement: int):
+        """
+        Location of the first split crossed by a movement, None if there is none.
+        """
+        i = boat.rules.first_split(boat.position, movement)
+        return None if i is None else boat.rules.split_locs[i]
+
+    def discard_cards(self, boat: Boat, cards_selected: list):
+        """
+        Optional discard of cards before replenishing.
+        """
+        self.events.choice_made(boat, "discard", cards_selected)
+        if cards_selected:
+            GameLogic.discard_cards(boat, cards_selected)
+
+    def end_turn(self, boat: Boat, status: str, split_loc):
+        """
+        Replenish the hand and close the turn.
+        """
+        GameLogic.replenish_hand(boat)
+        boat.round += 1
+        self.events.turn_finished(boat, status, split_loc)
+
+    # ------ END OF ROUND ------
+    def sorted_boats(self):
+        """
+        Boats from first to last.
+        """
+        return sorted(
+            self.boats,
+            key=lambda x: (x.position, x.stroke_rate),
+            reverse=True
+        )
+
+    def change_tides(self, sorted_boats: list):
+        """
+        Change of Tides bonus for the last two boats.
+        """
+        if len(sorted_boats) < 2:
+            return
+
+        affected = []
+        for b in [sorted_boats[-1], sorted_boats[-2]]:
+            if b.caught_crab or b.finished:
+                continue
+
+            GameLogic.change_tides_bonus(b)
+            affected.append(b)
+        self.events.bonus(affected, f"change_{len(affected)}")
+
+    def motivation_steps(self, sorted_boats: list, first = 1):
+        """
+        Motivation choice of every boat that can use the bonus with the boat ahead of it, from the boat at first.
+        Each chance is checked after the previous choice was applied.
+        """
+        self.bonus_order = sorted_boats
+        for i in range(first, len(sorted_boats)):
+            current_boat = sorted_boats[i]
+            boat_ahead = sorted_boats[i-1]
+
+            if boat_ahead.finished or current_boat.finished or current_boat.penalized or current_boat.caught_crab:
+                continue
+
+            if GameLogic.can_use_motivation(current_boat, boat_ahead):
+                yield "motivation", (current_boat, boat_ahead)
+                if self.answer:
+                    self.apply_motivation(current_boat, boat_ahead)
+
+    def apply_motivation(self, current_boat: Boat, boat_ahead: Boat):
+        """
+        Pay the stamina card of the motivation bonus and move the boat.
+        """
+        GameLogic.pay_stamina_cards(current_boat, 1)
+        GameLogic.motivation_bonus(current_boat)
+        self.events.bonus([current_boat, boat_ahead], "motivation")
+
+    def check_finish_line(self):
+        """
+        Detect if any boat has finished the race.
+        If all boats have finished the race end it.
+        """
+        for b in self.boats:
+            if b.position >= b.rules.venue_length:
+                b.finished = True
+
+        if all(b.finished for b in self.boats):
+            self.running = False
+            self.events.race_finished(self.boats)
@@ -0,0 +1,447 @@
+import json
+import random
+import struct
+from array import array
+from dataclasses import fields
+from src.engine.constants import STAMINA
+from src.engine.race_engine import RaceEngine, NullEvents
+from src.engine.race_logic import GameLogic
+from src.engine.rng import race_rng
+from src.engine.rules import RuleSet
+
+# File format: magic, version, length of the JSON header (seed, players, rules), the header,
+# then length-prefixed records appended while the race is played
+MAGIC = b"RRLOG"
+VERSION = 1
+HEADER = struct.Struct("<HI")
+RECORD = struct.Struct("<BH")
+
+# ------ RECORD TYPES ------
+RANDOM = 1      # results of the random stream that changed the race (deck draws, instability flips)
+RATE = 2        # lane, stroke rate chosen
+CARDS = 3       # lane, cards played
+DISCARD = 4     # lane, cards discarded
+EVENT = 5       # lane, event of the turn (clustered, no stamina, failed)
+TURN = 6        # lane, split status, split crossed, position
+BONUS = 7       # event, lanes of the boats involved
+ROUND = 8       # rounds played, closes every round
+KEYFRAME = 9    # rounds played, state of every boat
+FINISH = 10     # every boat crossed the finish line
+
+EVENTS = ("clustered", "no stamina", "failed", "passed", "tired", "crab", "change_0", "change_1", "change_2", "motivation")
+EVENT_CODES = {event: i for i, event in enumerate(EVENTS)}
+CHOICES = {"rate": RATE, "cards": CARDS, "discard": DISCARD}
+
+TURN_BODY = struct.Struct("<BBHH")
+NO_SPLIT = 0xFFFF
+
+# Lane, position, stroke rate, flags, rounds played, stamina cards, then hand, draw and discard piles
+BOAT_STATE = struct.Struct("<BHBBHB")
+CRAB, PENALIZED, FINISHED, NPC = 1, 2, 4, 8
+
+# Keyframes are written every few rounds, seeking replays at most that many rounds
+KEYFRAME_EVERY = 5
+
+RULE_FIELDS = tuple(f.name for f in fields(RuleSet) if f.init)
+
+
+class RecordedRandom(random.Random):
+    """
+    Copy of the race random stream that keeps every randrange result.
+    Deck draws and instability flips go through randrange, NPC choices only use random(),
+    so a replay with the recorded choices needs these results and nothing else.
+    """
+    def __init__(self, source):
+        super().__init__()
+        self.setstate(source.getstate())
+        self.results = array("H")
+
+    def randrange(self, *args):
+        value = super().randrange(*args)
+        self.results.append(value)
+        return value
+
+
+class ReplayRandom:
+    """
+    Random stream of a replay, gives back the recorded results in order.
+    """
+    def __init__(self):
+        self.results = []
+        self.next = 0
+
+    def randrange(self, *args):
+        if self.next >= len(self.results):
+            raise ValueError("Race log has fewer random results than the replay needs")
+        value = self.results[self.next]
+        self.next += 1
+        return value
+
+    def randint(self, a, b):
+        return self.randrange(a, b + 1)
+
+    def random(self):
+        raise ValueError("Replays only use the recorded choices")
+
+
+class RaceRecorder(NullEvents):
+    """
+    Event sink that appends the race to a log file and passes every event to another sink.
+    The file is written once per round, so a race left before the end is still readable.
+    """
+    def __init__(self, path, seed, chosen_colors, boats, events = None, keyframe_every = KEYFRAME_EVERY):
+        self.events = events if events is not None else NullEvents()
+        self.keyframe_every = keyframe_every
+        self.rounds = 0
+        self.buffer = bytearray()
+
+        # Every boat shares one random stream, record it from now on
+        self.random = RecordedRandom(boats[0].rng)
+        for b in boats:
+            b.rng = self.random
+            b.deck.rng = self.random
+
+        rules = boats[0].rules
+        header = json.dumps({
+            "seed": seed,
+            "colors": list(chosen_colors),
+            "rules": encode_rules(rules),
+        }).encode()
+        self.file = open(path, "wb")
+        self.file.write(MAGIC + HEADER.pack(VERSION, len(header)) + header)
+        self.file.flush()
+
+    def record(self, kind, body = b""):
+        # Random results come before the record that used them
+        if self.random.results:
+            results = self.random.results
+            self.buffer += RECORD.pack(RANDOM, len(results) * results.itemsize) + results.tobytes()
+            del results[:]
+        self.buffer += RECORD.pack(kind, len(body)) + body
+
+    def write(self):
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer.clear()
+
+    # ------ EVENTS ------
+    def turn_started(self, boat):
+        self.events.turn_started(boat)
+
+    def turn_event(self, boat, event):
+        self.record(EVENT, bytes([boat.lane, EVENT_CODES[event]]))
+        self.events.turn_event(boat, event)
+
+    def choice_made(self, boat, choice, values):
+        self.record(CHOICES[choice], bytes([boat.lane]) + bytes(values))
+        self.events.choice_made(boat, choice, values)
+
+    def turn_finished(self, boat, status, split_loc):
+        self.record(TURN, TURN_BODY.pack(boat.lane, EVENT_CODES[status], NO_SPLIT if split_loc is None else split_loc, boat.position))
+        self.events.turn_finished(boat, status, split_loc)
+
+    def bonus(self, boats, event):
+        self.record(BONUS, bytes([EVENT_CODES[event]]) + bytes(b.lane for b in boats))
+        self.events.bonus(boats, event)
+
+    def round_finished(self, boats):
+        self.rounds += 1
+        self.record(ROUND, struct.pack("<H", self.rounds))
+        if self.rounds % self.keyframe_every == 0:
+            self.record(KEYFRAME, encode_keyframe(self.rounds, boats))
+        self.write()
+        self.events.round_finished(boats)
+
+    def race_finished(self, boats):
+        self.record(FINISH)
+        self.write()
+        self.file.close()
+        self.events.race_finished(boats)
+
+
+def encode_rules(rules):
+    """
+    Fields of a rule set, as JSON values.
+    """
+    return {name: getattr(rules, name) for name in RULE_FIELDS}
+
+def decode_rules(fields):
+    """
+    Rule set of fields read from JSON, where tuples came back as lists. Missing fields keep their default.
+    """
+    fields = dict(fields)
+    for name in ("splits", "aggression", "meters"):
+        if name in fields:
+            fields[name] = tuple(tuple(item) for item in fields[name])
+    return RuleSet(**fields)
+
+def encode_keyframe(rounds, boats):
+    body = bytearray(struct.pack("<HB", rounds, len(boats)))
+    for b in boats:
+        flags = (CRAB if b.caught_crab else 0) | (PENALIZED if b.penalized else 0) | (FINISHED if b.finished else 0) | (NPC if b.is_npc else 0)
+        body += BOAT_STATE.pack(b.lane, b.position, b.stroke_rate, flags, b.round, len(b.stamina_pile))
+        # Pile order matters: the recorded draws are positions in the draw pile
+        for pile in (b.hand, b.draw_pile, b.discard_pile):
+            body += struct.pack("<H", len(pile)) + pile.tobytes()
+    return bytes(body)
+
+def restore_keyframe(body, boats):
+    """
+    Put the state of a keyframe on boats created for the race, returns the rounds played.
+    """
+    rounds, count = struct.unpack_from("<HB", body)
+    offset = 3
+    by_lane = {b.lane: b for b in boats}
+    for _ in range(count):
+        lane, position, rate, flags, turns, stamina = BOAT_STATE.unpack_from(body, offset)
+        offset += BOAT_STATE.size
+        piles = []
+        for _ in range(3):
+            length = struct.unpack_from("<H", body, offset)[0]
+            offset += 2
+            piles.append(array("b", body[offset:offset + length]))
+            offset += length
+
+        b = by_lane[lane]
+        b.position = position
+        b.stroke_rate = rate
+        b.caught_crab = bool(flags & CRAB)
+        b.penalized = bool(flags & PENALIZED)
+        b.finished = bool(flags & FINISHED)
+        b.is_npc = bool(flags & NPC)
+        b.round = turns
+        b.stamina_pile = array("b", [STAMINA]) * stamina
+        b.set_hand(piles[0])
+        b.deck.set_piles(piles[1], piles[2])
+    return rounds
+
+def check_keyframe(body, rules):
+    """
+    Dry parse of a keyframe: True if restore_keyframe can put it on the boats of a race with these rules.
+    Every lane once, rates, positions and card codes in range, and pile lengths that end with the body.
+    """
+    try:
+        _, count = struct.unpack_from("<HB", body)
+        offset = 3
+        lanes = set()
+        for _ in range(count):
+            lane, position, rate, _, _, _ = BOAT_STATE.unpack_from(body, offset)
+            offset += BOAT_STATE.size
+            if not 1 <= lane <= rules.lanes or lane in lanes or rate not in rules.rates or position > rules.venue_length:
+                return False
+            lanes.add(lane)
+            for _ in range(3):
+                length = struct.unpack_from("<H", body, offset)[0]
+                offset += 2
+                pile = body[offset:offset + length]
+                if len(pile) < length or any(card > STAMINA for card in pile):
+                    return False
+                offset += length
+    except struct.error:
+        return False
+    return offset == len(body)
+
+
+class RaceLog:
+    """
+    A race log read from a file: the header and the records of every round.
+    """
+    def __init__(self, seed, chosen_colors, rules, rounds, keyframes, finished):
+        self.seed = seed
+        self.chosen_colors = chosen_colors
+        self.rules = rules
+        # Records of every round, as lists of (type, body)
+        self.rounds = rounds
+        # Keyframe body by rounds played
+        self.keyframes = keyframes
+        self.finished = finished
+
+    @staticmethod
+    def load(path):
+        """
+        Read a log file, returns None if it is not a valid log.
+        A record cut by a race left in the middle is ignored with the rest of its round.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        if not data.startswith(MAGIC) or len(data) < len(MAGIC) + HEADER.size:
+            return None
+        offset = len(MAGIC)
+        version, header_length = HEADER.unpack_from(data, offset)
+        if version != VERSION:
+            return None
+        offset += HEADER.size
+
+        # A header that doesn't parse makes the whole log invalid, like a race save
+        try:
+            header = json.loads(data[offset:offset + header_length])
+            rules = decode_rules(header["rules"])
+            seed, colors = header["seed"], header["colors"]
+        except (ValueError, TypeError, KeyError, AttributeError):
+            return None
+        offset += header_length
+
+        rounds = []
+        keyframes = {}
+        finished = False
+        records = []
+        while offset + RECORD.size <= len(data):
+            kind, length = RECORD.unpack_from(data, offset)
+            offset += RECORD.size
+            if offset + length > len(data):
+                break
+            body = data[offset:offset + length]
+            offset += length
+
+            if kind == KEYFRAME:
+                if len(body) < 2:
+                    return None
+                keyframes[struct.unpack_from("<H", body)[0]] = body
+            elif kind == FINISH:
+                finished = True
+            else:
+                records.append((kind, body))
+                if kind == ROUND:
+                    rounds.append(records)
+                    records = []
+        return RaceLog(seed, colors, rules, rounds, keyframes, finished)
+
+
+class ReplayDecisions:
+    """
+    Decision source of a replay: the choices recorded for the round being replayed.
+    """
+    def __init__(self):
+        self.choices = {RATE: [], CARDS: [], DISCARD: []}
+        self.motivations = set()
+
+    def next_choice(self, kind, boat):
+        choices = self.choices[kind]
+        if not choices or choices[0][0] != boat.lane:
+            raise ValueError(f"Race log has no recorded choice for lane {boat.lane}")
+        return list(choices.pop(0)[1:])
+
+    def stroke_rate(self, boat):
+        return self.next_choice(RATE, boat)[0]
+
+    def cards_to_play(self, boat, available_cards, cards_needed):
+        return self.next_choice(CARDS, boat)
+
+    def cards_to_discard(self, boat, available_cards):
+        return self.next_choice(DISCARD, boat)
+
+    def motivation(self, boat, boat_ahead):
+        return boat.lane in self.motivations
+
+
+class ReplayEvents(NullEvents):
+    """
+    Check the turn results of a replay against the log, and pass the events to another sink.
+    """
+    def __init__(self, events = None):
+        self.events = events if events is not None else NullEvents()
+        self.turns = []
+
+    def turn_started(self, boat):
+        self.events.turn_started(boat)
+
+    def turn_event(self, boat, event):
+        self.events.turn_event(boat, event)
+
+    def choice_made(self, boat, choice, values):
+        self.events.choice_made(boat, choice, values)
+
+    def turn_finished(self, boat, status, split_loc):
+        expected = self.turns.pop(0) if self.turns else None
+        split = NO_SPLIT if split_loc is None else split_loc
+        if expected != (boat.lane, EVENT_CODES[status], split, boat.position):
+            raise ValueError(f"Replay of lane {boat.lane} does not match the race log")
+        self.events.turn_finished(boat, status, split_loc)
+
+    def bonus(self, boats, event):
+        self.events.bonus(boats, event)
+
+    def round_finished(self, boats):
+        self.events.round_finished(boats)
+
+    def race_finished(self, boats):
+        self.events.race_finished(boats)
+
+
+class RaceReplayer:
+    """
+    Rebuild a logged race round by round, without the interface.
+    The race starts from its seed, then every round is played again with the recorded choices and draws.
+    Seeking starts from the closest keyframe before the round.
+    """
+    def __init__(self, log, events = None):
+        self.log = log
+        self.decisions = ReplayDecisions()
+        self.checks = ReplayEvents(events)
+        self.random = ReplayRandom()
+        self.seek(0)
+
+    @property
+    def finished(self):
+        return not self.engine.running
+
+    def seek(self, round_number):
+        """
+        State of the race after a number of rounds, at most the rounds logged.
+        """
+        round_number = min(round_number, len(self.log.rounds))
+        self.boats = GameLogic.create_boat(self.log.chosen_colors, race_rng(self.log.seed), self.log.rules)
+        for b in self.boats:
+            b.rng = self.random
+            b.deck.rng = self.random
+        self.engine = RaceEngine(self.boats, self.decisions, self.checks)
+        self.rounds = 0
+
+        start = max((r for r in self.log.keyframes if r <= round_number), default=0)
+        if start:
+            # Keyframes are written with the end of their round, before the finish line check
+            self.rounds = restore_keyframe(self.log.keyframes[start], self.boats)
+            self.engine.check_finish_line()
+        while self.rounds < round_number:
+            self.play_round()
+        return self.boats
+
+    def play_round(self):
+        """
+        Play the next logged round, returns False when there is none.
+        """
+        if self.rounds >= len(self.log.rounds) or not self.engine.running:
+            return False
+
+        self.random.results = []
+        self.random.next = 0
+        for choices in self.decisions.choices.values():
+            choices.clear()
+        self.decisions.motivations.clear()
+        self.checks.turns.clear()
+
+        for kind, body in self.log.rounds[self.rounds]:
+            if kind == RANDOM:
+                self.random.results.extend(array("H", body))
+            elif kind in self.decisions.choices:
+                self.decisions.choices[kind].append(tuple(body))
+            elif kind == TURN:
+                self.checks.turns.append(TURN_BODY.unpack(body))
+            elif kind == BONUS and EVENTS[body[0]] == "motivation":
+                self.decisions.motivations.add(body[1])
+
+        self.engine.play_round()
+        self.rounds += 1
+        return True
+
+    def play(self):
+        """
+        Play the remaining logged rounds.
+        """
+        while self.play_round():
+            pass
+        return self.boats
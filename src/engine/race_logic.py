@@ -1,14 +1,18 @@
 import random
-from src.engine.constants import VENUE_LENGTH, COLORS, HAND_LIMIT
+from src.engine.constants import COLORS, INSTABILITY, STAMINA
 from src.engine.boat import Boat
+from src.engine.rules import DEFAULT_RULES
 
 class GameLogic:
     @staticmethod
-    def create_boat(chosen_colors: list):
+    def create_boat(chosen_colors: list, rng = None, rules = DEFAULT_RULES):
         """
         Creates players boats and npc boats based on chosen color.
+        Every boat shares the random stream and the rules of the race.
         """
-        lanes = [1,2,3,4,5,6]
+        if rng is None:
+            rng = random.Random()
+        lanes = list(range(1, rules.lanes + 1))
         available_colors = list(COLORS.keys())
         boats = []
 
@@ -17,15 +21,15 @@ class GameLogic:
             if color_name == "No more players":
                 continue
 
-            lane = random.choice(lanes)
+            lane = rng.choice(lanes)
             lanes.remove(lane)
             available_colors.remove(color_name)
-            boats.append(Boat(name= color_name, color= COLORS[color_name], lane= lane, is_npc= False))
+            boats.append(Boat(name= color_name, color= COLORS[color_name], lane= lane, is_npc= False, rng= rng, rules= rules))
 
         # Npc boat
         for lane in lanes:
             npc_color = available_colors.pop(0)
-            boats.append(Boat(name= npc_color, color= COLORS[npc_color], lane= lane, is_npc= True))
+            boats.append(Boat(name= npc_color, color= COLORS[npc_color], lane= lane, is_npc= True, rng= rng, rules= rules))
         
         return sorted(boats, key=lambda x: x.lane) 
 
@@ -33,45 +37,28 @@ class GameLogic:
     @staticmethod
     def draw_cards(boat: Boat):
         """
-        Draw top cards from draw deck to the hand until it has 7 cards.
-        Handles deck reshuffling if draw pile is empty.
+        Draw cards from draw deck to the hand until it reaches the hand limit.
+        The deck handles reshuffling if draw pile is empty.
         """
-        while len(boat.hand) < HAND_LIMIT:
-            if not boat.draw_pile:
-                if not boat.discard_pile:
-                    # If both decks are empty, give failsafe cared
-                    boat.draw_pile = [1]
-                else:
-                    boat.draw_pile.extend(boat.discard_pile)
-                    boat.discard_pile.clear()
-                    random.shuffle(boat.draw_pile)  
-            
-            card = boat.draw_pile.pop(0)
-            boat.hand.append(card)
-        
-        # Sort hand: pace cards, instability cards and stamina cards
-        boat.hand.sort(key=lambda x: (x == "s", x == "i", x))
+        hand_limit = boat.rules.hand_limit
+        while len(boat.hand) < hand_limit:
+            card = boat.deck.draw()
+            if card is None:
+                # If both decks are empty, give failsafe card
+                card = 1
+            boat.add_card(card)
 
     @staticmethod
     def check_clustered_hand(boat: Boat):
         """
         Detect if hand of player is a Cluttered Hand
         """
-        if boat.stroke_rate == 0 or boat.stroke_rate == 1:
-            cards_required = boat.stroke_rate + 1
-        else:
-            cards_required = boat.stroke_rate + 2
-
-        # Detect playable cards
-        playable_cards = []
-        for c in boat.hand:
-            if c != "s":
-                playable_cards.append(c)
+        cards_required = boat.rules.cards_per_rate[boat.stroke_rate]
 
-        if len(playable_cards) < cards_required:
-            boat.discard_pile.extend(playable_cards)
-            for c in playable_cards:
-                boat.hand.remove(c)
+        if boat.playable_count < cards_required:
+            # Playable cards are discarded in card order, only stamina cards stay in hand
+            boat.deck.discard_many(boat.playable_cards())
+            boat.set_hand([STAMINA] * boat.hand_counts[STAMINA])
             boat.stroke_rate = 0
             return True
         return False
@@ -84,12 +71,12 @@ class GameLogic:
         if len(boat.stamina_pile) < amount:
             while len(boat.stamina_pile) > 0:
                 boat.stamina_pile.pop()
-                boat.discard_pile.append("s")
+                boat.deck.discard(STAMINA)
             return False
 
         for _ in range(amount):
             boat.stamina_pile.pop()
-            boat.discard_pile.append("s")
+            boat.deck.discard(STAMINA)
         return True
 
     @staticmethod
@@ -107,7 +94,7 @@ class GameLogic:
         Applies a change in stroke rate.
         Detects if user wants to jump in stroke rate and if can pay.
         """
-        if choice not in [0,1,2]:
+        if choice not in boat.rules.rates:
             return "failed"
         
         new_rate = choice
@@ -136,12 +123,9 @@ class GameLogic:
         if boat.stroke_rate != 0:
             return
     
-        recovery_count = 0
-        for card in boat.hand[:]:
-            if card == "s" and recovery_count < 2:
-                boat.hand.remove("s")
-                boat.stamina_pile.append("s")
-                recovery_count += 1
+        for _ in range(min(2, boat.hand_counts[STAMINA])):
+            boat.remove_card(STAMINA)
+            boat.stamina_pile.append(STAMINA)
     
     @staticmethod
     def max_rate_effect(boat: Boat):
@@ -164,12 +148,8 @@ class GameLogic:
         """
         Returns playable cards and number allowed this turn.
         """
-        if boat.stroke_rate == 0 or boat.stroke_rate == 1:
-            number_cards = boat.stroke_rate + 1
-        else:
-            number_cards = boat.stroke_rate + 2
-        playable_cards = [c for c in boat.hand if c != "s"]
-        return playable_cards, number_cards
+        number_cards = boat.rules.cards_per_rate[boat.stroke_rate]
+        return boat.playable_cards(), number_cards
 
     @staticmethod
     def discard_cards(boat: Boat, selected_cards: list):
@@ -177,9 +157,9 @@ class GameLogic:
         Remove selected cards from hand and sends them to dicard
         """
         for card in selected_cards:
-            if card in [1,2,3]:
-                boat.discard_pile.append(card)
-                boat.hand.remove(card)
+            if card < INSTABILITY:
+                boat.deck.discard(card)
+                boat.remove_card(card)
     
     # ------ MOVEMENT ------ 
     @staticmethod
@@ -190,45 +170,43 @@ class GameLogic:
         spaces_moved = 0
 
         for card in played_cards:
-            if isinstance(card, int):
+            if card < INSTABILITY:
                 spaces_moved += card
-            elif card == "i":
-                if not boat.draw_pile:
-                    if boat.discard_pile:
-                        boat.draw_pile = boat.discard_pile[:]
-                        boat.discard_pile = []
-                        random.shuffle(boat.draw_pile)
-                    else:
-                        spaces_moved += 0
+            elif card == INSTABILITY:
+                flipped = boat.deck.draw()
+                if flipped is None:
+                    # Nothing left to flip
+                    continue
 
-                flipped = boat.draw_pile.pop(0)
-                boat.discard_pile.append(flipped)
-                if isinstance(flipped, int):
+                boat.deck.discard(flipped)
+                if flipped < INSTABILITY:
                     spaces_moved += flipped
                 else:
-                    spaces_moved += random.randint(1,2)
+                    spaces_moved += boat.rng.randint(1,2)
 
         GameLogic.discard_cards(boat, played_cards)
         return spaces_moved
 
     @staticmethod
-    def check_split_limit(boat: Boat, pace_this_turn: int, limits: dict):
+    def check_split_limit(boat: Boat, pace_this_turn: int):
         """
         Check if a boat passed a split limit too fast.
         """
+        rules = boat.rules
         next_pos = boat.position + pace_this_turn
 
         # Find if boat just crossed a split, above the speed
-        for split_loc, split_limit in limits.items():
-            if boat.position < split_loc <= next_pos:
-                if pace_this_turn > split_limit:
-                    excess = pace_this_turn - split_limit
+        i = rules.next_split[min(boat.position, rules.venue_length)]
+        while i < len(rules.split_locs) and rules.split_locs[i] <= next_pos:
+            if pace_this_turn > rules.split_limits[i]:
+                excess = pace_this_turn - rules.split_limits[i]
 
-                    # Check if boat can afford stamina penality
-                    if len(boat.stamina_pile) >= excess:
-                        return "tired", excess
-                    else:
-                        return "crab", split_loc
+                # Check if boat can afford stamina penality
+                if len(boat.stamina_pile) >= excess:
+                    return "tired", excess
+                else:
+                    return "crab", rules.split_locs[i]
+            i += 1
         return "passed", 0
     
     @staticmethod
@@ -236,12 +214,7 @@ class GameLogic:
         """
         Applies crab penalities.
         """
-        penalty_amount = 0
-        if boat.stroke_rate == 0 or boat.stroke_rate == 1:
-            penalty_amount = 1
-        else:
-            penalty_amount = 2
-                    
+        penalty_amount = boat.rules.crab_penalty[boat.stroke_rate]
         GameLogic.pay_stamina_cards(boat, penalty_amount)
         
         boat.position = split_location - 1
@@ -253,7 +226,7 @@ class GameLogic:
         """
         Applies movement to the boat.
         """
-        boat.position = min(boat.position + movement, VENUE_LENGTH)
+        boat.position = min(boat.position + movement, boat.rules.venue_length)
 
     # ------ REPLENISH HAND ------
     @staticmethod
@@ -0,0 +1,176 @@
+import json
+import math
+import os
+import random
+import struct
+from src.engine.constants import COLORS, DIFFICULTIES, SPEEDS
+from src.engine.race_engine import NullEvents
+from src.engine.race_log import encode_rules, decode_rules, encode_keyframe, restore_keyframe, check_keyframe
+from src.engine.race_logic import GameLogic
+from src.engine.rng import race_rng
+
+# File format: magic, version, length of the JSON header (race settings, rules), the header,
+# the state of the race random stream, then the state of every boat in the race log keyframe format
+MAGIC = b"RRSAV"
+VERSION = 1
+HEADER = struct.Struct("<HI")
+# Mersenne Twister state of random.Random: version, 625 words, then the cached gauss value if any
+RANDOM_STATE = struct.Struct("<B625I?d")
+
+# Race saved at the end of every round of a played race, removed when the race is over
+AUTOSAVE_PATH = "autosave.rrsave"
+
+# Settings of a save, passed as they are to the game controllers
+SETTING_KEYS = ("chosen_colors", "seed", "difficulty", "speed", "turn_time")
+
+
+class RaceSave:
+    """
+    Complete state of a race between two rounds: race settings, rules, random stream and every boat.
+    Restoring it on the boats of the same race goes on exactly where the race stopped.
+    Settings are the GameController arguments: chosen_colors, seed, difficulty, speed and turn_time.
+    """
+    def __init__(self, settings, rules, random_state, boats_state):
+        self.settings = settings
+        self.rules = rules
+        self.random_state = random_state
+        # Rounds played and boat states, in the keyframe format of src/engine/race_log.py
+        self.boats_state = boats_state
+
+    @staticmethod
+    def capture(settings, boats, rounds):
+        return RaceSave(settings, boats[0].rules, boats[0].rng.getstate(), encode_keyframe(rounds, boats))
+
+    @property
+    def rounds(self):
+        return struct.unpack_from("<H", self.boats_state)[0]
+
+    def restore(self, boats):
+        """
+        Put the saved state on boats created for the race and the random stream they share.
+        """
+        restore_keyframe(self.boats_state, boats)
+        boats[0].rng.setstate(self.random_state)
+
+    def create_boats(self):
+        """
+        Boats of the saved race, in the saved state.
+        """
+        boats = GameLogic.create_boat(self.settings["chosen_colors"], race_rng(self.settings["seed"]), self.rules)
+        self.restore(boats)
+        return boats
+
+    # ------ FILES ------
+    def to_bytes(self):
+        header = json.dumps({**self.settings, "rules": encode_rules(self.rules)}).encode()
+        version, words, gauss = self.random_state
+        random_state = RANDOM_STATE.pack(version, *words, gauss is not None, gauss or 0.0)
+        return MAGIC + HEADER.pack(VERSION, len(header)) + header + random_state + self.boats_state
+
+    def save(self, path):
+        """
+        Write the save next to the file and swap them, a crash while saving keeps the previous save.
+        """
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def from_bytes(data):
+        """
+        Save read from bytes, None if they are not a valid save.
+        """
+        if not data.startswith(MAGIC) or len(data) < len(MAGIC) + HEADER.size:
+            return None
+        offset = len(MAGIC)
+        version, header_length = HEADER.unpack_from(data, offset)
+        if version != VERSION:
+            return None
+        offset += HEADER.size
+
+        # Anything missing or out of range makes the whole save invalid, it is never half restored
+        try:
+            header = json.loads(data[offset:offset + header_length])
+            offset += header_length
+            values = RANDOM_STATE.unpack_from(data, offset)
+            offset += RANDOM_STATE.size
+
+            rules = decode_rules(header.pop("rules"))
+            boats_state = data[offset:]
+            if not check_keyframe(boats_state, rules) or not RaceSave.check_settings(header, rules, boats_state):
+                return None
+            random_state = (values[0], values[1:626], values[627] if values[626] else None)
+            random.Random().setstate(random_state)
+        except (ValueError, TypeError, KeyError, AttributeError, struct.error):
+            return None
+        return RaceSave(header, rules, random_state, boats_state)
+
+    @staticmethod
+    def check_settings(settings, rules, boats_state):
+        """
+        True if the game controllers can start the race of the settings, with as many boats as the saved ones.
+        """
+        if sorted(settings) != sorted(SETTING_KEYS):
+            return False
+        colors = settings["chosen_colors"]
+        players = [color for color in colors if color != "No more players"]
+        if not isinstance(colors, list) or any(color not in COLORS for color in players) or len(set(players)) < len(players):
+            return False
+        if len(players) > rules.lanes or struct.unpack_from("<HB", boats_state)[1] != rules.lanes:
+            return False
+        seed, turn_time = settings["seed"], settings["turn_time"]
+        if not isinstance(seed, int) or isinstance(seed, bool):
+            return False
+        if turn_time is not None and (not isinstance(turn_time, (int, float)) or isinstance(turn_time, bool) or not 0 < turn_time < math.inf):
+            return False
+        return settings["difficulty"] in DIFFICULTIES and settings["speed"] in SPEEDS
+
+    @staticmethod
+    def load(path):
+        """
+        Read a save file, returns None if there is none or it is not a valid save.
+        """
+        try:
+            with open(path, "rb") as f:
+                return RaceSave.from_bytes(f.read())
+        except FileNotFoundError:
+            return None
+
+
+class AutoSave(NullEvents):
+    """
+    Event sink that saves the race at the end of every round and passes every event to another sink.
+    The save is removed once the race is over, so only unfinished races can be resumed.
+    """
+    def __init__(self, path, settings, boats, events = None, rounds = 0):
+        self.events = events if events is not None else NullEvents()
+        self.path = path
+        self.settings = settings
+        self.boats = boats
+        self.rounds = rounds
+
+    def turn_started(self, boat):
+        self.events.turn_started(boat)
+
+    def turn_event(self, boat, event):
+        self.events.turn_event(boat, event)
+
+    def choice_made(self, boat, choice, values):
+        self.events.choice_made(boat, choice, values)
+
+    def turn_finished(self, boat, status, split_loc):
+        self.events.turn_finished(boat, status, split_loc)
+
+    def bonus(self, boats, event):
+        self.events.bonus(boats, event)
+
+    def round_finished(self, boats):
+        self.rounds += 1
+        RaceSave.capture(self.settings, self.boats, self.rounds).save(self.path)
+        self.events.round_finished(boats)
+
+    def race_finished(self, boats):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.events.race_finished(boats)
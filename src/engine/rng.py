@@ -0,0 +1,14 @@
+import random
+
+def new_seed():
+    """
+    Pick a master seed for a race or a simulation run.
+    """
+    return random.SystemRandom().randrange(2**32)
+
+def race_rng(seed, race_index = 0, stream = "race"):
+    """
+    Random stream owned by a single race, created from a master seed and the race index.
+    Seeding from a string is stable across processes and Python runs, so any race of a sweep can be re-run alone.
+    """
+    return random.Random(f"{seed}:{stream}:{race_index}")
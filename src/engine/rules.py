@@ -0,0 +1,87 @@
+from dataclasses import dataclass, field, replace
+from src.engine.constants import (
+    VENUE_LENGTH, LANES, PACE_CARDS, INSTABILITY_CARDS, STAMINA_CARDS, HAND_LIMIT,
+    SPLITS, METERS, AGGRESSION_PROFILES, INSTABILITY
+)
+from src.engine.hand_table import hand_table
+
+@dataclass(frozen=True)
+class RuleSet:
+    """
+    Immutable game parameters, compiled once into lookup tables used by the engine, NPCs and renderer.
+    Rule variants are new RuleSets, so many of them can run in one process.
+    """
+    venue_length: int = VENUE_LENGTH
+    splits: tuple = tuple(SPLITS.items())
+    pace_cards: tuple = tuple(PACE_CARDS)
+    instability_cards: int = len(INSTABILITY_CARDS)
+    stamina_cards: int = len(STAMINA_CARDS)
+    hand_limit: int = HAND_LIMIT
+    cards_per_rate: tuple = (1, 2, 4)
+    crab_penalty: tuple = (1, 1, 2)
+    aggression: tuple = tuple(AGGRESSION_PROFILES.items())
+    default_aggression: float = 0.40
+    lanes: int = len(LANES)
+    meters_per_space: int = 20
+    meters: tuple = tuple(METERS.items())
+
+    # ------ COMPILED TABLES ------
+    rates: tuple = field(init=False, repr=False, compare=False)
+    deck: tuple = field(init=False, repr=False, compare=False)
+    split_locs: tuple = field(init=False, repr=False, compare=False)
+    split_limits: tuple = field(init=False, repr=False, compare=False)
+    split_aggression: tuple = field(init=False, repr=False, compare=False)
+    next_split: bytes = field(init=False, repr=False, compare=False)
+    hand_table: object = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Accept dicts for splits and aggression, always kept sorted by location
+        splits = tuple(sorted(dict(self.splits).items()))
+        aggression = tuple(sorted(dict(self.aggression).items()))
+        object.__setattr__(self, "splits", splits)
+        object.__setattr__(self, "aggression", aggression)
+        object.__setattr__(self, "pace_cards", tuple(self.pace_cards))
+        object.__setattr__(self, "cards_per_rate", tuple(self.cards_per_rate))
+        object.__setattr__(self, "crab_penalty", tuple(self.crab_penalty))
+
+        profiles = dict(aggression)
+        object.__setattr__(self, "rates", tuple(range(len(self.cards_per_rate))))
+        object.__setattr__(self, "deck", self.pace_cards + (INSTABILITY,) * self.instability_cards)
+        object.__setattr__(self, "split_locs", tuple(loc for loc, _ in splits))
+        object.__setattr__(self, "split_limits", tuple(limit for _, limit in splits))
+        object.__setattr__(self, "split_aggression", tuple(profiles.get(loc, self.default_aggression) for loc, _ in splits))
+
+        # Index of the next split ahead of every position, len(splits) past the last one
+        next_split = bytearray(self.venue_length + 1)
+        i = 0
+        for position in range(self.venue_length + 1):
+            while i < len(splits) and splits[i][0] <= position:
+                i += 1
+            next_split[position] = i
+        object.__setattr__(self, "next_split", bytes(next_split))
+
+        object.__setattr__(self, "hand_table", hand_table(self.hand_limit, self.cards_per_rate))
+
+    def with_splits(self, splits):
+        """
+        Same rules with other split locations and limits.
+        """
+        return replace(self, splits=tuple(dict(splits).items()))
+
+    def first_split(self, position, movement):
+        """
+        Index of the first split crossed by a movement, None if there is none.
+        """
+        i = self.next_split[min(position, self.venue_length)]
+        if i < len(self.split_locs) and self.split_locs[i] <= position + movement:
+            return i
+        return None
+
+    def split_meters(self, i):
+        """
+        Distance label of a split.
+        """
+        loc = self.split_locs[i]
+        return dict(self.meters).get(loc, f"{loc * self.meters_per_space}m")
+
+DEFAULT_RULES = RuleSet()
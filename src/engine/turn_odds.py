@@ -0,0 +1,92 @@
+from fractions import Fraction
+from src.engine.constants import INSTABILITY
+from src.engine.boat import Boat
+from src.engine.race_logic import GameLogic
+
+class TurnOdds:
+    """
+    Exact odds of a turn, without playing it.
+    The only randomness of calculate_movement is the cards flipped by instability cards: they are drawn
+    without replacement from the draw pile, and from the discard pile once it runs out.
+    Every possible flip is enumerated with its probability instead of sampling turns.
+    Probabilities are floats, or Fractions with exact=True.
+    """
+    @staticmethod
+    def flip_distribution(draw, discard, flips, exact = False):
+        """
+        Distribution of the spaces added by a number of instability flips, as {spaces: probability}.
+        Draw and discard are card counts by code. Flipped cards go to the discard pile, and the discard pile
+        becomes the draw pile when the draw pile is empty, like Deck.draw.
+        """
+        one = Fraction(1) if exact else 1.0
+        half = one / 2
+        memo = {}
+
+        def spread(draw, discard, flips):
+            """
+            Distribution of the remaining flips from these piles.
+            """
+            key = (draw, discard, flips)
+            if key in memo:
+                return memo[key]
+            if flips == 0:
+                return {0: one}
+
+            total = sum(draw)
+            if not total:
+                if not sum(discard):
+                    # Nothing left to flip, like calculate_movement
+                    return {0: one}
+                draw, discard, total = discard, draw, sum(discard)
+
+            result = {}
+            for card, count in enumerate(draw):
+                if not count:
+                    continue
+                p = Fraction(count, total) if exact else count / total
+                next_draw = draw[:card] + (count - 1,) + draw[card + 1:]
+                next_discard = discard[:card] + (discard[card] + 1,) + discard[card + 1:]
+                rest = spread(next_draw, next_discard, flips - 1)
+
+                # Pace cards add their value, other cards 1 or 2 spaces
+                gains = [(card, p)] if card < INSTABILITY else [(1, p * half), (2, p * half)]
+                for gain, q in gains:
+                    for spaces, r in rest.items():
+                        result[gain + spaces] = result.get(gain + spaces, 0) + q * r
+            memo[key] = result
+            return result
+
+        return spread(tuple(draw), tuple(discard), flips)
+
+    @staticmethod
+    def movement_distribution(boat: Boat, played_cards: list, exact = False):
+        """
+        Distribution of the movement calculate_movement gives for these cards, as {movement: probability}.
+        The boat is not changed.
+        """
+        base = sum(card for card in played_cards if card < INSTABILITY)
+        flips = sum(1 for card in played_cards if card == INSTABILITY)
+        distribution = TurnOdds.flip_distribution(boat.deck.draw_counts, boat.deck.discard_counts, flips, exact)
+        return {base + spaces: p for spaces, p in sorted(distribution.items())}
+
+    @staticmethod
+    def split_outcomes(boat: Boat, played_cards: list, exact = False):
+        """
+        Distribution of the check_split_limit results of these cards, as {(status, info): probability}.
+        Info is the stamina paid when tired and the split location of a crab, like check_split_limit.
+        """
+        outcomes = {}
+        for movement, p in TurnOdds.movement_distribution(boat, played_cards, exact).items():
+            outcome = GameLogic.check_split_limit(boat, movement)
+            outcomes[outcome] = outcomes.get(outcome, 0) + p
+        return outcomes
+
+    @staticmethod
+    def status_odds(boat: Boat, played_cards: list, exact = False):
+        """
+        Probability of every split status ("passed", "tired", "crab") with these cards.
+        """
+        odds = {"passed": 0, "tired": 0, "crab": 0}
+        for (status, _), p in TurnOdds.split_outcomes(boat, played_cards, exact).items():
+            odds[status] += p
+        return odds
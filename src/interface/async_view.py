@@ -0,0 +1,100 @@
+from src.engine.boat import Boat
+from src.engine.constants import RATES
+from src.interface.draw import clear_screen, show_screen, draw_header, draw_venue, draw_leaderboard, stroke_rate_name, card_faces
+from src.interface.interaction import interactive_selection_async, wait_for_key_async
+from src.interface.view import GameView
+
+class AsyncGameView:
+    """
+    Same screens as GameView for the asyncio controller.
+    Prompts take an optional timeout and return None when it runs out.
+    """
+    @staticmethod
+    async def render_game_screen(boats, title = "Redline Regatta", delay = 5):
+        """Draw venue and leaderbord, shown for some seconds or until a key is pressed."""
+        clear_screen()
+        draw_venue(boats)
+        draw_leaderboard(sorted(boats,key=lambda x: (x.round, -x.position, -x.stroke_rate)), title)
+        show_screen()
+        await wait_for_key_async(delay)
+
+    @staticmethod
+    async def show_message(title_msg, color = None, delay = 1):
+        """Show a notification for some seconds without asking to continue, a key press skips it."""
+        clear_screen()
+        draw_header(title_msg, color)
+        show_screen()
+        await wait_for_key_async(delay)
+
+    @staticmethod
+    async def show_player_turn(boat: Boat, timeout = None):
+        """Show next player playing."""
+        title_msg = f"{boat.name}'s Turn (Pos: {boat.position * 20}m | Rate: {stroke_rate_name(boat.stroke_rate)})"
+        await interactive_selection_async(["Continue"], "vertical", title_msg, boat.color, timeout)
+
+        # Show stats if not player is not a npc
+        if not boat.is_npc:
+            title_msg = f"{boat.name}'s (Pos: {boat.position * 20}m | Rate: {stroke_rate_name(boat.stroke_rate)} | Hand: {card_faces(boat.sorted_hand())} | Stamina: {len(boat.stamina_pile)})"
+            await interactive_selection_async(["Continue"], "vertical", title_msg, boat.color, timeout)
+
+    @staticmethod
+    async def get_sroke_rate(boat: Boat, timeout = None):
+        """Show stroke rates available."""
+        options = RATES
+        title_msg = f"Current Rate: {stroke_rate_name(boat.stroke_rate)}. Select target rate for this round."
+        choice_idx = await interactive_selection_async(stroke_rate_name(options), "vertical", title_msg, boat.color, timeout)
+        return None if choice_idx is None else options[choice_idx]
+
+    @staticmethod
+    async def get_card_to_play(boat: Boat, available_cards: list, cards_selected: list, cards_needed: int, timeout = None):
+        """Show available cards and counter of how many were choosen."""
+        title_msg = f"Select Card {len(cards_selected) + 1}/{cards_needed}:"
+        choice_idx = await interactive_selection_async(card_faces(available_cards), "horizontal", title_msg, boat.color, timeout)
+        return None if choice_idx is None else available_cards[choice_idx]
+
+    @staticmethod
+    async def choose_to_discard_cards(boat: Boat, timeout = None):
+        """Ask if user wants to discard cards."""
+        options = ["Discard", "No discard"]
+        choice_idx = await interactive_selection_async(options, "vertical", "Discard any cards?", boat.color, timeout)
+        return None if choice_idx is None else options[choice_idx]
+
+    @staticmethod
+    async def get_card_to_discard(boat: Boat, available_cards: list, timeout = None):
+        """Show available cards and allow card discard."""
+        options = card_faces(available_cards) + ["Done"]
+        choice_idx = await interactive_selection_async(options, "horizontal", "Select cards to discard:", boat.color, timeout)
+        if choice_idx is None:
+            return None
+        if choice_idx == len(available_cards):
+            return "Done"
+        return available_cards[choice_idx]
+
+    @staticmethod
+    async def choose_motivation(current_boat, boat_ahead, timeout = None):
+        """Ask if user wants to use Motivation bonus."""
+        options = ["Activate Motivation (+2 Spaces, Cost 1 Stamina)", "Hold Position"]
+        title_msg = f"MOTIVATION: {current_boat.name} is passing {boat_ahead.name}! Activate bonus {current_boat.name}?"
+        choice_idx = await interactive_selection_async(options, "vertical", title_msg, current_boat.color, timeout)
+        return None if choice_idx is None else options[choice_idx]
+
+    @staticmethod
+    async def show_event(boat: Boat, event, delay = None, timeout = None):
+        """
+        Shows player clusterand hand notification, failed stroke rate jumps and attempts to pass pace limits.
+        Waits for "Continue" unless a delay is given.
+        """
+        title_msg = GameView.event_message(boat, event)
+        if delay is not None:
+            await AsyncGameView.show_message(title_msg, boat.color, delay)
+        else:
+            await interactive_selection_async(["Continue"], "vertical", title_msg, boat.color, timeout)
+
+    @staticmethod
+    async def show_bonus(boats, event, delay = None, timeout = None):
+        """Show end-of-round bonus notifications, waits for "Continue" unless a delay is given."""
+        title_msg = GameView.bonus_message(boats, event)
+        if delay is not None:
+            await AsyncGameView.show_message(title_msg, delay=delay)
+        else:
+            await interactive_selection_async(["Continue"], "vertical", title_msg, timeout=timeout)
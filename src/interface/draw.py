@@ -1,14 +1,19 @@
-import os
+from src.engine.constants import CARD_FACES
+from src.interface.renderer import screen
 
 def clear_screen():
-    """Clear screen."""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    """Start a new frame, lines of the previous one not drawn again are erased when it is shown."""
+    screen.begin()
+
+def show_screen():
+    """Send the changes of the frame to the terminal."""
+    screen.present()
 
 def get_terminal_with():
-    """Obtains terminal width."""
-    return os.get_terminal_size()[0]    
+    """Obtains terminal width, cached until the terminal is resized."""
+    return screen.size()[0]
 
-def draw_header(title):
+def draw_header(title, color=None):
     """
     Draw a centred header using the terminal size.
     """
@@ -30,9 +35,12 @@ def draw_header(title):
         padding2 = " " * padding_required2     
 
     # Print header
-    print("")
-    print(padding + title)
-    print(padding2 + ("─" * bar_length))
+    screen.print("")
+    if color == None:
+        screen.print(padding + title)
+    else:
+        screen.print(f"{padding}{color}{title}\033[0m")
+    screen.print(padding2 + ("─" * bar_length))
 
 def draw_options(options, selected_index, color=None):
     """
@@ -54,10 +62,10 @@ def draw_options(options, selected_index, color=None):
     for i, option in enumerate(options):
         if i == selected_index:
             text = f"➤ {option.upper()}"
-            print(f"{padding}{color}{text}\033[0m")
+            screen.print(f"{padding}{color}{text}\033[0m")
         else:
             text = f"  {option}"
-            print(f"{padding}{text}")
+            screen.print(f"{padding}{text}")
 
 def draw_cards(options, selected_index, color=None):
     """Finds the total size of the options in the screen and center them."""
@@ -91,15 +99,29 @@ def draw_cards(options, selected_index, color=None):
     padding = " " * margin
 
     full_row = spacing.join(colored_cards)
-    print(f"\n{padding}{full_row}\n")
-
-def draw_venue(boats, venue_length=100):
+    screen.print(f"\n{padding}{full_row}\n")
+
+def split_labels(rules, scale):
+    """Builds the split marker, distance and pace limit lines under the lanes."""
+    lines = ["", "", ""]
+    for i, loc in enumerate(rules.split_locs):
+        col = max(0, int(loc * scale) - 1)
+        texts = ["^", rules.split_meters(i), f"PL: {rules.split_limits[i]}"]
+        for n, text in enumerate(texts):
+            # Keep a space between labels of close splits
+            start = max(col, len(lines[n]) + 1) if lines[n] else col
+            lines[n] += " " * (start - len(lines[n])) + text
+    return lines
+
+
+def draw_venue(boats):
     """Draws the lanes for the race and the boats in the correct position."""
-    clear_screen()
+    rules = boats[0].rules
+    venue_length = rules.venue_length
     width = get_terminal_with()
 
     if width < 40:
-        print("Please widen your terminal to view the race!")
+        screen.print("Please widen your terminal to view the race!")
         return
 
     lane_size = int(width * 0.8)
@@ -109,11 +131,11 @@ def draw_venue(boats, venue_length=100):
     padding = " " * padding_required
 
     header_text = "REDLINE VENUE"
-    print("\n" + " " * (padding_required + (lane_size // 2) - (len(header_text) // 2)) + header_text)
+    screen.print("\n" + " " * (padding_required + (lane_size // 2) - (len(header_text) // 2)) + header_text)
     
     # Draw lanes and boat position
     for b in boats:
-        print(padding + ("─" * lane_size))
+        screen.print(padding + ("─" * lane_size))
 
         pos_index = int(b.position * scale)
         pos_index = max(0, min(pos_index, lane_size - 1))
@@ -121,13 +143,12 @@ def draw_venue(boats, venue_length=100):
         visual_pos = " " * pos_index
         finish_marker = "" if b.position < venue_length else " ★"
 
-        print(f"{padding}{visual_pos}{b.color}●{finish_marker}\033[0m")
+        screen.print(f"{padding}{visual_pos}{b.color}●{finish_marker}\033[0m")
     
     # Draw final bondary
-    print(padding + ("─" * lane_size))
-    print(padding + (" " * ((lane_size // 4) - 1)) + "^" + (" " * ((lane_size // 4) - 1)) + "^" + (" " * ((lane_size // 4) - 1)) + "^" + (" " * ((lane_size // 8) - 1)) + "^")
-    print(padding + (" " * ((lane_size // 4) - 1)) + "500m" + (" " * ((lane_size // 4) - 4)) + "1000m" + (" " * ((lane_size // 4) - 5)) + "1500m" + (" " * ((lane_size // 8) - 5)) + "1750m")
-    print(padding + (" " * ((lane_size // 4) - 1)) + "PL: 7" + (" " * ((lane_size // 4) - 5)) + "PL: 7" + (" " * ((lane_size // 4) - 5)) + "PL: 6" + (" " * ((lane_size // 8) - 5)) + "PL: 5")
+    screen.print(padding + ("─" * lane_size))
+    for line in split_labels(rules, scale):
+        screen.print(padding + line)
 
 
 def draw_leaderboard(positions, title):
@@ -145,10 +166,10 @@ def draw_leaderboard(positions, title):
     padding_bar = " " * padding__bar_required
 
     # Print header
-    print("")
-    print(padding_bar + ("─" * bar_length))
-    print(padding + title)
-    print(padding_bar + ("─" * bar_length))
+    screen.print("")
+    screen.print(padding_bar + ("─" * bar_length))
+    screen.print(padding + title)
+    screen.print(padding_bar + ("─" * bar_length))
 
     show_turns = "Finish" in title or "Final" in title
 
@@ -159,7 +180,7 @@ def draw_leaderboard(positions, title):
 
     for i, b in enumerate(positions):
         text = f"Turns: {b.turn}" if show_turns else f"Dist: {b.position * 20}m"
-        print(f"{padding}{b.color}{i+1}. {b.name:<8} {text}\033[0m")
+        screen.print(f"{padding}{b.color}{i+1}. {b.name:<8} {text}\033[0m")
 
 def stroke_rate_name(stroke_rate):
     """Change appearence of stroke rate from numbers to the corresponding spm rate."""
@@ -171,4 +192,8 @@ def stroke_rate_name(stroke_rate):
         else:
             return "45 spm"
     elif type(stroke_rate) == list:
-        return ["35 spm", "40 spm", "45 spm"]
\ No newline at end of file
+        return ["35 spm", "40 spm", "45 spm"]
+
+def card_faces(cards):
+    """Change appearence of cards from card codes to the values and letters shown in the hand."""
+    return [CARD_FACES[c] for c in cards]
\ No newline at end of file
@@ -1,72 +1,41 @@
+import asyncio
+import math
 import sys
-from src.interface.draw import draw_header, draw_options, draw_cards
+from src.interface.draw import clear_screen, show_screen, draw_header, draw_options, draw_cards
+from src.interface.keyboard import keyboard
 
-# Detect OS for key handling
-try:
-    import msvcrt # Windows
-    WINDOWS = True
-except ImportError:
-    import tty, termios # Mac/Linux
-    WINDOWS = False
+# Seconds between redraws of a selection countdown
+COUNTDOWN_STEP = 1
 
 def get_key(mode):
     """
-    Captures a single key press and filter based on mode
+    Next key press from the keyboard session and filter based on mode
     mode = "vertical": up, down and enter keys.
     mode = "horizontal": left, right and enter keys.
+    Other keys return None.
     """
-    key_pressed = None
-
-    if WINDOWS:
-        key = msvcrt.getch()
-        if key in [b'\x00', b'\xe0']:
-            key = msvcrt.getch()
-            mapping = {
-                b'H': 'up', 
-                b'P': 'down', 
-                b'K': 'left', 
-                b'M': 'right'
-            }
-            key_pressed = mapping.get(key)
-        elif key in [b'\r', b'\n']:
-            key_pressed = 'enter'
-    else:
-        fd = sys.stdin.fileno()
-        old_settings = termios.tcgetattr(fd)
-        try:
-            tty.setraw(sys.stdin.fileno())
-            ch = sys.stdin.read(1)
-            
-            # Check for escape sequences (start of an arrow key)
-            if ch == '\x1b':
-                seq = sys.stdin.read(2)
-                mapping = {
-                    '[A': 'up', 
-                    '[B': 'down', 
-                    '[C': 'right', 
-                    '[D': 'left'
-                }
-                key_pressed = mapping.get(seq)
-            # Check for Enter/Return
-            elif ch in ('\r', '\n'):
-                key_pressed = 'enter'
-            
-        finally:
-            termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
+    key_pressed = keyboard.get_key()
 
     # Filter by mode
     if mode == "vertical":
         if key_pressed in ['up', 'down', 'enter']:
-            return key_pressed 
-        else:
-            None
+            return key_pressed
+        return None
     if mode == "horizontal":
         if key_pressed in ['left', 'right', 'enter']:
-            return key_pressed 
-        else:
-            None
+            return key_pressed
+        return None
     return key_pressed
 
+def wait_for_key(seconds):
+    """
+    Wait some seconds, a key press ends the wait early.
+    Returns True if a key was pressed.
+    """
+    if seconds <= 0:
+        return False
+    return keyboard.get_key(timeout=seconds) is not None
+
 def interactive_selection(options, type, title, color=None):
     """
     Allows interactive selection by capturing allowed keys entered. 
@@ -78,11 +47,12 @@ def interactive_selection(options, type, title, color=None):
 
     try:
         while True:
-            sys.stdout.write("\033[H\033[J") 
+            clear_screen()
             draw_header(title)
 
             if type == "vertical": 
                 draw_options(options, current_idx, color)
+                show_screen()
                 key = get_key(type)
                 if key == 'up':
                     current_idx = (current_idx - 1) % len(options)
@@ -93,6 +63,7 @@ def interactive_selection(options, type, title, color=None):
                 
             elif type == "horizontal":
                 draw_cards(options, current_idx, color)
+                show_screen()
                 key = get_key(type)
                 if key == 'left':
                     current_idx = (current_idx - 1) % len(options)
@@ -100,9 +71,54 @@ def interactive_selection(options, type, title, color=None):
                     current_idx = (current_idx + 1) % len(options)
                 elif key == 'enter':
                     return current_idx
-            
-            sys.stdout.flush()
 
     finally:
         sys.stdout.write("\033[?25h")
-        sys.stdout.flush()
\ No newline at end of file
+        sys.stdout.flush()
+
+async def wait_for_key_async(seconds):
+    """
+    Same as wait_for_key without blocking the asyncio loop.
+    """
+    if seconds is None or seconds <= 0:
+        return False
+    return await keyboard.get_key_async(timeout=seconds) is not None
+
+async def interactive_selection_async(options, type, title, color=None, timeout=None):
+    """
+    Same as interactive_selection without blocking the asyncio loop.
+    With a timeout the seconds left are shown in the title, returns None if the time runs out.
+    """
+    loop = asyncio.get_running_loop()
+    end = None if timeout is None else loop.time() + timeout
+    moves = {"vertical": ("up", "down"), "horizontal": ("left", "right")}[type]
+    current_idx = 0
+    sys.stdout.write("\033[?25l")
+    sys.stdout.flush()
+
+    try:
+        while True:
+            left = None if end is None else end - loop.time()
+            if left is not None and left <= 0:
+                return None
+
+            clear_screen()
+            draw_header(title if left is None else f"{title} [{math.ceil(left)}s]")
+            if type == "vertical":
+                draw_options(options, current_idx, color)
+            else:
+                draw_cards(options, current_idx, color)
+            show_screen()
+
+            # Wake up every second to redraw the countdown
+            key = await keyboard.get_key_async(timeout=None if left is None else min(left, COUNTDOWN_STEP))
+            if key == moves[0]:
+                current_idx = (current_idx - 1) % len(options)
+            elif key == moves[1]:
+                current_idx = (current_idx + 1) % len(options)
+            elif key == 'enter':
+                return current_idx
+
+    finally:
+        sys.stdout.write("\033[?25h")
+        sys.stdout.flush()
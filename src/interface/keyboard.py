@@ -0,0 +1,267 @@
+import asyncio
+import atexit
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+
+# Detect OS for key handling
+try:
+    import msvcrt # Windows
+    WINDOWS = True
+except ImportError:
+    import termios, select # Mac/Linux
+    WINDOWS = False
+
+# Escape sequences of the keys used by the game, "O" variants are sent in application cursor mode
+SEQUENCES = {
+    "\x1b[A": "up", "\x1bOA": "up",
+    "\x1b[B": "down", "\x1bOB": "down",
+    "\x1b[C": "right", "\x1bOC": "right",
+    "\x1b[D": "left", "\x1bOD": "left"
+}
+WINDOWS_KEYS = {b'H': 'up', b'P': 'down', b'K': 'left', b'M': 'right'}
+
+# Put on the key queue by the reader at the end of input, it stays there for every later read
+END_OF_INPUT = object()
+
+def decode_keys(buffer, complete = False):
+    """
+    Split the characters read from the terminal into key names.
+    Returns the keys and the start of an escape sequence still incomplete,
+    unless complete is True and a lone escape is taken as the escape key.
+    """
+    keys = []
+    i = 0
+    while i < len(buffer):
+        ch = buffer[i]
+        if ch == "\x1b":
+            if i + 1 == len(buffer) and not complete:
+                break
+            if i + 1 < len(buffer) and buffer[i + 1] in "[O":
+                # Sequences end with a letter or "~", parameters like "1;5" come before it
+                end = i + 2
+                while end < len(buffer) and not ("@" <= buffer[end] <= "~"):
+                    end += 1
+                if end == len(buffer):
+                    if not complete:
+                        break
+                    end -= 1
+                seq = buffer[i:end + 1]
+                keys.append(SEQUENCES.get(seq[:2] + seq[-1], seq))
+                i = end + 1
+                continue
+            keys.append("escape")
+        elif ch in ("\r", "\n"):
+            keys.append("enter")
+        else:
+            keys.append(ch)
+        i += 1
+    return keys, buffer[i:]
+
+
+class KeyboardSession:
+    """
+    Keeps the terminal in raw input mode for the whole game and reads keys on a background thread.
+    Key presses are decoded into a queue, so keys typed between frames are never lost.
+    Output processing and Ctrl+C keep working, the terminal is restored on exit or signal.
+    Asyncio readers are woken by the reader thread through their loop, they never poll the queue.
+    """
+    def __init__(self, stream = None):
+        self.stream = stream if stream is not None else sys.stdin
+        self.keys = queue.Queue()
+        self.running = False
+        self.closed = False
+        self.reader = None
+        # (loop, event) of every asyncio reader waiting for a key, set from the reader thread
+        self.waiters = set()
+        self.waiters_lock = threading.Lock()
+        self.old_settings = None
+        self.old_handlers = {}
+
+    # ------ SESSION ------
+    def start(self):
+        """
+        Switch the terminal to raw input and start the reader.
+        """
+        if self.running:
+            return self
+        self.running = True
+
+        if not WINDOWS and self.stream.isatty():
+            fd = self.stream.fileno()
+            self.old_settings = termios.tcgetattr(fd)
+            settings = termios.tcgetattr(fd)
+            settings[3] &= ~(termios.ICANON | termios.ECHO)
+            settings[6][termios.VMIN] = 1
+            settings[6][termios.VTIME] = 0
+            termios.tcsetattr(fd, termios.TCSADRAIN, settings)
+
+            atexit.register(self.stop)
+            for signum in (signal.SIGTERM, signal.SIGHUP):
+                try:
+                    self.old_handlers[signum] = signal.signal(signum, self.on_signal)
+                except ValueError:
+                    # Signal handlers can only be set from the main thread
+                    pass
+
+        self.reader = threading.Thread(target=self.read_windows if WINDOWS else self.read_posix, daemon=True)
+        self.reader.start()
+        return self
+
+    def stop(self):
+        """
+        Stop the reader and restore the terminal.
+        """
+        if not self.running:
+            return
+        self.running = False
+        if self.reader is not None and self.reader is not threading.current_thread():
+            self.reader.join(0.5)
+        self.reader = None
+
+        if self.old_settings is not None:
+            termios.tcsetattr(self.stream.fileno(), termios.TCSADRAIN, self.old_settings)
+            self.old_settings = None
+        for signum, handler in self.old_handlers.items():
+            signal.signal(signum, handler)
+        self.old_handlers = {}
+
+    def on_signal(self, signum, frame):
+        """
+        Restore the terminal before the process is ended by a signal.
+        """
+        self.stop()
+        os.kill(os.getpid(), signum)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ------ READERS ------
+    def read_posix(self):
+        fd = self.stream.fileno()
+        buffer = ""
+        while self.running:
+            ready, _, _ = select.select([fd], [], [], 0.05)
+            if not ready:
+                # Nothing followed an escape character, it was the escape key
+                if buffer:
+                    keys, buffer = decode_keys(buffer, complete=True)
+                    self.put(keys)
+                continue
+
+            data = os.read(fd, 64)
+            if not data:
+                # End of input, like a closed pipe or a hung up terminal: readers are told instead of waiting forever
+                self.closed = True
+                self.keys.put(END_OF_INPUT)
+                self.wake()
+                break
+            keys, buffer = decode_keys(buffer + data.decode(errors="ignore"))
+            self.put(keys)
+
+    def read_windows(self):
+        while self.running:
+            if not msvcrt.kbhit():
+                time.sleep(0.01)
+                continue
+
+            key = msvcrt.getch()
+            if key in [b'\x00', b'\xe0']:
+                self.put([WINDOWS_KEYS.get(msvcrt.getch())])
+            elif key in [b'\r', b'\n']:
+                self.put(["enter"])
+            else:
+                self.put([key.decode(errors="ignore")])
+
+    def put(self, keys):
+        added = False
+        for key in keys:
+            if key:
+                self.keys.put(key)
+                added = True
+        if added:
+            self.wake()
+
+    def wake(self):
+        """
+        Tell the asyncio readers waiting that the queue has new keys.
+        """
+        with self.waiters_lock:
+            waiters = list(self.waiters)
+        for loop, ready in waiters:
+            try:
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:
+                # The loop of the reader was closed
+                pass
+
+    # ------ KEYS ------
+    def key_read(self, key):
+        """
+        Key taken from the queue, raises EOFError at the end of input like input().
+        """
+        if key is END_OF_INPUT:
+            self.keys.put(END_OF_INPUT)
+            raise EOFError("Keyboard input closed")
+        return key
+
+    def get_key(self, timeout = None):
+        """
+        Next key pressed, waits for it up to timeout seconds.
+        Returns None if no key was pressed in time, raises EOFError once the input is closed.
+        """
+        self.start()
+        try:
+            return self.key_read(self.keys.get(timeout=timeout))
+        except queue.Empty:
+            return None
+
+    async def get_key_async(self, timeout = None):
+        """
+        Same as get_key without blocking the asyncio loop, other tasks run while waiting.
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        end = None if timeout is None else loop.time() + timeout
+        ready = asyncio.Event()
+        waiter = (loop, ready)
+        with self.waiters_lock:
+            self.waiters.add(waiter)
+        try:
+            while True:
+                # Cleared before looking at the queue, so a key put in between still sets it
+                ready.clear()
+                try:
+                    return self.key_read(self.keys.get_nowait())
+                except queue.Empty:
+                    pass
+                left = None if end is None else end - loop.time()
+                if left is not None and left <= 0:
+                    return None
+                try:
+                    await asyncio.wait_for(ready.wait(), left)
+                except asyncio.TimeoutError:
+                    return None
+        finally:
+            with self.waiters_lock:
+                self.waiters.discard(waiter)
+
+    def flush(self):
+        """
+        Forget the keys pressed and not read yet, the end of input is kept.
+        """
+        while True:
+            try:
+                self.keys.get_nowait()
+            except queue.Empty:
+                break
+        if self.closed:
+            self.keys.put(END_OF_INPUT)
+
+keyboard = KeyboardSession()
@@ -0,0 +1,88 @@
+import re
+import shutil
+import signal
+import sys
+
+# Escape sequences don't take space on screen
+ANSI_CODE = re.compile(r"\033\[[0-9;?]*[A-Za-z]")
+
+class Renderer:
+    """
+    Double-buffered screen: frames are built in memory and only the lines that changed
+    since the previous frame are sent, with cursor moves, in a single write.
+    """
+    def __init__(self, stream = None):
+        self.stream = stream if stream is not None else sys.stdout
+        self.frame = []
+        self.shown = None
+        self.cached_size = None
+
+        # Refresh the terminal size only when it changes
+        if hasattr(signal, "SIGWINCH"):
+            try:
+                signal.signal(signal.SIGWINCH, self.resized)
+            except ValueError:
+                # Signal handlers can only be set from the main thread
+                pass
+
+    def resized(self, signum = None, frame = None):
+        """
+        Forget the terminal size and the shown frame, the next frame is drawn again whole.
+        """
+        self.cached_size = None
+        self.shown = None
+
+    def size(self):
+        """
+        Columns and rows of the terminal.
+        """
+        if self.cached_size is None:
+            self.cached_size = tuple(shutil.get_terminal_size((80, 24)))
+        return self.cached_size
+
+    def begin(self):
+        """
+        Start a new empty frame.
+        """
+        self.frame = []
+
+    def print(self, text = ""):
+        """
+        Add text to the frame, one screen line per text line.
+        """
+        self.frame.extend(str(text).split("\n"))
+
+    def present(self):
+        """
+        Show the frame, only writing the lines that differ from the frame on screen.
+        """
+        columns, rows = self.size()
+        frame = self.frame
+
+        # Frames that scroll or wrap can't be addressed by line, so they are drawn whole
+        height = sum(max(1, -(-len(ANSI_CODE.sub("", line)) // columns)) for line in frame)
+        if height != len(frame) or height >= rows:
+            self.stream.write("\033[H\033[2J" + "\n".join(frame) + "\n")
+            self.stream.flush()
+            self.shown = None
+            return
+
+        shown = self.shown if self.shown is not None else []
+        out = [] if self.shown is not None else ["\033[H\033[2J"]
+        for row, line in enumerate(frame):
+            if row >= len(shown) or shown[row] != line:
+                out.append(f"\033[{row + 1};1H{line}\033[K")
+
+        # Erase what is left below the frame and leave the cursor there
+        out.append(f"\033[{len(frame) + 1};1H\033[J")
+        self.stream.write("".join(out))
+        self.stream.flush()
+        self.shown = list(frame)
+
+    def invalidate(self):
+        """
+        Draw the next frame whole, after something else wrote on the terminal.
+        """
+        self.shown = None
+
+screen = Renderer()
@@ -1,17 +1,25 @@
-import time
 from src.engine.boat import Boat
 from src.engine.constants import RATES
-from src.interface.draw import clear_screen, draw_venue, draw_leaderboard, stroke_rate_name
-from src.interface.interaction import interactive_selection
+from src.interface.draw import clear_screen, show_screen, draw_header, draw_venue, draw_leaderboard, stroke_rate_name, card_faces
+from src.interface.interaction import interactive_selection, wait_for_key
 
 class GameView:
     @staticmethod
-    def render_game_screen(boats, title = "Redline Regatta"):
-        """Draw venue and leaderbord."""
+    def render_game_screen(boats, title = "Redline Regatta", delay = 5):
+        """Draw venue and leaderbord, shown for some seconds or until a key is pressed."""
         clear_screen()
         draw_venue(boats)
         draw_leaderboard(sorted(boats,key=lambda x: (x.round, -x.position, -x.stroke_rate)), title)
-        time.sleep(5)
+        show_screen()
+        wait_for_key(delay)
+
+    @staticmethod
+    def show_message(title_msg, color = None, delay = 1):
+        """Show a notification for some seconds without asking to continue, a key press skips it."""
+        clear_screen()
+        draw_header(title_msg, color)
+        show_screen()
+        wait_for_key(delay)
 
     @staticmethod
     def show_player_turn(boat: Boat):
@@ -21,7 +29,7 @@ class GameView:
 
         # Show stats if not player is not a npc
         if not boat.is_npc:
-            title_msg = f"{boat.name}'s (Pos: {boat.position * 20}m | Rate: {stroke_rate_name(boat.stroke_rate)} | Hand: {boat.hand} | Stamina: {len(boat.stamina_pile)})"
+            title_msg = f"{boat.name}'s (Pos: {boat.position * 20}m | Rate: {stroke_rate_name(boat.stroke_rate)} | Hand: {card_faces(boat.sorted_hand())} | Stamina: {len(boat.stamina_pile)})"
             interactive_selection(["Continue"], "vertical", title_msg, boat.color)
 
     @staticmethod
@@ -36,7 +44,7 @@ class GameView:
     def get_card_to_play(boat: Boat, available_cards: list, cards_selected: list, cards_needed: int):
         """Show available cards and counter of how many were choosen."""
         title_msg = f"Select Card {len(cards_selected) + 1}/{cards_needed}:"
-        choice_idx = interactive_selection(available_cards, "horizontal", title_msg, boat.color)
+        choice_idx = interactive_selection(card_faces(available_cards), "horizontal", title_msg, boat.color)
         return available_cards[choice_idx]
     
     @staticmethod
@@ -49,9 +57,11 @@ class GameView:
     @staticmethod
     def get_card_to_discard(boat: Boat, available_cards: list):
         """Show available cards and allow card discard."""
-        options = available_cards + ["Done"]
+        options = card_faces(available_cards) + ["Done"]
         choice_idx = interactive_selection(options, "horizontal", "Select cards to discard:", boat.color)
-        return options[choice_idx]
+        if choice_idx == len(available_cards):
+            return "Done"
+        return available_cards[choice_idx]
 
     @staticmethod
     def choose_motivation(current_boat, boat_ahead):
@@ -62,8 +72,20 @@ class GameView:
         return options[choice_idx]
 
     @staticmethod
-    def show_event(boat: Boat, event):
-        """Shows player clusterand hand notification, failed stroke rate jumps and attempts to pass pace limits."""
+    def show_event(boat: Boat, event, delay = None):
+        """
+        Shows player clusterand hand notification, failed stroke rate jumps and attempts to pass pace limits.
+        Waits for "Continue" unless a delay is given.
+        """
+        title_msg = GameView.event_message(boat, event)
+        if delay is not None:
+            GameView.show_message(title_msg, boat.color, delay)
+        else:
+            interactive_selection(["Continue"], "vertical", title_msg, boat.color)
+
+    @staticmethod
+    def event_message(boat: Boat, event):
+        """Text of a turn event."""
         messages = {
             "clustered": f"CLUSTERED HAND! {boat.name} can't find rhythm and loses the stroke this round.",
             "no stamina": f"NO STAMINA! {boat.name} is exhausted and the stroke rate drops.",
@@ -72,11 +94,20 @@ class GameView:
             "tired": f"PUSHING TOO HARD! {boat.name} puts the hand on the fire. Position: {boat.position * 20}m",
             "crab": f"CRAB CAUGHT! {boat.name} loses control of the oar and loses momentum. Position: {boat.position * 20}m"
         }
-        interactive_selection(["Continue"], "vertical", messages[event], boat.color)
+        return messages[event]
+
+    @staticmethod
+    def show_bonus(boats, event, delay = None):
+        """Show end-of-round bonus notifications, waits for "Continue" unless a delay is given."""
+        title_msg = GameView.bonus_message(boats, event)
+        if delay is not None:
+            GameView.show_message(title_msg, delay=delay)
+        else:
+            interactive_selection(["Continue"], "vertical", title_msg)
 
     @staticmethod
-    def show_bonus(boats, event):
-        """Show end-of-round bonus notifications."""
+    def bonus_message(boats, event):
+        """Text of an end-of-round bonus."""
         if event == "change_0":
             title_msg = "CHANGES OF TIDES: No boats eligible."
         elif event == "change_1":
@@ -87,4 +118,4 @@ class GameView:
             title_msg = f"MOTIVATION: {boats[0]} feeds off the chase and surges past {boats[1]}!"
         else:
             title_msg = "Unknown bonus event."
-        interactive_selection(["Continue"], "vertical", title_msg)
\ No newline at end of file
+        return title_msg
\ No newline at end of file
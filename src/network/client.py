@@ -0,0 +1,171 @@
+import argparse
+import asyncio
+from array import array
+from src.engine.boat import Boat
+from src.engine.constants import COLORS, SPEEDS
+from src.interface.async_view import AsyncGameView
+from src.interface.keyboard import keyboard
+from src.interface.view import GameView
+from src.network.protocol import (
+    WELCOME, STATE, PROMPT, EVENT, END, ERROR, NPC, FINISHED, CRAB,
+    PROMPT_RATE, PROMPT_CARDS, PROMPT_DISCARD, PROMPT_MOTIVATION,
+    read_message, open_connection, encode_join, encode_choice,
+    decode_welcome, decode_state, decode_prompt, decode_event
+)
+
+
+class RaceClient:
+    """
+    Thin terminal client: the server runs the race, the client draws it with src/interface and asks the player.
+    """
+    def __init__(self, address, players = 1, name = "", speed = "Fast"):
+        self.address = address
+        self.players = players
+        self.name = name
+        self.message_delay, self.screen_delay = SPEEDS[speed]
+        self.lane = None
+        self.boats = {}
+
+    async def run(self):
+        reader, writer = await open_connection(self.address)
+        writer.write(encode_join(self.players, self.name))
+
+        # Messages are read while the player looks at the screen
+        messages = asyncio.Queue()
+        async def read_all():
+            while True:
+                message = await read_message(reader)
+                await messages.put(message)
+                if message is None:
+                    return
+        reading = asyncio.create_task(read_all())
+
+        try:
+            await AsyncGameView.show_message("Waiting for the other players...", delay=0)
+            while True:
+                message = await messages.get()
+                if message is None:
+                    await AsyncGameView.show_message("Connection closed by the server.", delay=SPEEDS["Real time"][1])
+                    return
+                kind, body = message
+
+                # Catch up without waiting when more messages arrived
+                busy = not messages.empty()
+                if kind == WELCOME:
+                    _, self.lane = decode_welcome(body)
+                elif kind == STATE:
+                    self.update_boats(body)
+                    await AsyncGameView.render_game_screen(self.race_boats(), "Leaderboard", 0 if busy else self.screen_delay)
+                elif kind == EVENT:
+                    await self.show_event(*decode_event(body), 0 if busy else self.message_delay)
+                elif kind == PROMPT:
+                    prompt_id, values = await self.answer(*decode_prompt(body))
+                    if values is not None:
+                        writer.write(encode_choice(prompt_id, values))
+                elif kind == END:
+                    await AsyncGameView.render_game_screen(self.race_boats(), "Podium", SPEEDS["Real time"][1])
+                    return
+                elif kind == ERROR:
+                    await AsyncGameView.show_message(body.decode(errors="ignore"), delay=SPEEDS["Real time"][1])
+                    return
+        finally:
+            reading.cancel()
+            writer.close()
+
+    # ------ STATE ------
+    def update_boats(self, body):
+        _, boats, hand = decode_state(body)
+        for lane, name, position, rate, stamina, rounds, flags in boats:
+            boat = self.boats.get(lane)
+            if boat is None:
+                boat = self.boats[lane] = Boat(name, COLORS[name], lane)
+            boat.is_npc = bool(flags & NPC)
+            boat.finished = bool(flags & FINISHED)
+            boat.caught_crab = bool(flags & CRAB)
+            boat.position = position
+            boat.stroke_rate = rate
+            boat.round = rounds
+            boat.stamina_pile = array("b", [0]) * stamina
+        if self.lane in self.boats:
+            self.boats[self.lane].set_hand(hand)
+
+    def race_boats(self):
+        return sorted(self.boats.values(), key=lambda x: x.lane)
+
+    async def show_event(self, event, lanes, delay):
+        boats = [self.boats[lane] for lane in lanes if lane in self.boats]
+        if not boats:
+            return
+        if event == "turn":
+            title_msg = f"{boats[0].name}'s Turn"
+        elif event.startswith("change_") or event == "motivation":
+            title_msg = GameView.bonus_message([b.name for b in boats], event)
+        else:
+            title_msg = GameView.event_message(boats[0], event)
+        await AsyncGameView.show_message(title_msg, boats[0].color, delay)
+
+    # ------ PROMPTS ------
+    async def answer(self, kind, prompt_id, needed, timeout, options):
+        """
+        Ask the player, returns the prompt id and the values chosen, None if the time ran out.
+        """
+        boat = self.boats[self.lane]
+        loop = asyncio.get_running_loop()
+        end = None if timeout is None else loop.time() + timeout
+        def time_left():
+            return None if end is None else max(0.01, end - loop.time())
+
+        if kind == PROMPT_RATE:
+            choice = await AsyncGameView.get_sroke_rate(boat, time_left())
+            return prompt_id, None if choice is None else [choice]
+
+        if kind == PROMPT_CARDS:
+            cards_left = list(options)
+            cards_selected = []
+            for _ in range(needed):
+                card = await AsyncGameView.get_card_to_play(boat, cards_left, cards_selected, needed, time_left())
+                if card is None:
+                    return prompt_id, None
+                cards_left.remove(card)
+                cards_selected.append(card)
+            return prompt_id, cards_selected
+
+        if kind == PROMPT_DISCARD:
+            option = await AsyncGameView.choose_to_discard_cards(boat, time_left())
+            if option is None:
+                return prompt_id, None
+            cards_left = list(options)
+            cards_selected = []
+            while option == "Discard" and cards_left:
+                card = await AsyncGameView.get_card_to_discard(boat, cards_left, time_left())
+                if card is None:
+                    return prompt_id, None
+                if card == "Done":
+                    break
+                cards_left.remove(card)
+                cards_selected.append(card)
+            return prompt_id, cards_selected
+
+        if kind == PROMPT_MOTIVATION:
+            ahead = self.boats.get(options[0], boat)
+            option = await AsyncGameView.choose_motivation(boat, ahead, time_left())
+            if option is None:
+                return prompt_id, None
+            return prompt_id, [1 if option.startswith("Activate") else 0]
+
+        return prompt_id, None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Join a race on a Redline Regatta server.")
+    parser.add_argument("--address", default="127.0.0.1:7777", help='"host:port" or "unix:/path/to/socket"')
+    parser.add_argument("--players", type=int, default=1, help="players wanted in the race, NPCs fill the other lanes")
+    parser.add_argument("--name", default="", help="player name")
+    parser.add_argument("--speed", choices=["Fast", "Instant"], default="Fast", help="how long other boats' events are shown")
+    args = parser.parse_args()
+
+    try:
+        with keyboard:
+            asyncio.run(RaceClient(args.address, args.players, args.name, args.speed).run())
+    except (KeyboardInterrupt, EOFError):
+        pass
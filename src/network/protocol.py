@@ -0,0 +1,152 @@
+import asyncio
+import struct
+from src.engine.constants import COLORS
+
+# Frame: payload length, then the message type and its body
+FRAME = struct.Struct("<H")
+
+# ------ MESSAGE TYPES ------
+# Client to server
+JOIN = 1        # players wanted in the race, name
+CHOICE = 2      # prompt id, values chosen
+
+# Server to client
+WELCOME = 10    # race id, own lane
+STATE = 11      # round, boats, own hand
+PROMPT = 12     # prompt kind, prompt id, values needed, time limit, options
+EVENT = 13      # event, lanes of the boats involved
+END = 14        # race over, the last state was the final one
+ERROR = 15      # text
+
+# ------ PROMPTS ------
+# Options are stroke rates, card codes, or the lane of the boat ahead for motivation
+PROMPT_RATE, PROMPT_CARDS, PROMPT_DISCARD, PROMPT_MOTIVATION = range(4)
+
+# ------ EVENTS ------
+EVENTS = (
+    "turn", "clustered", "no stamina", "failed", "passed", "tired", "crab",
+    "change_0", "change_1", "change_2", "motivation"
+)
+EVENT_CODES = {event: i for i, event in enumerate(EVENTS)}
+
+# ------ STATE ------
+# Lane, color, position, stroke rate, stamina cards, rounds played, flags
+BOAT = struct.Struct("<BBHBBBB")
+FINISHED, NPC, CRAB = 1, 2, 4
+COLOR_NAMES = list(COLORS.keys())
+
+WELCOME_BODY = struct.Struct("<IB")
+PROMPT_HEADER = struct.Struct("<BBBH")
+
+
+def frame(kind, body = b""):
+    """
+    Message ready to be written on the socket.
+    """
+    return FRAME.pack(len(body) + 1) + bytes([kind]) + body
+
+async def read_message(reader):
+    """
+    Next message of a stream as (type, body), None when the stream is closed.
+    """
+    try:
+        header = await reader.readexactly(FRAME.size)
+        payload = await reader.readexactly(FRAME.unpack(header)[0])
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    if not payload:
+        return None
+    return payload[0], payload[1:]
+
+# ------ ENCODERS ------
+def encode_join(players, name = ""):
+    return frame(JOIN, bytes([players]) + name.encode()[:32])
+
+def encode_choice(prompt_id, values):
+    return frame(CHOICE, bytes([prompt_id, len(values)]) + bytes(values))
+
+def encode_welcome(race_id, lane):
+    return frame(WELCOME, WELCOME_BODY.pack(race_id, lane))
+
+def encode_state(round_number, boats, hand = b""):
+    body = bytearray(struct.pack("<HB", round_number, len(boats)))
+    for b in boats:
+        flags = (FINISHED if b.finished else 0) | (NPC if b.is_npc else 0) | (CRAB if b.caught_crab else 0)
+        body += BOAT.pack(b.lane, COLOR_NAMES.index(b.name), b.position, b.stroke_rate, len(b.stamina_pile), min(b.round, 255), flags)
+    body.append(len(hand))
+    body += bytes(hand)
+    return frame(STATE, bytes(body))
+
+def encode_prompt(kind, prompt_id, needed, timeout, options):
+    # Time limit in tenths of a second, 0 without limit
+    tenths = 0 if timeout is None else min(0xFFFF, max(1, int(timeout * 10)))
+    return frame(PROMPT, PROMPT_HEADER.pack(kind, prompt_id, needed, tenths) + bytes([len(options)]) + bytes(options))
+
+def encode_event(event, boats):
+    return frame(EVENT, bytes([EVENT_CODES[event], len(boats)]) + bytes(b.lane for b in boats))
+
+def encode_error(text):
+    return frame(ERROR, text.encode())
+
+# ------ DECODERS ------
+# Client messages are checked, the decoders return None for a body too short for its fields
+def decode_join(body):
+    if not body:
+        return None
+    return body[0], body[1:].decode(errors="ignore")
+
+def decode_choice(body):
+    if len(body) < 2 or len(body) < 2 + body[1]:
+        return None
+    return body[0], list(body[2:2 + body[1]])
+
+def decode_welcome(body):
+    return WELCOME_BODY.unpack(body)
+
+def decode_state(body):
+    """
+    Returns the round, a list of boat tuples (lane, color name, position, stroke rate, stamina, rounds, flags) and the hand.
+    """
+    round_number, count = struct.unpack_from("<HB", body)
+    offset = 3
+    boats = []
+    for _ in range(count):
+        lane, color, position, rate, stamina, rounds, flags = BOAT.unpack_from(body, offset)
+        boats.append((lane, COLOR_NAMES[color], position, rate, stamina, rounds, flags))
+        offset += BOAT.size
+    hand = list(body[offset + 1:offset + 1 + body[offset]])
+    return round_number, boats, hand
+
+def decode_prompt(body):
+    """
+    Returns the prompt kind, id, values needed, time limit in seconds (None without limit) and options.
+    """
+    kind, prompt_id, needed, tenths = PROMPT_HEADER.unpack_from(body)
+    offset = PROMPT_HEADER.size
+    options = list(body[offset + 1:offset + 1 + body[offset]])
+    return kind, prompt_id, needed, (tenths / 10 if tenths else None), options
+
+def decode_event(body):
+    return EVENTS[body[0]], list(body[2:2 + body[1]])
+
+# ------ ADDRESSES ------
+def parse_address(address):
+    """
+    "unix:/path/to/socket" or "host:port".
+    """
+    if address.startswith("unix:"):
+        return "unix", address[5:]
+    host, _, port = address.rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+async def open_connection(address):
+    kind, target = parse_address(address)
+    if kind == "unix":
+        return await asyncio.open_unix_connection(target)
+    return await asyncio.open_connection(*target)
+
+async def start_server(handler, address, backlog = 1024):
+    kind, target = parse_address(address)
+    if kind == "unix":
+        return await asyncio.start_unix_server(handler, target, backlog=backlog)
+    return await asyncio.start_server(handler, *target, backlog=backlog)
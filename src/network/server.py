@@ -0,0 +1,308 @@
+import argparse
+import asyncio
+import os
+from collections import Counter
+from src.controllers.async_game import AsyncGameController
+from src.engine.rng import new_seed
+from src.engine.rules import DEFAULT_RULES
+from src.network.protocol import (
+    JOIN, CHOICE, END, COLOR_NAMES,
+    PROMPT_RATE, PROMPT_CARDS, PROMPT_DISCARD, PROMPT_MOTIVATION,
+    read_message, frame, start_server, decode_join, decode_choice,
+    encode_welcome, encode_state, encode_prompt, encode_event, encode_error
+)
+
+# Bytes a client can leave unread before it is dropped, keeps memory per race bounded
+MAX_BUFFER = 64 * 1024
+
+# NPC difficulties of hosted races. Master searches run synchronously for up to 50 ms a choice,
+# they would block every other race and client of the event loop
+DIFFICULTIES = ("Normal", "Expert")
+
+
+class RemotePlayer:
+    """
+    A connected client and the boat it rows.
+    When it disconnects or stops reading, its boat is handed to the NPC logic.
+    """
+    __slots__ = ("writer", "boat", "answer", "prompt_id", "connected")
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.boat = None
+        self.answer = None
+        self.prompt_id = 0
+        self.connected = True
+
+    def send(self, data):
+        if not self.connected:
+            return
+        self.writer.write(data)
+        if self.writer.transport.get_write_buffer_size() > MAX_BUFFER:
+            self.disconnect()
+
+    def answered(self, prompt_id, values):
+        """
+        Answer of the client, ignored if it is not for the prompt waiting.
+        """
+        if self.answer is not None and not self.answer.done() and prompt_id == self.prompt_id:
+            self.answer.set_result(values)
+
+    def disconnect(self):
+        if not self.connected:
+            return
+        self.connected = False
+        self.writer.close()
+        if self.boat is not None:
+            self.boat.is_npc = True
+        if self.answer is not None and not self.answer.done():
+            self.answer.set_result(None)
+
+
+class RemoteEvents:
+    """
+    Send the race events to every player of a race, without waiting for them.
+    """
+    def __init__(self, race):
+        self.race = race
+
+    async def race_started(self, boats):
+        self.race.send_state()
+
+    async def turn_started(self, boat):
+        # The player needs its new hand before its prompts
+        player = self.race.players.get(boat.lane)
+        if player is not None:
+            player.send(encode_state(self.race.round, self.race.boats, boat.hand))
+        self.race.broadcast(encode_event("turn", [boat]))
+
+    async def turn_event(self, boat, event):
+        self.race.broadcast(encode_event(event, [boat]))
+
+    async def turn_finished(self, boat, status, split_loc):
+        self.race.broadcast(encode_event(status, [boat]))
+
+    async def bonus(self, boats, event):
+        self.race.broadcast(encode_event(event, boats))
+
+    async def round_finished(self, boats):
+        self.race.round += 1
+        self.race.send_state()
+
+    async def race_finished(self, boats):
+        self.race.send_state()
+        self.race.broadcast(frame(END))
+
+
+class RemoteRace(AsyncGameController):
+    """
+    A race of the server: players answer prompts over their sockets, NPCs row the empty lanes.
+    Every choice has the turn time, then the NPC logic decides, so one client can't stall the race.
+    """
+    def __init__(self, race_id, players, seed, difficulty = "Normal", turn_time = 30, rules = DEFAULT_RULES, log_path = None):
+        colors = COLOR_NAMES[:len(players)]
+        super().__init__(colors, seed, difficulty, rules, "Instant", turn_time, RemoteEvents(self), log_path)
+        self.race_id = race_id
+        self.round = 0
+        self.players = {}
+
+        for player, color in zip(players, colors):
+            boat = next(b for b in self.boats if b.name == color)
+            player.boat = boat
+            self.players[boat.lane] = player
+            player.send(encode_welcome(race_id, boat.lane))
+
+    def broadcast(self, data):
+        for player in self.players.values():
+            player.send(data)
+
+    def send_state(self):
+        for lane, player in self.players.items():
+            player.send(encode_state(self.round, self.boats, player.boat.hand))
+
+    async def play_turn(self, boat):
+        # Let the other races of the process move between turns
+        await asyncio.sleep(0)
+        await super().play_turn(boat)
+
+    async def prompt(self, boat, kind, needed, options, timeout):
+        """
+        Ask the player of a boat, returns the values chosen or None if there is no answer in time.
+        """
+        player = self.players.get(boat.lane)
+        if player is None or not player.connected:
+            return None
+
+        player.prompt_id = (player.prompt_id + 1) % 256
+        player.answer = asyncio.get_running_loop().create_future()
+        player.send(encode_prompt(kind, player.prompt_id, needed, timeout, options))
+        try:
+            return await asyncio.wait_for(player.answer, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            player.answer = None
+
+    # ------ REMOTE DECISIONS ------
+    async def stroke_rate(self, boat, deadline):
+        if boat.is_npc or self.time_left(deadline) == 0:
+            return self.npc.stroke_rate(boat)
+
+        values = await self.prompt(boat, PROMPT_RATE, 1, list(self.rules.rates), self.time_left(deadline))
+        if values is None or len(values) != 1 or values[0] not in self.rules.rates:
+            return self.npc.stroke_rate(boat)
+        return values[0]
+
+    async def cards_to_play(self, boat, available_cards, cards_needed, deadline):
+        if boat.is_npc or self.time_left(deadline) == 0:
+            return self.npc.cards_to_play(boat, available_cards, cards_needed)
+
+        # A faster stroke rate can need more cards than the hand can play
+        needed = min(cards_needed, len(available_cards))
+        values = await self.prompt(boat, PROMPT_CARDS, needed, available_cards, self.time_left(deadline))
+        if values is None or len(values) != needed or not is_subset(values, available_cards):
+            return self.npc.cards_to_play(boat, available_cards, cards_needed)
+        return values
+
+    async def cards_to_discard(self, boat, available_cards, deadline):
+        if boat.is_npc or self.time_left(deadline) == 0:
+            return self.npc.cards_to_discard(boat, available_cards)
+
+        # No values needed: any number of cards can be discarded
+        values = await self.prompt(boat, PROMPT_DISCARD, 0, available_cards, self.time_left(deadline))
+        if values is None or not is_subset(values, available_cards):
+            return self.npc.cards_to_discard(boat, available_cards)
+        return values
+
+    async def motivation(self, boat, boat_ahead):
+        if boat.is_npc:
+            return self.npc.motivation(boat, boat_ahead)
+
+        # The option is the lane of the boat ahead, the answer 1 to use the bonus or 0
+        values = await self.prompt(boat, PROMPT_MOTIVATION, 1, [boat_ahead.lane], self.turn_time)
+        if values is None or len(values) != 1:
+            return self.npc.motivation(boat, boat_ahead)
+        return values[0] == 1
+
+
+def is_subset(values, cards):
+    """
+    Check that every value is one of the cards, counting repeated cards.
+    """
+    counts = Counter(cards)
+    counts.subtract(values)
+    return all(n >= 0 for n in counts.values())
+
+
+class RaceServer:
+    """
+    Hosts many independent races in one asyncio process.
+    Clients join a lobby for the number of players they want, a race starts when it is full
+    or when the lobby waited long enough, NPCs fill the empty lanes.
+    With a log directory every race is recorded there for replays.
+    """
+    def __init__(self, turn_time = 30, lobby_wait = 10, difficulty = "Normal", seed = None, rules = DEFAULT_RULES, log_dir = None):
+        if difficulty not in DIFFICULTIES:
+            raise ValueError(f"Races can be hosted with {' or '.join(DIFFICULTIES)} NPCs, not {difficulty}")
+        self.turn_time = turn_time
+        self.lobby_wait = lobby_wait
+        self.difficulty = difficulty
+        self.seed = seed if seed is not None else new_seed()
+        self.rules = rules
+        self.log_dir = log_dir
+        self.lobbies = {}
+        self.lobby_timers = {}
+        self.races = {}
+        self.next_race = 0
+
+        # ------ STATS ------
+        self.races_finished = 0
+        self.most_races = 0
+
+    async def serve(self, address):
+        """
+        Accept clients until cancelled.
+        """
+        server = await start_server(self.handle, address)
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        """
+        Connection of a client: join a lobby, then read its answers until it leaves.
+        """
+        player = RemotePlayer(writer)
+        # Whatever ends the connection, its boat goes back to the NPC logic
+        try:
+            message = await read_message(reader)
+            join = decode_join(message[1]) if message is not None and message[0] == JOIN else None
+            if join is None:
+                player.send(encode_error("Expected a join message"))
+                return
+
+            wanted, _ = join
+            self.join(player, max(1, min(wanted, self.rules.lanes)))
+
+            while player.connected:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                kind, body = message
+                if kind == CHOICE:
+                    choice = decode_choice(body)
+                    if choice is None:
+                        player.send(encode_error("Malformed choice message"))
+                    else:
+                        player.answered(*choice)
+        finally:
+            player.disconnect()
+
+    def join(self, player, wanted):
+        lobby = self.lobbies.setdefault(wanted, [])
+        lobby.append(player)
+        if len(lobby) >= wanted:
+            self.start_race(wanted)
+        elif len(lobby) == 1:
+            self.lobby_timers[wanted] = asyncio.get_running_loop().call_later(self.lobby_wait, self.start_race, wanted)
+
+    def start_race(self, wanted):
+        timer = self.lobby_timers.pop(wanted, None)
+        if timer is not None:
+            timer.cancel()
+        players = [p for p in self.lobbies.pop(wanted, []) if p.connected]
+        if not players:
+            return
+
+        race_id = self.next_race
+        self.next_race += 1
+        log_path = None if self.log_dir is None else os.path.join(self.log_dir, f"race_{self.seed}_{race_id}.rrlog")
+        race = RemoteRace(race_id, players, f"{self.seed}:{race_id}", self.difficulty, self.turn_time, self.rules, log_path)
+        self.races[race_id] = asyncio.get_running_loop().create_task(self.run_race(race))
+        self.most_races = max(self.most_races, len(self.races))
+
+    async def run_race(self, race):
+        try:
+            await race.run_game()
+        finally:
+            del self.races[race.race_id]
+            self.races_finished += 1
+            for player in race.players.values():
+                player.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Host Redline Regatta races for remote players.")
+    parser.add_argument("--address", default="127.0.0.1:7777", help='"host:port" or "unix:/path/to/socket"')
+    parser.add_argument("--turn-time", type=float, default=30, help="seconds players have for every choice")
+    parser.add_argument("--lobby-wait", type=float, default=10, help="seconds a lobby waits for more players")
+    parser.add_argument("--difficulty", choices=DIFFICULTIES, default="Normal", help="NPC difficulty")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the races, random if not given")
+    parser.add_argument("--log-dir", default=None, help="record every race in this directory")
+    args = parser.parse_args()
+
+    server = RaceServer(args.turn_time, args.lobby_wait, args.difficulty, args.seed, log_dir=args.log_dir)
+    print(f"Serving races on {args.address} (seed {server.seed})")
+    try:
+        asyncio.run(server.serve(args.address))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from src.controllers.async_game import AsyncGameController
+from src.engine.race_engine import RaceEngine, NPCDecisions, NullEvents
+from src.engine.race_logic import GameLogic
+from src.engine.rng import race_rng
+
+
+class EventList(NullEvents):
+    """
+    Names of the race events, in the order they were sent.
+    """
+    def __init__(self):
+        self.names = []
+
+    def turn_started(self, boat):
+        self.names.append(("turn_started", boat.lane))
+
+    def turn_event(self, boat, event):
+        self.names.append(("turn_event", boat.lane, event))
+
+    def turn_finished(self, boat, status, split_loc):
+        self.names.append(("turn_finished", boat.lane, status))
+
+    def bonus(self, boats, event):
+        self.names.append(("bonus", event))
+
+    def round_finished(self, boats):
+        self.names.append(("round_finished",))
+
+    def race_finished(self, boats):
+        self.names.append(("race_finished",))
+
+
+class AsyncEventList:
+    """
+    Async events sink of the controller, with the same records as EventList.
+    """
+    def __init__(self):
+        self.events = EventList()
+
+    async def race_started(self, boats):
+        pass
+
+    def __getattr__(self, name):
+        record = getattr(self.events, name)
+
+        async def shown(*args):
+            record(*args)
+        return shown
+
+
+@pytest.mark.parametrize("seed", [3, 17, 40])
+@pytest.mark.parametrize("difficulty", ["Normal", "Expert"])
+def test_async_race_plays_the_engine_phases(seed, difficulty):
+    boats = GameLogic.create_boat(["No more players"], race_rng(seed))
+    events = EventList()
+    engine = RaceEngine(boats, NPCDecisions(difficulty), events)
+    engine.run()
+
+    shown = AsyncEventList()
+    game = AsyncGameController(["No more players"], seed, difficulty, speed = "Instant", events = shown)
+    asyncio.run(game.run_game())
+
+    assert game.engine.snapshot() == engine.snapshot()
+    assert shown.events.names == events.names
@@ -0,0 +1,49 @@
+import math
+import numpy as np
+import pytest
+from analysis.batch_sim import RandomBuffer, simulate_batch
+from analysis.crab_rate import test_game_crabs as game_crabs
+
+LOCATIONS = [25, 50, 75, 85]
+RACES = 1500
+
+
+# ------ RANDOM BUFFER ------
+def test_take_hands_out_the_stream_in_order():
+    buffer = RandomBuffer(np.random.default_rng(4), size = 16)
+    expected = np.random.default_rng(4).random(16)
+    assert np.array_equal(np.concatenate([buffer.take(5), buffer.take(5), buffer.take(6)]), expected)
+
+def test_refill_when_the_buffer_runs_out():
+    buffer = RandomBuffer(np.random.default_rng(4), size = 8)
+    stream = np.random.default_rng(4)
+    first = stream.random(8)
+    assert np.array_equal(buffer.take(5), first[:5])
+    # Three values are left, the next five come from a new buffer
+    assert np.array_equal(buffer.take(5), stream.random(8)[:5])
+    assert buffer.index == 5
+
+def test_refill_grows_for_large_takes():
+    buffer = RandomBuffer(np.random.default_rng(4), size = 8)
+    buffer.take(3)
+    values = buffer.take(20)
+    assert len(values) == 20 and buffer.size == 20
+    assert np.array_equal(values, np.random.default_rng(4).random(28)[8:])
+
+
+# ------ SCALAR ENGINE EQUIVALENCE ------
+@pytest.mark.parametrize("paces", [(6, 6, 6, 6), (5, 7, 5, 7)])
+def test_batch_rates_match_the_engine(paces):
+    """
+    The batch simulator draws differently, so only the rates agree: within 4 standard errors of their difference.
+    """
+    limit = dict(zip(LOCATIONS, paces))
+    crabs, tired = game_crabs(limit, RACES, 12)
+    batch_crabs, batch_tired = simulate_batch([list(paces)] * RACES, LOCATIONS, seed = 12)
+    exposures = RACES * 6
+
+    for i, loc in enumerate(LOCATIONS):
+        for scalar, batch in ((crabs[loc], batch_crabs[:, i].sum()), (tired[loc], batch_tired[:, i].sum())):
+            p = (scalar + batch) / (2 * exposures)
+            error = math.sqrt(max(p * (1 - p), 1 / exposures) * 2 / exposures)
+            assert abs(scalar - batch) / exposures <= 4 * error, (loc, scalar, batch)
@@ -0,0 +1,31 @@
+import pytest
+from analysis.crab_rate import simulate
+
+
+def race_stats_state(stats):
+    """
+    Every aggregate of a RaceStats, to compare them as a whole.
+    """
+    def running(r):
+        return r.count, r.total, r.squares, r.low, r.high
+
+    return (
+        stats.races, running(stats.rounds), list(stats.rounds_histogram.counts),
+        {lane: list(h.counts) for lane, h in stats.places.items()},
+        {lane: running(r) for lane, r in stats.place_stats.items()},
+        [running(r) for r in stats.split_stamina], [list(h.counts) for h in stats.split_stamina_histograms],
+        stats.turns_by_rate, stats.crabs_by_rate, running(stats.tides), running(stats.motivations),
+    )
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_workers_give_the_same_counts(workers):
+    # 120 tests are three blocks of work, merged in the order the workers finish them
+    alone, alone_stats, _ = simulate(120, 2, 77, stats = True)
+    pooled, pooled_stats, _ = simulate(120, 2, 77, workers, stats = True)
+    assert pooled == alone
+    assert race_stats_state(pooled_stats) == race_stats_state(alone_stats)
+
+def test_seed_sets_the_counts():
+    assert simulate(60, 2, 77)[0] == simulate(60, 2, 77)[0]
+    assert simulate(60, 2, 77)[0] != simulate(60, 2, 78)[0]
@@ -0,0 +1,115 @@
+import random
+from collections import Counter
+import pytest
+from src.engine.constants import INSTABILITY, STAMINA
+from src.engine.deck import Deck
+from src.engine.race_engine import RaceEngine, NPCDecisions, NullEvents
+from src.engine.race_logic import GameLogic
+from src.engine.rng import race_rng
+from src.engine.rules import DEFAULT_RULES
+
+
+def counts(cards):
+    """
+    Number of cards of every code, like the counts kept with the piles.
+    """
+    found = Counter(cards)
+    return [found[card] for card in range(STAMINA + 1)]
+
+def check_counts(deck):
+    assert list(deck.draw_counts) == counts(deck.draw_pile)
+    assert list(deck.discard_counts) == counts(deck.discard_pile)
+
+
+# ------ DECK ------
+def test_new_deck():
+    deck = Deck(DEFAULT_RULES.deck, random.Random(1))
+    assert sorted(deck.draw_pile) == sorted(DEFAULT_RULES.deck)
+    assert not deck.discard_pile
+    check_counts(deck)
+
+@pytest.mark.parametrize("seed", range(20))
+def test_counts_follow_every_move(seed):
+    rng = random.Random(seed)
+    deck = Deck(DEFAULT_RULES.deck, rng)
+    out = []
+    for _ in range(300):
+        move = rng.random()
+        if move < 0.5 or not out:
+            card = deck.draw()
+            if card is not None:
+                out.append(card)
+        elif move < 0.8:
+            deck.discard(out.pop(rng.randrange(len(out))))
+        else:
+            cards = [out.pop() for _ in range(min(len(out), rng.randint(1, 4)))]
+            deck.discard_many(cards)
+        check_counts(deck)
+        # No card is lost or created
+        assert Counter(deck.draw_pile) + Counter(deck.discard_pile) + Counter(out) == Counter(DEFAULT_RULES.deck)
+
+def test_draw_reshuffles_the_discard_pile():
+    deck = Deck([2], random.Random(2))
+    assert deck.draw() == 2
+    deck.discard_many([1, 3, INSTABILITY])
+    drawn = deck.draw()
+    assert drawn in (1, 3, INSTABILITY)
+    assert sorted(deck.draw_pile) == sorted({1, 3, INSTABILITY} - {drawn})
+    assert not deck.discard_pile
+    check_counts(deck)
+
+def test_empty_deck_draws_nothing():
+    deck = Deck([], random.Random(3))
+    assert deck.draw() is None
+    assert len(deck) == 0
+
+def test_draws_are_uniform():
+    # Every card of the pile is drawn first as often, swapping the last card in keeps no bias
+    first = Counter()
+    for seed in range(6000):
+        first[Deck([1, 2, 3], random.Random(seed)).draw()] += 1
+    assert all(1800 < first[card] < 2200 for card in (1, 2, 3))
+
+def test_snapshot_restores_piles_and_counts():
+    rng = random.Random(4)
+    deck = Deck(DEFAULT_RULES.deck, rng)
+    for _ in range(5):
+        deck.discard(deck.draw())
+    state = deck.snapshot()
+    piles = (list(deck.draw_pile), list(deck.discard_pile))
+    for _ in range(20):
+        deck.discard(deck.draw())
+
+    deck.restore(state)
+    assert (list(deck.draw_pile), list(deck.discard_pile)) == piles
+    check_counts(deck)
+
+
+# ------ HAND ------
+def test_hand_counts():
+    boat = GameLogic.create_boat([], race_rng(5))[0]
+    boat.set_hand([1, STAMINA, 3, INSTABILITY, 1])
+    assert list(boat.hand_counts) == counts(boat.hand)
+    boat.add_card(2)
+    boat.remove_card(1)
+    boat.remove_card(STAMINA)
+    assert list(boat.hand_counts) == counts(boat.hand)
+    assert boat.playable_count == 4
+    assert boat.playable_cards() == [1, 2, 3, INSTABILITY]
+
+
+class CountCheck(NullEvents):
+    """
+    Event sink checking the counts of every boat after every turn of a race.
+    """
+    def turn_finished(self, boat, status, split_loc):
+        assert list(boat.hand_counts) == counts(boat.hand)
+        check_counts(boat.deck)
+
+@pytest.mark.parametrize("seed", range(10))
+def test_counts_through_a_race(seed):
+    boats = GameLogic.create_boat([], race_rng(seed))
+    RaceEngine(boats, NPCDecisions(), CountCheck()).run()
+    for b in boats:
+        assert list(b.hand_counts) == counts(b.hand)
+        check_counts(b.deck)
@@ -0,0 +1,68 @@
+import itertools
+import random
+import pytest
+from dataclasses import replace
+from src.engine.constants import INSTABILITY, STAMINA
+from src.engine.hand_table import HandTable
+from src.engine.npc_logic import NPCLogic
+from src.engine.race_logic import GameLogic
+from src.engine.rng import race_rng
+from src.engine.rules import DEFAULT_RULES
+
+CODES = (1, 2, 3, INSTABILITY, STAMINA)
+
+
+# Card choice of the NPCs before the hand table, for reference
+def value(card):
+    return card if card < INSTABILITY else 2
+
+def old_choose_cards(hand):
+    playable = [c for c in hand if c != STAMINA]
+    playable.sort(key=value, reverse=True)
+    return playable
+
+def old_speed_for_rate(hand, needed):
+    playable = old_choose_cards(hand)
+    if len(playable) < needed:
+        return 0
+    return sum([value(c) for c in playable[:needed]])
+
+def hand_multisets(hand_limit):
+    for size in range(hand_limit + 1):
+        yield from itertools.combinations_with_replacement(CODES, size)
+
+
+@pytest.mark.parametrize("rules", [DEFAULT_RULES, replace(DEFAULT_RULES, hand_limit=9, cards_per_rate=(1, 2, 3, 5))])
+def test_every_hand_matches_the_old_choice(rules):
+    boat = GameLogic.create_boat(["No more players"], race_rng(1), rules)[0]
+    table = rules.hand_table
+    checked = 0
+    for hand in hand_multisets(rules.hand_limit):
+        boat.set_hand(hand)
+        key = table.counts_key(boat.hand_counts)
+        assert key == table.key(hand)
+
+        assert list(table.plays(key)) == old_choose_cards(hand) == NPCLogic.choose_cards(boat)
+        for rate, needed in enumerate(rules.cards_per_rate):
+            assert table.estimated_speed(key, rate) == old_speed_for_rate(hand, needed) == NPCLogic.calculate_speed_for_rate(boat, rate)
+        checked += 1
+    assert checked == len(list(hand_multisets(rules.hand_limit)))
+
+def test_hand_order_only_changes_equal_values():
+    """
+    The table keys multisets: a 2 and an instability card, both valued 2, come in a fixed order
+    instead of the hand order. Values played and speeds are the same for any hand order.
+    """
+    rng = random.Random(7)
+    table = DEFAULT_RULES.hand_table
+    for hand in hand_multisets(DEFAULT_RULES.hand_limit):
+        hand = list(hand)
+        rng.shuffle(hand)
+        plays = table.plays(table.key(hand))
+        assert sorted(plays) == sorted(old_choose_cards(hand))
+        assert [value(c) for c in plays] == [value(c) for c in old_choose_cards(hand)]
+
+def test_every_key_is_indexed():
+    table = HandTable(7, (1, 2, 4))
+    assert len(table.keys) == len(set(table.keys)) == sum(1 for hand in hand_multisets(7) if STAMINA not in hand)
+    assert all(table.index[key] == i for i, key in enumerate(table.keys))
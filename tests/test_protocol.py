@@ -0,0 +1,155 @@
+import asyncio
+import pytest
+from src.engine.race_logic import GameLogic
+from src.engine.rng import race_rng
+from src.network.protocol import (
+    JOIN, CHOICE, ERROR, FINISHED, NPC, PROMPT_CARDS, PROMPT_RATE, FRAME,
+    frame, read_message, encode_join, encode_choice, encode_welcome, encode_state, encode_prompt, encode_event,
+    decode_join, decode_choice, decode_welcome, decode_state, decode_prompt, decode_event
+)
+from src.network.server import RaceServer
+
+
+def body(data):
+    """
+    Body of an encoded message, without the frame header and the type.
+    """
+    return data[FRAME.size + 1:]
+
+def messages(data):
+    """
+    Every message of a stream, then None when it ends.
+    """
+    async def read_all():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        result = []
+        while True:
+            message = await read_message(reader)
+            result.append(message)
+            if message is None:
+                return result
+    return asyncio.run(read_all())
+
+def read(data):
+    return messages(data)[0]
+
+
+# ------ ROUND TRIPS ------
+def test_join_round_trip():
+    assert decode_join(body(encode_join(3, "Ana"))) == (3, "Ana")
+    assert decode_join(body(encode_join(1))) == (1, "")
+
+def test_choice_round_trip():
+    assert decode_choice(body(encode_choice(7, [1, 2, 2]))) == (7, [1, 2, 2])
+    assert decode_choice(body(encode_choice(0, []))) == (0, [])
+
+def test_welcome_round_trip():
+    assert decode_welcome(body(encode_welcome(123456, 4))) == (123456, 4)
+
+def test_state_round_trip():
+    boats = GameLogic.create_boat(["Red"], race_rng(1))
+    boats[0].position = 57
+    boats[0].finished = True
+    round_number, states, hand = decode_state(body(encode_state(9, boats, boats[1].hand)))
+
+    assert round_number == 9
+    assert hand == list(boats[1].hand)
+    assert [(s[0], s[1], s[2], s[3], s[4]) for s in states] == \
+        [(b.lane, b.name, b.position, b.stroke_rate, len(b.stamina_pile)) for b in boats]
+    assert states[0][6] & FINISHED
+    assert [bool(s[6] & NPC) for s in states] == [b.is_npc for b in boats]
+
+def test_prompt_round_trip():
+    assert decode_prompt(body(encode_prompt(PROMPT_CARDS, 5, 2, 12.5, [1, 3, 4]))) == (PROMPT_CARDS, 5, 2, 12.5, [1, 3, 4])
+    assert decode_prompt(body(encode_prompt(PROMPT_RATE, 1, 1, None, [0, 1, 2])))[3] is None
+
+def test_event_round_trip():
+    boats = GameLogic.create_boat([], race_rng(2))
+    assert decode_event(body(encode_event("crab", boats[:2]))) == ("crab", [1, 2])
+
+def test_read_message():
+    assert read(encode_join(2, "Bo")) == (JOIN, bytes([2]) + b"Bo")
+    assert read(frame(CHOICE)) == (CHOICE, b"")
+
+
+# ------ MALFORMED FRAMES ------
+@pytest.mark.parametrize("data", [b"", b"\x01", b"\x05\x00\x01"])
+def test_truncated_frame_closes_stream(data):
+    assert read(data) is None
+
+def test_empty_payload_closes_stream():
+    assert read(FRAME.pack(0)) is None
+
+def test_short_join_body():
+    assert decode_join(b"") is None
+
+@pytest.mark.parametrize("data", [b"", b"\x01", b"\x01\x03\x02\x02"])
+def test_short_choice_body(data):
+    assert decode_choice(data) is None
+
+
+# ------ SERVER ------
+class FakeReader:
+    """
+    Stream reader giving the frames of a client, then raising an error instead of the next read.
+    """
+    def __init__(self, data, error):
+        self.data = data
+        self.error = error
+
+    async def readexactly(self, n):
+        if len(self.data) < n:
+            raise self.error
+        chunk, self.data = self.data[:n], self.data[n:]
+        return chunk
+
+
+class FakeWriter:
+    def __init__(self):
+        self.written = b""
+        self.closed = False
+        self.transport = self
+
+    def write(self, data):
+        self.written += data
+
+    def get_write_buffer_size(self):
+        return 0
+
+    def close(self):
+        self.closed = True
+
+
+def handle(server, writer, data, error = ConnectionResetError()):
+    """
+    Run the server handler of one client until its stream fails.
+    """
+    async def run():
+        try:
+            await server.handle(FakeReader(data, error), writer)
+        finally:
+            for timer in server.lobby_timers.values():
+                timer.cancel()
+    asyncio.run(run())
+
+def test_empty_join_is_answered_with_an_error():
+    server, writer = RaceServer(lobby_wait=60), FakeWriter()
+    handle(server, writer, frame(JOIN))
+    assert read(writer.written)[0] == ERROR
+    assert writer.closed
+
+def test_short_choice_is_answered_with_an_error():
+    server, writer = RaceServer(lobby_wait=60), FakeWriter()
+    handle(server, writer, encode_join(2) + frame(CHOICE, b"\x01"))
+    assert [message[0] for message in messages(writer.written)[:-1]] == [ERROR]
+    assert not server.lobbies[2][0].connected
+
+def test_player_released_when_the_connection_fails():
+    # Errors read_message does not handle still hand the boat back
+    server, writer = RaceServer(lobby_wait=60), FakeWriter()
+    with pytest.raises(RuntimeError):
+        handle(server, writer, encode_join(2), RuntimeError("reset"))
+    assert not server.lobbies[2][0].connected
+    assert writer.closed
@@ -0,0 +1,41 @@
+import pytest
+from analysis.crab_rate import test_game_crabs as game_crabs
+from src.engine.race_engine import RaceEngine, NPCDecisions
+from src.engine.race_logic import GameLogic
+from src.engine.rng import race_rng
+
+# Final (name, rounds, position, stroke rate, stamina cards) of every lane of the race of seed 2024.
+# Any change to the engine phases, the NPC choices or the random draws changes them.
+GOLDEN_RACES = {
+    "Normal": {
+        1: ("Black", 24, 100, 0, 0), 2: ("Red", 23, 100, 0, 0), 3: ("Green", 23, 100, 0, 0),
+        4: ("Brown", 21, 100, 2, 1), 5: ("Blue", 20, 100, 0, 0), 6: ("Purple", 21, 100, 0, 0),
+    },
+    "Expert": {
+        1: ("Black", 18, 100, 2, 1), 2: ("Red", 18, 100, 2, 0), 3: ("Green", 19, 101, 0, 1),
+        4: ("Brown", 18, 100, 2, 0), 5: ("Blue", 18, 100, 2, 0), 6: ("Purple", 18, 101, 2, 0),
+    },
+}
+# Crabs and tired boats at every split of 50 races of seed 2024 with these pace limits
+GOLDEN_LIMIT = {25: 4, 50: 3, 75: 4, 85: 2}
+GOLDEN_CRABS = {25: 1, 50: 4, 75: 2, 85: 62}
+GOLDEN_TIRED = {25: 82, 50: 15, 75: 24, 85: 43}
+
+
+@pytest.mark.parametrize("difficulty", GOLDEN_RACES)
+def test_golden_race(difficulty):
+    boats = GameLogic.create_boat(["No more players"], race_rng(2024))
+    engine = RaceEngine(boats, NPCDecisions(difficulty))
+    engine.run()
+
+    assert not engine.running
+    assert {b.lane: (b.name, b.round, b.position, b.stroke_rate, len(b.stamina_pile)) for b in boats} == GOLDEN_RACES[difficulty]
+
+def test_golden_crab_counts():
+    assert game_crabs(GOLDEN_LIMIT, 50, 2024) == (GOLDEN_CRABS, GOLDEN_TIRED)
+
+def test_races_are_their_seed():
+    # Same race stream, same race, whatever ran before it
+    first = game_crabs(GOLDEN_LIMIT, 1, 2024, 7)
+    game_crabs(GOLDEN_LIMIT, 3, 99)
+    assert game_crabs(GOLDEN_LIMIT, 1, 2024, 7) == first
@@ -0,0 +1,121 @@
+import json
+import pytest
+from src.engine.constants import STAMINA
+from src.engine.race_engine import RaceEngine, NPCDecisions
+from src.engine.race_log import RaceRecorder, RaceLog, RaceReplayer, encode_keyframe, restore_keyframe, check_keyframe, MAGIC, HEADER
+from src.engine.race_logic import GameLogic
+from src.engine.rng import race_rng
+from src.engine.rules import DEFAULT_RULES
+
+COLORS = ["Red"]
+
+
+def race_states(seed):
+    """
+    Snapshot of the boats after every round of an NPC race, the start included.
+    """
+    boats = GameLogic.create_boat(COLORS, race_rng(seed))
+    engine = RaceEngine(boats, NPCDecisions())
+    states = [engine.snapshot()]
+    while engine.running:
+        engine.play_round()
+        states.append(engine.snapshot())
+    return states
+
+def played(seed, rounds):
+    boats = GameLogic.create_boat(COLORS, race_rng(seed))
+    engine = RaceEngine(boats, NPCDecisions())
+    for _ in range(rounds):
+        engine.play_round()
+    return boats
+
+
+# ------ KEYFRAMES ------
+@pytest.mark.parametrize("rounds", [0, 3, 9])
+def test_keyframe_round_trip(rounds):
+    boats = played(11, rounds)
+    body = encode_keyframe(rounds, boats)
+    restored = GameLogic.create_boat(COLORS, race_rng(11))
+
+    assert restore_keyframe(body, restored) == rounds
+    # Snapshots hold the piles in order and their card counts
+    assert [b.snapshot() for b in restored] == [b.snapshot() for b in boats]
+    assert [b.is_npc for b in restored] == [b.is_npc for b in boats]
+
+def test_keyframe_checks():
+    body = encode_keyframe(5, played(12, 5))
+    assert check_keyframe(body, DEFAULT_RULES)
+
+def test_truncated_keyframe_is_invalid():
+    body = encode_keyframe(5, played(13, 5))
+    assert not any(check_keyframe(body[:n], DEFAULT_RULES) for n in range(len(body)))
+
+def test_keyframe_with_trailing_bytes_is_invalid():
+    body = encode_keyframe(5, played(14, 5))
+    assert not check_keyframe(body + b"\x00", DEFAULT_RULES)
+
+def test_keyframe_with_unknown_card_is_invalid():
+    boats = played(15, 2)
+    assert boats[-1].discard_pile
+    body = bytearray(encode_keyframe(2, boats))
+    # Last card of the discard pile of the last boat
+    body[-1] = STAMINA + 1
+    assert not check_keyframe(bytes(body), DEFAULT_RULES)
+
+def test_keyframe_with_repeated_lane_is_invalid():
+    boats = played(16, 2)
+    boats[1].lane = boats[0].lane
+    assert not check_keyframe(encode_keyframe(2, boats), DEFAULT_RULES)
+
+
+# ------ REPLAYS ------
+def test_replay_rebuilds_every_round(tmp_path):
+    seed = 21
+    path = tmp_path / "race.rrlog"
+    boats = GameLogic.create_boat(COLORS, race_rng(seed))
+    recorder = RaceRecorder(path, seed, COLORS, boats, keyframe_every=4)
+    RaceEngine(boats, NPCDecisions(), recorder).run()
+
+    log = RaceLog.load(path)
+    states = race_states(seed)
+    assert log.finished
+    assert len(log.rounds) == len(states) - 1
+
+    replayer = RaceReplayer(log)
+    for rounds in (1, 4, 6, len(log.rounds)):
+        replayer.seek(rounds)
+        assert replayer.engine.snapshot()[1] == states[rounds][1]
+
+
+# ------ INVALID LOGS ------
+def recorded(path, seed = 22):
+    boats = GameLogic.create_boat(COLORS, race_rng(seed))
+    RaceEngine(boats, NPCDecisions(), RaceRecorder(path, seed, COLORS, boats)).run()
+    return path.read_bytes()
+
+def test_missing_log():
+    assert RaceLog.load("no such log.rrlog") is None
+
+@pytest.mark.parametrize("header", [
+    b"{not json",
+    b"\xff\xfe",                                                 # not text
+    json.dumps([1, 2]).encode(),                                # not an object
+    json.dumps({"seed": 1, "colors": COLORS}).encode(),         # no rules
+    json.dumps({"seed": 1, "colors": COLORS, "rules": {"no_such_rule": 1}}).encode(),
+    json.dumps({"colors": COLORS, "rules": {}}).encode(),       # no seed
+])
+def test_invalid_header(tmp_path, header):
+    data = recorded(tmp_path / "race.rrlog")
+    _, length = HEADER.unpack_from(data, len(MAGIC))
+    path = tmp_path / "broken.rrlog"
+    path.write_bytes(MAGIC + HEADER.pack(1, len(header)) + header + data[len(MAGIC) + HEADER.size + length:])
+    assert RaceLog.load(path) is None
+
+def test_truncated_logs_load_or_are_invalid(tmp_path):
+    data = recorded(tmp_path / "race.rrlog")
+    path = tmp_path / "cut.rrlog"
+    for n in range(0, len(data), 7):
+        path.write_bytes(data[:n])
+        # A log cut in its records keeps the whole rounds before the cut
+        log = RaceLog.load(path)
+        assert log is None or not log.finished
@@ -0,0 +1,152 @@
+import json
+import pytest
+from dataclasses import replace
+from src.engine.race_engine import RaceEngine, NPCDecisions, NullEvents
+from src.engine.race_logic import GameLogic
+from src.engine.race_save import RaceSave, AutoSave, MAGIC, HEADER
+from src.engine.rng import race_rng
+from src.engine.rules import DEFAULT_RULES
+
+SETTINGS = {"chosen_colors": ["Red"], "seed": 31, "difficulty": "Normal", "speed": "Instant", "turn_time": None}
+
+
+class SaveAt(NullEvents):
+    """
+    Event sink taking a save at the end of one round, when AutoSave would.
+    """
+    def __init__(self, boats, rounds):
+        self.boats = boats
+        self.rounds = rounds
+        self.played = 0
+        self.save = None
+
+    def round_finished(self, boats):
+        self.played += 1
+        if self.played == self.rounds:
+            self.save = RaceSave.capture(SETTINGS, self.boats, self.played)
+
+
+def saved_race(rounds, rules = DEFAULT_RULES):
+    """
+    Final state of a whole race and a save taken after some rounds of it.
+    """
+    boats = GameLogic.create_boat(SETTINGS["chosen_colors"], race_rng(SETTINGS["seed"]), rules)
+    events = SaveAt(boats, rounds)
+    engine = RaceEngine(boats, NPCDecisions(), events)
+    engine.run()
+    return engine.snapshot(), events.save
+
+def resumed(save):
+    boats = save.create_boats()
+    engine = RaceEngine(boats, NPCDecisions())
+    engine.check_finish_line()
+    engine.run()
+    return engine.snapshot()
+
+def with_header(data, header):
+    """
+    Save bytes with another JSON header.
+    """
+    _, length = HEADER.unpack_from(data, len(MAGIC))
+    encoded = json.dumps(header).encode()
+    return MAGIC + HEADER.pack(1, len(encoded)) + encoded + data[len(MAGIC) + HEADER.size + length:]
+
+
+# ------ ROUND TRIPS ------
+@pytest.mark.parametrize("rounds", [1, 5, 12])
+def test_resume_finishes_like_the_race(rounds):
+    final, save = saved_race(rounds)
+    assert resumed(RaceSave.from_bytes(save.to_bytes())) == final
+
+def test_save_file_round_trip(tmp_path):
+    _, save = saved_race(4)
+    path = tmp_path / "race.rrsave"
+    save.save(path)
+    loaded = RaceSave.load(path)
+
+    assert loaded.settings == SETTINGS
+    assert loaded.rules == save.rules
+    assert loaded.rounds == 4
+    assert loaded.random_state == save.random_state
+    assert loaded.boats_state == save.boats_state
+
+def test_rules_are_saved():
+    rules = replace(DEFAULT_RULES, lanes=4, hand_limit=6)
+    final, save = saved_race(3, rules)
+    loaded = RaceSave.from_bytes(save.to_bytes())
+    assert loaded.rules == rules
+    assert resumed(loaded) == final
+
+def test_autosave_is_removed_at_the_finish(tmp_path):
+    path = tmp_path / "autosave.rrsave"
+    boats = GameLogic.create_boat(SETTINGS["chosen_colors"], race_rng(SETTINGS["seed"]))
+    engine = RaceEngine(boats, NPCDecisions(), AutoSave(path, SETTINGS, boats))
+    engine.play_round()
+    assert RaceSave.load(path).rounds == 1
+    engine.run()
+    assert not path.exists()
+
+
+# ------ INVALID SAVES ------
+def test_missing_file():
+    assert RaceSave.load("no such save.rrsave") is None
+
+def test_truncated_saves_are_invalid():
+    data = saved_race(6)[1].to_bytes()
+    assert all(RaceSave.from_bytes(data[:n]) is None for n in range(len(data)))
+
+def test_other_version_is_invalid():
+    data = saved_race(2)[1].to_bytes()
+    assert RaceSave.from_bytes(MAGIC + HEADER.pack(2, 0) + data[len(MAGIC) + HEADER.size:]) is None
+
+@pytest.mark.parametrize("header", [
+    SETTINGS,                                                   # no rules
+    [1, 2],                                                     # not an object
+    {**SETTINGS, "rules": {"no_such_rule": 1}},
+    {**SETTINGS, "rules": {"lanes": 2}},                        # fewer lanes than the saved boats
+    {**SETTINGS, "chosen_colors": ["Pink"], "rules": {}},
+    {"seed": 31, "rules": {}},                                  # no players
+])
+def test_invalid_header(header):
+    data = saved_race(2)[1].to_bytes()
+    assert RaceSave.from_bytes(with_header(data, header)) is None
+
+def test_valid_header_is_kept():
+    data = saved_race(2)[1].to_bytes()
+    assert RaceSave.from_bytes(with_header(data, {**SETTINGS, "rules": {}})) is not None
+
+@pytest.mark.parametrize("field, value", [
+    ("chosen_colors", "Red"),                                   # not a list
+    ("chosen_colors", ["Red", "Red"]),
+    ("chosen_colors", ["Red", "Blue", "Green", "Yellow", "Brown", "Purple", "Cyan"]),   # more players than lanes
+    ("seed", "31"),
+    ("seed", True),
+    ("difficulty", "Hard"),
+    ("speed", "Slow"),
+    ("speed", ["Fast"]),
+    ("turn_time", 0),
+    ("turn_time", -15),
+    ("turn_time", "30"),
+    ("turn_time", float("inf")),
+    ("autosave_path", "elsewhere.rrsave"),                      # not a setting of the save
+])
+def test_invalid_setting(field, value):
+    data = saved_race(2)[1].to_bytes()
+    assert RaceSave.from_bytes(with_header(data, {**SETTINGS, field: value, "rules": {}})) is None
+
+@pytest.mark.parametrize("field", ["chosen_colors", "seed", "difficulty", "speed", "turn_time"])
+def test_missing_setting(field):
+    data = saved_race(2)[1].to_bytes()
+    header = {**SETTINGS, "rules": {}}
+    del header[field]
+    assert RaceSave.from_bytes(with_header(data, header)) is None
+
+def test_boat_count_follows_the_rules():
+    # Six lanes of boats saved, a race of these rules has seven
+    data = saved_race(2, replace(DEFAULT_RULES, lanes=6))[1].to_bytes()
+    assert RaceSave.from_bytes(with_header(data, {**SETTINGS, "rules": {"lanes": 7}})) is None
+
+@pytest.mark.parametrize("turn_time", [None, 15, 7.5])
+def test_valid_turn_times(turn_time):
+    data = saved_race(2)[1].to_bytes()
+    assert RaceSave.from_bytes(with_header(data, {**SETTINGS, "turn_time": turn_time, "rules": {}})) is not None
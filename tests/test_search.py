@@ -0,0 +1,41 @@
+from src.engine.race_engine import RaceEngine, NPCDecisions
+from src.engine.race_logic import GameLogic
+from src.engine.profiler import PhaseProfiler
+from src.engine.rng import race_rng
+from src.engine.rules import DEFAULT_RULES
+
+PLAYOUTS = 4
+
+
+def master_race(seed, profiler = None):
+    """
+    Final state of a race of "Master" NPCs searching a fixed number of playouts per choice.
+    """
+    boats = GameLogic.create_boat(["No more players"], race_rng(seed), DEFAULT_RULES)
+    decisions = NPCDecisions("Master", seed)
+    decisions.search.playouts = PLAYOUTS
+    engine = RaceEngine(boats, decisions)
+    if profiler is not None:
+        profiler.attach(engine)
+    engine.run()
+    return engine.snapshot(), decisions.search
+
+
+def test_master_races_follow_the_seed():
+    assert master_race(5)[0] == master_race(5)[0]
+
+def test_seed_search_starts_the_stream_again():
+    decisions = NPCDecisions("Master", 5)
+    first = decisions.search.rng.random()
+    decisions.seed_search(5)
+    assert decisions.search.rng.random() == first
+
+def test_profiler_leaves_playouts_out():
+    with PhaseProfiler() as profiler:
+        _, search = master_race(5, profiler)
+    phases = profiler.phases
+    # Choices without an alternative are timed too, without a search counted
+    assert phases["search"][0] >= search.searches > 0
+    # At most one turn a round for every boat of the race, the playouts would count many times more
+    assert phases["round"][0] < 100
+    assert phases["turn"][0] <= phases["round"][0] * DEFAULT_RULES.lanes
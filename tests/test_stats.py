@@ -0,0 +1,73 @@
+import pytest
+from analysis.stats import RunningStats, Histogram, RaceStats, proportion_interval
+from src.engine.race_engine import RaceEngine, NPCDecisions
+from src.engine.race_logic import GameLogic
+from src.engine.rng import race_rng
+
+
+def state(stats):
+    """
+    Every aggregate of a RaceStats, to compare them as a whole.
+    """
+    def running(r):
+        return r.count, r.total, r.squares, r.low, r.high
+
+    return (
+        stats.races, running(stats.rounds), list(stats.rounds_histogram.counts),
+        {lane: list(h.counts) for lane, h in stats.places.items()},
+        {lane: running(r) for lane, r in stats.place_stats.items()},
+        [running(r) for r in stats.split_stamina], [list(h.counts) for h in stats.split_stamina_histograms],
+        stats.turns_by_rate, stats.crabs_by_rate, running(stats.tides), running(stats.motivations),
+    )
+
+def race_stats(races):
+    stats = RaceStats()
+    for race in races:
+        boats = GameLogic.create_boat(["No more players"], race_rng(9, race))
+        RaceEngine(boats, NPCDecisions(), stats).run()
+    return stats
+
+
+# ------ MERGES ------
+@pytest.mark.parametrize("shards", [[range(0, 40)], [range(0, 13), range(13, 30), range(30, 40)], [range(30, 40), range(0, 30)]])
+def test_merged_shards_equal_one_pass(shards):
+    merged = RaceStats()
+    for shard in shards:
+        merged.merge(race_stats(shard))
+    assert state(merged) == state(race_stats(range(40)))
+
+def test_running_stats_merge():
+    values = [3, 9, 1, 4, 4, 12, 0]
+    whole, first, second = RunningStats(), RunningStats(), RunningStats()
+    for i, v in enumerate(values):
+        whole.add(v)
+        (first if i < 3 else second).add(v)
+    first.merge(second)
+    first.merge(RunningStats())
+    assert (first.count, first.total, first.squares, first.low, first.high) == (whole.count, whole.total, whole.squares, 0, 12)
+    assert first.mean == pytest.approx(33 / 7)
+    assert first.variance == pytest.approx(sum((v - 33 / 7) ** 2 for v in values) / 6)
+
+def test_histogram_quantiles():
+    h = Histogram(0, 10)
+    for v in [1, 2, 2, 3, 15, -4]:
+        h.add(v)
+    # Samples out of range are kept in the end bins
+    assert h.counts[0] == 1 and h.counts[10] == 1
+    assert (h.quantile(0.5), h.quantile(1.0)) == (2, 10)
+
+
+# ------ INTERVALS ------
+@pytest.mark.parametrize("successes, trials, low, high", [
+    (0, 10, 0.0, 0.2775),
+    (10, 10, 0.7225, 1.0),
+    (5, 10, 0.2366, 0.7634),
+    (1, 100, 0.0018, 0.0545),
+    (0, 0, 0.0, 0.0),
+])
+def test_wilson_bounds(successes, trials, low, high):
+    assert proportion_interval(successes, trials) == pytest.approx((low, high), abs=5e-5)
+
+def test_wilson_bounds_are_symmetric():
+    low, high = proportion_interval(3, 40)
+    assert proportion_interval(37, 40) == pytest.approx((1 - high, 1 - low))
@@ -0,0 +1,97 @@
+from fractions import Fraction
+import pytest
+from src.engine.constants import INSTABILITY, STAMINA
+from src.engine.race_logic import GameLogic
+from src.engine.rng import race_rng
+from src.engine.turn_odds import TurnOdds
+
+
+class PathRandom:
+    """
+    Random stream that follows a path of choices, then takes the first choice of every new draw.
+    Records the number of choices of every draw, so every path of a turn can be enumerated.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.choices = []
+
+    def randrange(self, n):
+        i = len(self.choices)
+        self.choices.append(n)
+        return self.path[i] if i < len(self.path) else 0
+
+    def randint(self, a, b):
+        return a + self.randrange(b - a + 1)
+
+
+def boat_with(hand, draw, discard, position = 0, stamina = 7):
+    boat = GameLogic.create_boat([], race_rng(0))[0]
+    boat.set_hand(hand)
+    boat.deck.set_piles(draw, discard)
+    boat.stamina_pile = boat.stamina_pile[:stamina]
+    boat.position = position
+    return boat
+
+def enumerate_turn(setup, cards):
+    """
+    Exact distribution of the calculate_movement results, by playing the turn down every path of the random stream.
+    """
+    distribution = {}
+    path = []
+    while True:
+        boat = setup()
+        rng = PathRandom(path)
+        boat.rng = boat.deck.rng = rng
+        movement = GameLogic.calculate_movement(boat, cards)
+
+        p = Fraction(1)
+        for n in rng.choices:
+            p /= n
+        distribution[movement] = distribution.get(movement, 0) + p
+
+        # Next path: advance the last draw that has choices left
+        path = path + [0] * (len(rng.choices) - len(path))
+        while path and path[-1] + 1 == rng.choices[len(path) - 1]:
+            path.pop()
+        if not path:
+            return distribution
+        path[-1] += 1
+
+
+SETUPS = {
+    "pace only": ([1, 3, 2], [1, 2, 3, 3], [], [1, 3, 2]),
+    "one flip": ([INSTABILITY, 2], [1, 2, 3, INSTABILITY], [2], [INSTABILITY, 2]),
+    "flips through a reshuffle": ([INSTABILITY, INSTABILITY, INSTABILITY, 1], [3, INSTABILITY], [1, 2, STAMINA], [INSTABILITY] * 3 + [1]),
+    "nothing left to flip": ([INSTABILITY, INSTABILITY], [2], [], [INSTABILITY, INSTABILITY]),
+}
+
+@pytest.mark.parametrize("name", SETUPS)
+def test_movement_matches_every_path(name):
+    hand, draw, discard, cards = SETUPS[name]
+    setup = lambda: boat_with(hand, draw, discard)
+    expected = enumerate_turn(setup, cards)
+
+    assert TurnOdds.movement_distribution(setup(), cards, exact=True) == expected
+    odds = TurnOdds.movement_distribution(setup(), cards)
+    assert odds.keys() == expected.keys()
+    assert all(abs(odds[m] - float(p)) < 1e-12 for m, p in expected.items())
+
+def test_odds_leave_the_boat_unchanged():
+    hand, draw, discard, cards = SETUPS["flips through a reshuffle"]
+    boat = boat_with(hand, draw, discard)
+    before = boat.snapshot()
+    TurnOdds.status_odds(boat, cards, exact=True)
+    assert boat.snapshot() == before
+
+@pytest.mark.parametrize("position, stamina", [(20, 7), (20, 1), (45, 0)])
+def test_split_outcomes_match_every_path(position, stamina):
+    hand, draw, discard, cards = SETUPS["flips through a reshuffle"]
+    setup = lambda: boat_with(hand, draw, discard, position, stamina)
+    expected = {}
+    for movement, p in enumerate_turn(setup, cards).items():
+        outcome = GameLogic.check_split_limit(setup(), movement)
+        expected[outcome] = expected.get(outcome, 0) + p
+
+    assert TurnOdds.split_outcomes(setup(), cards, exact=True) == expected
+    odds = TurnOdds.status_odds(setup(), cards, exact=True)
+    assert sum(odds.values()) == 1